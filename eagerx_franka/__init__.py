@@ -1 +1,23 @@
 __version__ = "0.0.12"
+
+# Public classes are resolved on first access, so that `import eagerx_franka` stays cheap (e.g. in spawned workers)
+# and engine backends, the ROS client, and heavy math dependencies are only imported when they are used.
+_LAZY_ATTRS = {
+    "FrankaArm": "eagerx_franka.franka_arm.franka_arm",
+    "EndEffectorDownward": "eagerx_franka.ik.node",
+    "ArmEnv": "eagerx_franka.env",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY_ATTRS.keys()))
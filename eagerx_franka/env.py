@@ -1,4 +1,3 @@
-from scipy.spatial.transform import Rotation as R
 import typing as t
 import eagerx
 import numpy as np
@@ -131,6 +130,8 @@ class ArmEnv(eagerx.BaseEnv):
         return obs, rwd, terminated, truncated, info
 
     def reset(self, states: t.Optional[t.Dict[str, np.ndarray]] = None, seed: t.Optional[int] = None, options=None):
+        from scipy.spatial.transform import Rotation as R
+
         # Reset steps counter
         self.steps = 0
 
@@ -0,0 +1,30 @@
+from typing import Union, Tuple
+import numpy as np
+
+
+class OutputBuffers:
+    """Preallocated float32 arrays in which an engine node computes its outputs (and intermediate results).
+
+    Callbacks write into the buffers in-place (e.g. with the `out=` argument of NumPy ufuncs), so that no arrays are
+    allocated per tick. Messages may be passed by reference to other nodes in the same process, so a buffer must only
+    leave the node as a copy (see :meth:`emit`).
+
+    .. code-block:: python
+
+        self.buffers = OutputBuffers(currj=7, stepj=7)
+        np.take(position, joint_idx, out=self.buffers.currj)
+        ...
+        return dict(action_applied=self.buffers.emit("stepj"))
+    """
+
+    def __init__(self, **shapes: Union[int, Tuple[int, ...]]):
+        """Allocates a zero-initialized float32 array per keyword.
+
+        :param shapes: Shape of every buffer.
+        """
+        for name, shape in shapes.items():
+            setattr(self, name, np.zeros(shape, dtype="float32"))
+
+    def emit(self, name: str) -> np.ndarray:
+        """Copy of a buffer that can be sent as a message."""
+        return getattr(self, name).copy()
@@ -5,15 +5,37 @@ from eagerx_reality.engine import RealEngine
 from eagerx.core.specs import ObjectSpec
 from eagerx.core.graph_engine import EngineGraph
 import eagerx.core.register as register
-import eagerx_franka
-from eagerx_franka.utils import generate_urdf, get_joint_limits
-
-import os
-
-try:
-    from urdf_parser_py.urdf import URDF
-except ImportError:
-    print("Please install urdf_parser_py")
+from eagerx_franka.urdf import get_urdf_ref, resolve_urdf
+from eagerx_franka.franka_arm.kinematic_model import get_kinematic_model
+
+import copy
+import numpy as np
+
+# Engine nodes that FrankaArm.pybullet_engine creates to implement each sensor/actuator (incl. their dependencies).
+_PYBULLET_ENGINE_NODES = dict(
+    # Sensors
+    position=["joint_states"],  # All joint state sensors are fused into one node (per rate).
+    velocity=["joint_states"],
+    force_torque=["joint_states"],
+    gripper_position=["joint_states"],
+    ee_pos=["ee_link_state"],  # All end-effector sensors are fused into one node (per rate).
+    ee_orn=["ee_link_state"],
+    ee_vel=["ee_link_state"],
+    ee_ang_vel=["ee_link_state"],
+    moveit_status=["moveit_to"],  # Reports the status of the moveit_to actuator.
+    moveit_time_to_goal=["moveit_to"],  # Reports the planned time [s] until the moveit_to actuator reaches its goal.
+    jacobian=["dynamics"],  # All dynamics sensors are fused into one node (per rate).
+    mass_matrix=["dynamics"],
+    ee_twist=["dynamics"],
+    # Actuators
+    pos_control=["pos_control"],
+    vel_control=["vel_control"],
+    gripper_control=["gripper_control"],
+    moveit_to=["moveit_to"],
+    moveit_to_ee_pose=["task_space", "moveit_to_ee_pose"],  # Inverse kinematics, followed by a joint trajectory.
+    ee_dxyz=["ee_downward", "ee_downward_control"],  # Inverse kinematics, followed by position control.
+    ee_dyaw=["ee_downward", "ee_downward_control"],
+)
 
 
 class FrankaArm(eagerx.Object):
@@ -25,7 +47,13 @@ class FrankaArm(eagerx.Object):
         gripper_position=Space(dtype="float32"),
         ee_pos=Space(low=[-2, -2, 0], high=[2, 2, 2], dtype="float32"),
         ee_orn=Space(low=-1, high=1, shape=(4,), dtype="float32"),
+        ee_vel=Space(low=-2, high=2, shape=(3,), dtype="float32"),
+        ee_ang_vel=Space(low=-5, high=5, shape=(3,), dtype="float32"),
         moveit_status=Space(low=0, high=1, shape=(), dtype="int64"),
+        moveit_time_to_goal=Space(low=0, high=999, shape=(), dtype="float32"),
+        jacobian=Space(dtype="float32"),
+        mass_matrix=Space(dtype="float32"),
+        ee_twist=Space(low=-5, high=5, shape=(6,), dtype="float32"),
     )
     @register.actuators(
         pos_control=Space(dtype="float32"),
@@ -33,6 +61,8 @@ class FrankaArm(eagerx.Object):
         gripper_control=Space(low=[0], high=[1], dtype="float32"),
         moveit_to=Space(dtype="float32"),
         moveit_to_ee_pose=Space(dtype="float32"),
+        ee_dxyz=Space(low=-0.2, high=0.2, shape=(3,), dtype="float32"),
+        ee_dyaw=Space(low=-np.pi, high=np.pi, shape=(), dtype="float32"),
     )
     @register.engine_states(
         ee_pose=Space(low=[-2, -2, 0, -1, -1, -1, -1], high=[2, 2, 2, 1, 1, 1, 1], dtype="float32"),
@@ -55,66 +85,63 @@ class FrankaArm(eagerx.Object):
         fixed_base=True,
         joint_limits=None,
         regenerate_urdf=False,
+        ik_solver="pybullet",
+        ik_client="live",
+        ik_table=False,
+        planner=None,
+        ik_filter=False,
+        min_height=0.0,
+        safe_control=False,
     ) -> ObjectSpec:
         """Object spec of FrankaArm"""
-        if URDF is None:
-            raise ImportError("Ros not installed. Required for generating urdf.")
-
         spec = cls.get_specification()
-        joint_limits = get_joint_limits(robot_type, joint_limits)
-
-        # Extract info on franka arm from assets
-        if regenerate_urdf:
-            urdf = URDF.from_parameter_server(generate_urdf(robot_type, ns="pybullet_urdf"))
-        else:
-            module_path = os.path.dirname(eagerx_franka.__file__) + "/assets/"
-            urdf = URDF.from_xml_file(module_path + "franka_panda/panda.urdf")
-
-        gripper_names = [joint.name for joint in urdf.joints if "finger" in joint.name]
-        gripper_link = [link.name for link in urdf.links if f"{robot_type}_link8" in link.name][0]
-        gripper_link = [link.name for link in urdf.links if f"{robot_type}_grasptarget" in link.name][0]
-
-        # Determine joint limits
-        joint_names = []
-        joint_lower, joint_upper, vel_limit = [], [], []
-        for n in joint_limits.keys():
-            joint_names.append(f"{robot_type}_{n}")
-            joint_obj = next((joint for joint in urdf.joints if joint.name == f"{robot_type}_{n}"), None)
-            joint_lower.append(joint_obj.limit.lower)
-            joint_upper.append(joint_obj.limit.upper)
-            vel_limit.append(joint_obj.limit.velocity)
-
-        # Determine gripper limits
-        gripper_lower, gripper_upper = [], []
-        for n in gripper_names:
-            joint_obj = next((joint for joint in urdf.joints if joint.name == n), None)
-            gripper_lower.append(joint_obj.limit.lower)
-            gripper_upper.append(joint_obj.limit.upper)
+
+        # Extract info on franka arm from assets (cached, so the urdf is only parsed once)
+        urdf = get_urdf_ref(robot_type, regenerate=regenerate_urdf)
+        model = get_kinematic_model(robot_type, joint_limits, urdf=urdf)
+        joint_names = model.joint_names.tolist()
+        joint_lower = model.joint_lower.tolist()
+        joint_upper = model.joint_upper.tolist()
+        vel_limit = model.vel_limit.tolist()
+        gripper_names = model.gripper_names.tolist()
+        gripper_lower = model.gripper_lower.tolist()
+        gripper_upper = model.gripper_upper.tolist()
 
         # Modify default config
         spec.config.name = name
         spec.config.sensors = sensors if isinstance(sensors, list) else ["position", "velocity"]
         spec.config.actuators = actuators if isinstance(actuators, list) else ["pos_control", "gripper_control"]
         spec.config.states = states if isinstance(states, list) else ["position", "velocity", "gripper"]
+        if ("ee_dxyz" in spec.config.actuators) != ("ee_dyaw" in spec.config.actuators):
+            raise ValueError("The `ee_dxyz` and `ee_dyaw` actuators must be selected together.")
+        if "ee_dxyz" in spec.config.actuators and {"pos_control", "vel_control"} & set(spec.config.actuators):
+            raise ValueError("The `ee_dxyz` and `ee_dyaw` actuators cannot be selected with `pos_control` or `vel_control`.")
 
         # Add registered config params
         spec.config.robot_type = robot_type
         spec.config.arm_name = arm_name if arm_name else robot_type
         spec.config.joint_names = joint_names
         spec.config.gripper_names = gripper_names
-        spec.config.gripper_link = gripper_link
+        spec.config.gripper_link = model.gripper_link
         spec.config.gripper_lower = gripper_lower
         spec.config.gripper_upper = gripper_upper
         spec.config.base_pos = base_pos if base_pos else [0, 0, 0]
         spec.config.base_or = base_or if base_or else [0, 0, 0, 1]
         spec.config.self_collision = self_collision
         spec.config.fixed_base = fixed_base
-        spec.config.joint_limits = joint_limits
+        spec.config.joint_limits = copy.deepcopy(model.joint_limits)
         spec.config.joint_lower = joint_lower
         spec.config.joint_upper = joint_upper
         spec.config.vel_limit = vel_limit
-        spec.config.urdf = urdf.to_xml_string()
+        spec.config.urdf = urdf  # Only a reference, see eagerx_franka.urdf.resolve_urdf
         spec.config.regenerate_urdf = regenerate_urdf
+        spec.config.ik_solver = ik_solver  # Used by the ee_pose state and moveit_to_ee_pose actuator (pybullet only).
+        spec.config.ik_client = ik_client  # Client that runs pybullet's ik solver ("live" or "shadow", pybullet only).
+        spec.config.ik_table = ik_table  # Reset ee_pose from an ik table, see scripts/build_ik_table.py (pybullet only).
+        spec.config.planner = planner  # None or "roadmap" (see scripts/build_roadmap.py, pybullet only).
+        spec.config.ik_filter = ik_filter  # Select a collision-free ik candidate in moveit_to_ee_pose (pybullet only).
+        spec.config.min_height = min_height  # Minimum height of all links of filtered ik candidates and safe control [m].
+        spec.config.safe_control = safe_control  # Hold joint and ee_dxyz/ee_dyaw actions before collisions (pybullet only).
         spec.config.sleep_positions = [0.0 for _j in joint_lower]
 
         # Set rates
@@ -124,10 +151,18 @@ class FrankaArm(eagerx.Object):
         spec.sensors.gripper_position.rate = rate
         spec.sensors.ee_pos.rate = rate
         spec.sensors.ee_orn.rate = rate
+        spec.sensors.ee_vel.rate = rate
+        spec.sensors.ee_ang_vel.rate = rate
         spec.sensors.moveit_status.rate = rate
+        spec.sensors.moveit_time_to_goal.rate = rate
+        spec.sensors.jacobian.rate = rate
+        spec.sensors.mass_matrix.rate = rate
+        spec.sensors.ee_twist.rate = rate
         spec.actuators.pos_control.rate = rate
         spec.actuators.moveit_to.rate = rate
         spec.actuators.moveit_to_ee_pose.rate = rate
+        spec.actuators.ee_dxyz.rate = rate
+        spec.actuators.ee_dyaw.rate = rate
         spec.actuators.vel_control.rate = rate
         spec.actuators.gripper_control.rate = 1
 
@@ -137,6 +172,9 @@ class FrankaArm(eagerx.Object):
         spec.sensors.ee_pos.rate = rate
         spec.sensors.ee_orn.rate = rate
         spec.sensors.gripper_position.space.update(low=[gripper_lower[0] * 0.9], high=[gripper_upper[0] * 1.1])
+        n = len(joint_names)
+        spec.sensors.jacobian.space.update(low=np.full((6, n), -2.0).tolist(), high=np.full((6, n), 2.0).tolist())
+        spec.sensors.mass_matrix.space.update(low=np.full((n, n), -10.0).tolist(), high=np.full((n, n), 10.0).tolist())
         spec.actuators.pos_control.space.update(low=joint_lower, high=joint_upper)
         spec.actuators.vel_control.space.update(low=[-v for v in vel_limit], high=vel_limit)
         spec.actuators.moveit_to.space.update(low=joint_lower, high=joint_upper)
@@ -153,13 +191,7 @@ class FrankaArm(eagerx.Object):
         """Engine-specific implementation (Pybullet) of the object."""
         # Set object arguments (as registered per register.engine_params(..) above the engine.add_object(...) method.)
 
-        module_path = os.path.dirname(eagerx_franka.__file__) + "/assets/franka_panda/"
-        urdf = spec.config.urdf
-        if not spec.config.regenerate_urdf:
-            urdf_sbtd = urdf.replace("package://", module_path)
-            spec.engine.urdf = urdf_sbtd
-        else:
-            spec.engine.urdf = urdf
+        spec.engine.urdf = resolve_urdf(spec.config.urdf)
         spec.engine.basePosition = spec.config.base_pos
         spec.engine.baseOrientation = spec.config.base_or
         spec.engine.fixed_base = spec.config.fixed_base
@@ -183,6 +215,10 @@ class FrankaArm(eagerx.Object):
             lower=spec.config.joint_lower,
             ee_link=spec.config.gripper_link,
             rest_poses=spec.config.sleep_positions,
+            ik_solver=spec.config.ik_solver,
+            ik_client=spec.config.ik_client,
+            ik_table=spec.config.ik_table,
+            robot_type=spec.config.robot_type,
         )
         spec.engine.states.position = JointState.make(joints=joints, mode="position")
         spec.engine.states.velocity = JointState.make(joints=joints, mode="velocity")
@@ -191,144 +227,218 @@ class FrankaArm(eagerx.Object):
         if "gripper_control" not in spec.config.actuators:
             spec.engine.states.gripper.fixed = True
 
+        # Only create the engine nodes that implement the selected sensors and actuators.
+        selected = list(spec.config.sensors) + list(spec.config.actuators)
+        required = set(n for cname in selected for n in _PYBULLET_ENGINE_NODES.get(cname, []))
+
         # Create sensor engine nodes
-        from eagerx_pybullet.enginenodes import LinkSensor, JointSensor, JointController
-        from eagerx_franka.franka_arm.pybullet.enginenodes import MoveItController, TaskSpaceControl
-
-        pos_sensor = JointSensor.make("pos_sensor", rate=spec.sensors.position.rate, process=2, joints=joints, mode="position")
-        vel_sensor = JointSensor.make("vel_sensor", rate=spec.sensors.velocity.rate, process=2, joints=joints, mode="velocity")
-        ft_sensor = JointSensor.make(
-            "ft_sensor",
-            rate=spec.sensors.force_torque.rate,
-            process=2,
-            joints=[spec.config.joint_names[-1]],
-            mode="force_torque",
+        from eagerx_franka.franka_arm.pybullet.enginenodes import (
+            FrankaDynamicsSensor,
+            FrankaJointController,
+            FrankaJointStateSensor,
+            FrankaLinkStateSensor,
+            MoveItController,
+            SafeJointController,
+            TaskSpaceControl,
+            EndEffectorDownwardControl,
         )
 
-        gripper_sensor = JointSensor.make(
-            "gripper_sensor",
-            rate=spec.sensors.gripper_position.rate,
-            joints=spec.config.gripper_names[:1],
-            mode="position",
-        )
-
-        ee_pos_sensor = LinkSensor.make(
-            "ee_pos_sensor",
-            rate=spec.sensors.ee_pos.rate,
-            links=[spec.config.gripper_link],
-            mode="position",
-        )
-        ee_orn_sensor = LinkSensor.make(
-            "ee_orn_sensor",
-            rate=spec.sensors.ee_orn.rate,
-            links=[spec.config.gripper_link],
-            mode="orientation",
-        )
+        nodes, graph_sensors = dict(), dict()
+
+        def add_fused_sensors(name, outputs, make):
+            # Sensors with the same rate share a node (`outputs` maps sensor -> output), because an engine node has a
+            # single rate.
+            groups = dict()
+            for sensor in outputs:
+                if sensor in spec.config.sensors:
+                    groups.setdefault(spec.sensors[sensor].rate, []).append(sensor)
+            for i, (rate, sensors) in enumerate(groups.items()):
+                node_name = name if i == 0 else f"{name}_{i}"
+                selected = [outputs[sensor] for sensor in sensors]
+                nodes[node_name] = make(node_name, rate, selected)
+                # Eagerx synchronizes the engine with the first registered output of a node, so it must be selected.
+                first = next(iter(nodes[node_name].outputs))
+                if first not in selected:
+                    nodes[node_name] = make(node_name, rate, [first] + selected)
+                for sensor in sensors:
+                    graph_sensors[sensor] = nodes[node_name].outputs[outputs[sensor]]
+
+        if "joint_states" in required:
+            add_fused_sensors(
+                "joint_states",
+                dict(
+                    position="position", velocity="velocity", force_torque="force_torque", gripper_position="gripper_position"
+                ),
+                lambda name, rate, outputs: FrankaJointStateSensor.make(
+                    name,
+                    rate=rate,
+                    joints=joints,
+                    gripper_joints=spec.config.gripper_names,
+                    ft_joints=[spec.config.joint_names[-1]],
+                    outputs=outputs,
+                ),
+            )
+        if "ee_link_state" in required:
+            add_fused_sensors(
+                "ee_link_state",
+                dict(ee_pos="position", ee_orn="orientation", ee_vel="velocity", ee_ang_vel="angular_vel"),
+                lambda name, rate, outputs: FrankaLinkStateSensor.make(
+                    name, rate=rate, link=spec.config.gripper_link, outputs=outputs
+                ),
+            )
+        if "dynamics" in required:
+            add_fused_sensors(
+                "dynamics",
+                dict(jacobian="jacobian", mass_matrix="mass_matrix", ee_twist="ee_twist"),
+                lambda name, rate, outputs: FrankaDynamicsSensor.make(
+                    name, rate=rate, joints=joints, link=spec.config.gripper_link, outputs=outputs
+                ),
+            )
 
         # Create actuator engine nodes
         # Rate=None, but we will connect it to an actuator (thus will use the rate set in the agnostic specification)
-        pos_control = JointController.make(
-            "pos_control",
-            rate=spec.actuators.pos_control.rate,
-            joints=joints,
-            mode="position_control",
-            vel_target=len(joints) * [0.0],
-            pos_gain=len(joints) * [0.5],
-            vel_gain=len(joints) * [1.0],
-            max_vel=[0.5 * vel for vel in spec.config.vel_limit],
-            max_force=len(joints) * [2.5],
-        )
-        vel_control = JointController.make(
-            "vel_control",
-            rate=spec.actuators.vel_control.rate,
-            joints=joints,
-            mode="velocity_control",
-            vel_gain=len(joints) * [1.0],
-            max_force=len(joints) * [5.0],  # todo: limit?
-        )
-
-        gripper = JointController.make(
-            "gripper_control",
-            rate=spec.actuators.gripper_control.rate,
-            joints=spec.config.gripper_names,
-            mode="position_control",
-            vel_target=[0.0, 0.0],
-            pos_gain=[0.1, 0.1],
-            vel_gain=[1.0, 1.0],
-            max_force=[2.0, 2.0],
-        )
-
-        moveit_to = MoveItController.make(
-            "moveit_to",
-            rate=spec.actuators.moveit_to.rate,
-            joints=joints,
-            vel_target=len(joints) * [0.0],
-            pos_gain=len(joints) * [0.5],
-            vel_gain=len(joints) * [1.0],
-            max_vel=[0.5 * vel for vel in spec.config.vel_limit],
-            max_force=len(joints) * [5.0],
-        )
-
-        ik_ee_pose = TaskSpaceControl.make(
-            "task_space",
-            rate=spec.actuators.moveit_to_ee_pose.rate,
-            joints=spec.config.joint_names,
-            upper=spec.config.joint_upper,
-            lower=spec.config.joint_lower,
-            ee_link=spec.config.gripper_link,
-            rest_poses=spec.config.sleep_positions,
-        )
-
-        moveit_to_ee_pose = MoveItController.make(
-            "moveit_to_ee_pose",
-            rate=spec.actuators.moveit_to_ee_pose.rate,
-            joints=joints,
-            vel_target=len(joints) * [0.0],
-            pos_gain=len(joints) * [0.5],
-            vel_gain=len(joints) * [1.0],
-            max_vel=[0.5 * vel for vel in spec.config.vel_limit],
-            max_force=len(joints) * [5.0],
-        )
-
-        from eagerx_franka.franka_arm.processor import MirrorAction
-
-        gripper.inputs.action.processor = MirrorAction.make(index=0, constant=constant, scale=scale)
-
-        # Connect all engine nodes
-        graph.add(
-            [
-                pos_sensor,
-                vel_sensor,
-                ft_sensor,
-                ee_pos_sensor,
-                ee_orn_sensor,
-                gripper_sensor,
-                pos_control,
-                vel_control,
-                gripper,
-                moveit_to,
-                ik_ee_pose,
-                moveit_to_ee_pose,
-            ]
-        )
-        graph.connect(source=pos_sensor.outputs.obs, sensor="position")
-        graph.connect(source=vel_sensor.outputs.obs, sensor="velocity")
-        graph.connect(source=ft_sensor.outputs.obs, sensor="force_torque")
-        graph.connect(source=ee_pos_sensor.outputs.obs, sensor="ee_pos")
-        graph.connect(source=ee_orn_sensor.outputs.obs, sensor="ee_orn")
-        graph.connect(source=gripper_sensor.outputs.obs, sensor="gripper_position")
-        graph.connect(source=moveit_to.outputs.status, sensor="moveit_status")
-        graph.connect(actuator="pos_control", target=pos_control.inputs.action)
-        graph.connect(actuator="vel_control", target=vel_control.inputs.action)
-        graph.connect(actuator="gripper_control", target=gripper.inputs.action)
-        graph.connect(actuator="moveit_to", target=moveit_to.inputs.action)
-        graph.connect(actuator="moveit_to_ee_pose", target=ik_ee_pose.inputs.ee_pose)
-        graph.connect(source=ik_ee_pose.outputs.goal, target=moveit_to_ee_pose.inputs.action)
+        # With `safe_control`, the joint controllers filter the actions for joint limits and collisions.
+        joint_controller, safety = FrankaJointController, dict()
+        if spec.config.safe_control:
+            joint_controller = SafeJointController
+            safety = dict(
+                lower=spec.config.joint_lower,
+                upper=spec.config.joint_upper,
+                vel_limit=spec.config.vel_limit,
+                robot_type=spec.config.robot_type,
+                ground_height=spec.config.min_height,
+            )
+        if "pos_control" in required:
+            nodes["pos_control"] = joint_controller.make(
+                "pos_control",
+                rate=spec.actuators.pos_control.rate,
+                joints=joints,
+                mode="position_control",
+                vel_target=len(joints) * [0.0],
+                pos_gain=len(joints) * [0.5],
+                vel_gain=len(joints) * [1.0],
+                max_vel=[0.5 * vel for vel in spec.config.vel_limit],
+                max_force=len(joints) * [2.5],
+                **safety,
+            )
+        if "vel_control" in required:
+            nodes["vel_control"] = joint_controller.make(
+                "vel_control",
+                rate=spec.actuators.vel_control.rate,
+                joints=joints,
+                mode="velocity_control",
+                vel_gain=len(joints) * [1.0],
+                max_force=len(joints) * [5.0],  # todo: limit?
+                **safety,
+            )
+        if "gripper_control" in required:
+            from eagerx_franka.franka_arm.processor import MirrorAction
+
+            nodes["gripper_control"] = FrankaJointController.make(
+                "gripper_control",
+                rate=spec.actuators.gripper_control.rate,
+                joints=spec.config.gripper_names,
+                mode="position_control",
+                vel_target=[0.0, 0.0],
+                pos_gain=[0.1, 0.1],
+                vel_gain=[1.0, 1.0],
+                max_force=[2.0, 2.0],
+            )
+            nodes["gripper_control"].inputs.action.processor = MirrorAction.make(index=0, constant=constant, scale=scale)
+        for name in ["moveit_to", "moveit_to_ee_pose"]:
+            if name in required:
+                nodes[name] = MoveItController.make(
+                    name,
+                    rate=spec.actuators[name].rate,
+                    joints=joints,
+                    vel_target=len(joints) * [0.0],
+                    pos_gain=len(joints) * [0.5],
+                    vel_gain=len(joints) * [1.0],
+                    max_vel=[0.5 * vel for vel in spec.config.vel_limit],
+                    max_force=len(joints) * [5.0],
+                    vel_limit=spec.config.vel_limit,
+                    planner=spec.config.planner,
+                    robot_type=spec.config.robot_type,
+                )
+        if "task_space" in required:
+            nodes["task_space"] = TaskSpaceControl.make(
+                "task_space",
+                rate=spec.actuators.moveit_to_ee_pose.rate,
+                joints=spec.config.joint_names,
+                upper=spec.config.joint_upper,
+                lower=spec.config.joint_lower,
+                ee_link=spec.config.gripper_link,
+                rest_poses=spec.config.sleep_positions,
+                ik_solver=spec.config.ik_solver,
+                ik_client=spec.config.ik_client,
+                ik_filter=spec.config.ik_filter,
+                min_height=spec.config.min_height,
+                robot_type=spec.config.robot_type,
+            )
+        if "ee_downward" in required:
+            # The delta position and yaw are limited to the spaces of the actuators.
+            nodes["ee_downward"] = EndEffectorDownwardControl.make(
+                "ee_downward",
+                rate=spec.actuators.ee_dxyz.rate,
+                robot_type=spec.config.robot_type,
+                joints=joints,
+                ee_link=spec.config.gripper_link,
+                upper=spec.config.joint_upper,
+                lower=spec.config.joint_lower,
+                max_dxyz=np.broadcast_to(spec.actuators.ee_dxyz.space.high, (3,)).tolist(),
+                max_dyaw=float(spec.actuators.ee_dyaw.space.high),
+            )
+            nodes["ee_downward_control"] = joint_controller.make(
+                "ee_downward_control",
+                rate=spec.actuators.ee_dxyz.rate,
+                joints=joints,
+                mode="position_control",
+                vel_target=len(joints) * [0.0],
+                pos_gain=len(joints) * [0.5],
+                vel_gain=len(joints) * [1.0],
+                max_vel=[0.5 * vel for vel in spec.config.vel_limit],
+                max_force=len(joints) * [2.5],
+                **safety,
+            )
+
+        # Connect the created engine nodes
+        graph.add(list(nodes.values()))
+        for sensor, source in graph_sensors.items():
+            graph.connect(source=source, sensor=sensor)
+        if "moveit_status" in spec.config.sensors:
+            graph.connect(source=nodes["moveit_to"].outputs.status, sensor="moveit_status")
+        if "moveit_time_to_goal" in spec.config.sensors:
+            graph.connect(source=nodes["moveit_to"].outputs.time_to_goal, sensor="moveit_time_to_goal")
+        for actuator in ["pos_control", "vel_control", "gripper_control", "moveit_to"]:
+            if actuator in required:
+                graph.connect(actuator=actuator, target=nodes[actuator].inputs.action)
+        if "moveit_to_ee_pose" in required:
+            graph.connect(actuator="moveit_to_ee_pose", target=nodes["task_space"].inputs.ee_pose)
+            graph.connect(source=nodes["task_space"].outputs.goal, target=nodes["moveit_to_ee_pose"].inputs.action)
+        if "ee_downward" in required:
+            graph.connect(actuator="ee_dxyz", target=nodes["ee_downward"].inputs.dxyz)
+            graph.connect(actuator="ee_dyaw", target=nodes["ee_downward"].inputs.dyaw)
+            graph.connect(source=nodes["ee_downward"].outputs.target, target=nodes["ee_downward_control"].inputs.action)
 
     @staticmethod
     @register.engine(RealEngine)
     def reality_engine(spec: ObjectSpec, graph: EngineGraph):
         """Engine-specific implementation (reality) of the object."""
+        # These sensors and actuators are only implemented for pybullet.
+        pybullet_only = [
+            "ee_vel",
+            "ee_ang_vel",
+            "moveit_time_to_goal",
+            "jacobian",
+            "mass_matrix",
+            "ee_twist",
+            "ee_dxyz",
+            "ee_dyaw",
+        ]
+        unsupported = [name for name in spec.config.sensors + spec.config.actuators if name in pybullet_only]
+        if unsupported:
+            raise ValueError(f"The sensors and actuators {unsupported} are not supported with the RealEngine (pybullet only).")
+
         # Determine gripper min/max
         from eagerx_franka.franka_arm.real.enginestates import DummyState
 
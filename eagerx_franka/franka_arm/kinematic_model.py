@@ -0,0 +1,148 @@
+import os
+import json
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+from eagerx_franka.utils import get_cache_dir, get_joint_limits_path, content_hash
+from eagerx_franka.urdf import get_urdf_ref, is_urdf_ref, load_urdf
+
+# Bump whenever the fields (or how they are derived) change, so that stale cache entries are ignored.
+_FORMAT_VERSION = "2"
+
+# In-memory cache, shared by all FrankaArm.make(...) calls within a process.
+_MODELS: Dict[str, "FrankaKinematicModel"] = {}
+
+
+@dataclass
+class FrankaKinematicModel:
+    """Kinematic description of a Franka arm, extracted once from its urdf and joint limits file.
+
+    Per-joint quantities are stored in NumPy arrays that are ordered according to `joint_names` (and `gripper_names`).
+    """
+
+    digest: str
+    robot_type: str
+    joint_limits: Dict
+    joint_names: np.ndarray
+    joint_lower: np.ndarray
+    joint_upper: np.ndarray
+    vel_limit: np.ndarray
+    gripper_names: np.ndarray
+    gripper_lower: np.ndarray
+    gripper_upper: np.ndarray
+    gripper_link: str
+    link_names: np.ndarray
+    urdf_joint_names: np.ndarray
+
+    def __post_init__(self):
+        self.joint_index = {n: i for i, n in enumerate(self.urdf_joint_names.tolist())}
+        self.link_index = {n: i for i, n in enumerate(self.link_names.tolist())}
+
+    @classmethod
+    def from_urdf(cls, digest: str, robot_type: str, urdf: str, joint_limits: Dict) -> "FrankaKinematicModel":
+        """Parses the urdf (xml string). Only called on a cache miss."""
+        from urdf_parser_py.urdf import URDF
+
+        robot = URDF.from_xml_string(urdf)
+        joints = robot.joint_map
+        link_names = [link.name for link in robot.links]
+
+        joint_names = [f"{robot_type}_{n}" for n in joint_limits.keys()]
+        gripper_names = [joint.name for joint in robot.joints if "finger" in joint.name]
+        limits = [joints[n].limit for n in joint_names]
+        gripper_limits = [joints[n].limit for n in gripper_names]
+        return cls(
+            digest=digest,
+            robot_type=robot_type,
+            joint_limits=joint_limits,
+            joint_names=np.array(joint_names, dtype="str"),
+            joint_lower=np.array([lim.lower for lim in limits], dtype="float64"),
+            joint_upper=np.array([lim.upper for lim in limits], dtype="float64"),
+            vel_limit=np.array([lim.velocity for lim in limits], dtype="float64"),
+            gripper_names=np.array(gripper_names, dtype="str"),
+            gripper_lower=np.array([lim.lower for lim in gripper_limits], dtype="float64"),
+            gripper_upper=np.array([lim.upper for lim in gripper_limits], dtype="float64"),
+            gripper_link=_find_gripper_link(robot_type, link_names),
+            link_names=np.array(link_names, dtype="str"),
+            urdf_joint_names=np.array([joint.name for joint in robot.joints], dtype="str"),
+        )
+
+    def save(self, path: str):
+        """Stores the model as an .npz archive (written atomically, so concurrent workers never read partial files)."""
+        arrays = {k: v for k, v in self.__dict__.items() if isinstance(v, np.ndarray)}
+        meta = dict(digest=self.digest, robot_type=self.robot_type, gripper_link=self.gripper_link)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                joint_limits=np.array(json.dumps(self.joint_limits)),
+                **arrays,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FrankaKinematicModel":
+        with np.load(path, allow_pickle=False) as data:
+            kwargs = {k: data[k] for k in data.files if k not in ["meta", "joint_limits"]}
+            meta = json.loads(str(data["meta"]))
+            joint_limits = json.loads(str(data["joint_limits"]))
+        return cls(joint_limits=joint_limits, **meta, **kwargs)
+
+
+def _find_gripper_link(robot_type: str, link_names):
+    # Prefer the grasp target, but urdfs generated from xacro only define the hand's tool center point.
+    for suffix in ["grasptarget", "hand_tcp", "link8"]:
+        for name in link_names:
+            if f"{robot_type}_{suffix}" in name:
+                return name
+    raise ValueError(f"No end-effector link found for robot type `{robot_type}`.")
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def get_kinematic_model(robot_type: str, joint_limits: str = None, urdf: Optional[str] = None) -> FrankaKinematicModel:
+    """Get the (cached) kinematic model of a Franka arm.
+
+    The model is cached in memory and on disk (see :func:`~eagerx_franka.utils.get_cache_dir`), keyed by a content
+    hash of the urdf and joint limits file. Hence, the urdf is only read and parsed when either file changed.
+
+    :param robot_type: Manipulator type (e.g. `panda` or `fr3`).
+    :param joint_limits: Optional path to a joint limits file. Defaults to the one of `robot_type`.
+    :param urdf: Optional urdf reference (see :func:`~eagerx_franka.urdf.get_urdf_ref`) or xml string. Defaults to
+                 the urdf that is shipped with this package.
+    :return: The kinematic model.
+    """
+    limits_path = get_joint_limits_path(robot_type, joint_limits)
+    try:
+        limits_bytes = _read(limits_path)
+    except IOError:
+        print(f"Joint Limits File was not found in: {limits_path}")
+        raise
+    if urdf is None:
+        urdf = get_urdf_ref(robot_type)
+    urdf_hash = urdf.rpartition("#")[2] if is_urdf_ref(urdf) else content_hash(urdf)
+    digest = content_hash(_FORMAT_VERSION, robot_type, urdf_hash, limits_bytes)
+
+    # Check in-memory cache
+    model = _MODELS.get(digest, None)
+    if model is not None:
+        return model
+
+    # Check on-disk cache
+    path = os.path.join(get_cache_dir("kinematic_models"), f"{digest}.npz")
+    try:
+        model = FrankaKinematicModel.load(path)
+    except (IOError, ValueError, KeyError, TypeError):
+        import yaml
+
+        model = FrankaKinematicModel.from_urdf(digest, robot_type, load_urdf(urdf), yaml.safe_load(limits_bytes))
+        try:
+            model.save(path)
+        except OSError:
+            pass  # A read-only cache only costs us the speed-up.
+    _MODELS[digest] = model
+    return model
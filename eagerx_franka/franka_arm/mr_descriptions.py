@@ -24,6 +24,21 @@ class panda:
 
     M = np.array([[1.0, 0.0, 0.0, 0.088], [0.0, -1.0, 0.0, 0.0], [0.0, 0.0, -1.0, 0.926], [0.0, 0.0, 0.0, 1.0]])
 
+    # Home configurations of the link frames (link1 to link7, and the flange link8), in the order of the joints that
+    # move them. Link i is moved by joints 1 to i.
+    Mlist = np.array(
+        [
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, L1], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, -1.0, 0.0, L1], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, L1 + L2], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, L4], [0.0, 0.0, -1.0, 0.0], [0.0, 1.0, 0.0, L1 + L2], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, L1 + L2 + L3], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 0.0, -1.0, 0.0], [0.0, 1.0, 0.0, L1 + L2 + L3], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, L5], [0.0, -1.0, 0.0, 0.0], [0.0, 0.0, -1.0, L1 + L2 + L3], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.088], [0.0, -1.0, 0.0, 0.0], [0.0, 0.0, -1.0, 0.926], [0.0, 0.0, 0.0, 1.0]],
+        ]
+    )
+
 
 class fr3:
     Slist = np.array(
@@ -38,3 +53,18 @@ class fr3:
     )
 
     M = np.array([[1.0, 0.0, 0.0, 0.088], [0.0, -1.0, 0.0, 0.0], [0.0, 0.0, -1.0, 0.926], [0.0, 0.0, 0.0, 1.0]])
+
+    # Home configurations of the link frames (link1 to link7, and the flange link8), in the order of the joints that
+    # move them. Link i is moved by joints 1 to i.
+    Mlist = np.array(
+        [
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, L1], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, -1.0, 0.0, L1], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, L1 + L2], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, L4], [0.0, 0.0, -1.0, 0.0], [0.0, 1.0, 0.0, L1 + L2], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, L1 + L2 + L3], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 0.0, -1.0, 0.0], [0.0, 1.0, 0.0, L1 + L2 + L3], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, L5], [0.0, -1.0, 0.0, 0.0], [0.0, 0.0, -1.0, L1 + L2 + L3], [0.0, 0.0, 0.0, 1.0]],
+            [[1.0, 0.0, 0.0, 0.088], [0.0, -1.0, 0.0, 0.0], [0.0, 0.0, -1.0, 0.926], [0.0, 0.0, 0.0, 1.0]],
+        ]
+    )
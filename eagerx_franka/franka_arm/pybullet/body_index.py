@@ -0,0 +1,58 @@
+from typing import Dict, List
+import numpy as np
+
+
+class BodyIndex:
+    """Joint and link indices of a pybullet body, together with the limits and dynamics of its joints.
+
+    Built with a single pass of `getJointInfo` calls and shared by all engine nodes and engine states of an object via
+    the `simulator` dict (see :meth:`get`). Per-joint quantities are stored in NumPy arrays ordered by joint index.
+    """
+
+    def __init__(self, p, body_id: int):
+        self.physics_client_id = p._client
+        self.body_id = body_id
+        num_joints = p.getNumJoints(body_id, physicsClientId=p._client)
+        infos = [p.getJointInfo(body_id, i, physicsClientId=p._client) for i in range(num_joints)]
+        self.joint_names = np.array([info[1].decode("utf-8") for info in infos], dtype="str")
+        self.link_names = np.array([info[12].decode("utf-8") for info in infos], dtype="str")
+        self.joint_type = np.array([info[2] for info in infos], dtype="int64")
+        self.damping = np.array([info[6] for info in infos], dtype="float64")
+        self.friction = np.array([info[7] for info in infos], dtype="float64")
+        self.lower = np.array([info[8] for info in infos], dtype="float64")
+        self.upper = np.array([info[9] for info in infos], dtype="float64")
+        self.max_force = np.array([info[10] for info in infos], dtype="float64")
+        self.max_velocity = np.array([info[11] for info in infos], dtype="float64")
+        self.joint_index = {name: i for i, name in enumerate(self.joint_names.tolist())}
+        # Link i is the child link of joint i.
+        self.link_index = {name: i for i, name in enumerate(self.link_names.tolist())}
+
+    @classmethod
+    def get(cls, simulator: Dict, body_id: int = None) -> "BodyIndex":
+        """Get the (cached) index of a body.
+
+        :param simulator: The simulator dict of the object.
+        :param body_id: Body unique id. Defaults to the (first) body of the object.
+        :return: The index.
+        """
+        p = simulator["client"]
+        body_id = simulator["object"].robot_objectid[0] if body_id is None else body_id
+        cache = simulator.setdefault("body_index", dict())
+        key = (p._client, body_id)
+        if key not in cache:
+            cache[key] = cls(p, body_id)
+        return cache[key]
+
+    def joints(self, names: List[str]) -> np.ndarray:
+        """Pybullet joint indices of the joints with `names`."""
+        try:
+            return np.array([self.joint_index[name] for name in names], dtype="int64")
+        except KeyError as e:
+            raise KeyError(f"Joint {e} was not found in body {self.body_id}.") from None
+
+    def link(self, name: str) -> int:
+        """Pybullet link index of the link with `name`."""
+        try:
+            return self.link_index[name]
+        except KeyError:
+            raise KeyError(f"Link `{name}` was not found in body {self.body_id}.") from None
@@ -0,0 +1,154 @@
+from typing import Dict, List, Sequence
+import numpy as np
+import pybullet
+from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
+from eagerx_franka.utils import content_hash
+
+
+class CollisionChecker:
+    """Self-collision and ground checks of a Franka arm in a separate pybullet client (DIRECT mode).
+
+    The copy of the arm is loaded with its collision meshes and never stepped. Its gripper is kept open, and the link
+    pairs that touch in the `reference` configuration (e.g. the hand and link7, whose meshes overlap by design) are
+    excluded, like the adjacent links. The ground is the plane z=`ground_height` in the world frame, so a positive height
+    also enforces a minimum height of the links. Links that touch the ground in the `reference` configuration (e.g. the
+    base, or link1 if the ground is raised) are not checked against it.
+
+    A single checker is shared by all engine nodes of an object via the `simulator` dict (see :meth:`get`), and they
+    release it at shutdown.
+    """
+
+    def __init__(
+        self,
+        urdf: str,
+        joint_names: List[str],
+        reference: Sequence[float],
+        base_pos: Sequence[float] = (0.0, 0.0, 0.0),
+        base_orn: Sequence[float] = (0.0, 0.0, 0.0, 1.0),
+        ground: bool = True,
+        ground_height: float = 0.0,
+        margin: float = 0.0,
+    ):
+        """
+        :param urdf: Path to the urdf of the arm.
+        :param joint_names: Names of the (arm) joints of the configurations that are checked.
+        :param reference: A collision-free configuration of the joints. Link pairs that touch in it are not checked.
+        :param base_pos: Position of the base (as returned by `getBasePositionAndOrientation`).
+        :param base_orn: Orientation of the base (x, y, z, w).
+        :param ground: Whether to check for collisions with the ground.
+        :param ground_height: Height of the ground [m].
+        :param margin: Minimum distance between links [m].
+        """
+        from pybullet_utils.bullet_client import BulletClient
+
+        flags = pybullet.URDF_USE_SELF_COLLISION | pybullet.URDF_USE_SELF_COLLISION_EXCLUDE_PARENT
+        self.client = p = BulletClient(connection_mode=pybullet.DIRECT)
+        self.body_id = p.loadURDF(urdf, useFixedBase=True, flags=flags, physicsClientId=p._client)
+        p.resetBasePositionAndOrientation(self.body_id, base_pos, base_orn, physicsClientId=p._client)
+        index = BodyIndex(p, self.body_id)
+        self.joint_indices = index.joints(joint_names).tolist()
+        self.margin = margin
+        for joint in np.flatnonzero(np.char.find(index.joint_names, "finger") >= 0).tolist():
+            p.resetJointState(self.body_id, joint, index.upper[joint], physicsClientId=p._client)
+        self.plane_id = None
+        if ground:
+            plane = p.createCollisionShape(pybullet.GEOM_PLANE, physicsClientId=p._client)
+            self.plane_id = p.createMultiBody(0, plane, basePosition=[0, 0, ground_height], physicsClientId=p._client)
+
+        self._set(reference)
+        p.performCollisionDetection(physicsClientId=p._client)
+        contacts = self._contacts()
+        self.excluded = sorted({tuple(sorted(c[3:5])) for c in contacts if c[2] == self.body_id})
+        for link_a, link_b in self.excluded:
+            p.setCollisionFilterPair(self.body_id, self.body_id, link_a, link_b, 0, physicsClientId=p._client)
+        self.grounded = sorted({c[3] for c in contacts if c[2] == self.plane_id})
+        for link in self.grounded:
+            p.setCollisionFilterPair(self.body_id, self.plane_id, link, -1, 0, physicsClientId=p._client)
+        with open(urdf, "rb") as f:
+            # Identifies the collision model, e.g. in the key of a roadmap (see :class:`~eagerx_franka.planning.roadmap.Roadmap`).
+            self.key = content_hash(
+                f.read(),
+                repr(
+                    (joint_names, np.round(base_pos, 6).tolist(), ground, ground_height, margin, self.excluded, self.grounded)
+                ),
+            )
+
+    @classmethod
+    def get(cls, simulator: Dict, joint_names: List[str], reference: Sequence[float], **kwargs) -> "CollisionChecker":
+        """Get the (shared) checker of the (first) body of an object, and count a reference to it (see
+        :func:`~eagerx_franka.franka_arm.pybullet.shared.acquire`).
+
+        :param simulator: The simulator dict of the object.
+        :param joint_names: Names of the arm joints.
+        :param reference: A collision-free configuration of the joints.
+        :param kwargs: Other arguments of the constructor.
+        :return: The checker.
+        """
+        from eagerx_franka.franka_arm.pybullet.shared import acquire
+
+        p, body_id = simulator["client"], simulator["object"].robot_objectid[0]
+
+        def create():
+            pos, orn = p.getBasePositionAndOrientation(body_id, physicsClientId=p._client)
+            urdf = simulator["object"].model_urdf
+            return cls(urdf, joint_names, reference, base_pos=pos, base_orn=orn, **kwargs)
+
+        key = (body_id, tuple(joint_names), tuple(sorted(kwargs.items())))
+        return acquire(simulator, "collision_checker", key, create)
+
+    @staticmethod
+    def release(simulator: Dict, checker: "CollisionChecker"):
+        """Releases a reference to a checker (see :meth:`get`). The last one closes it."""
+        from eagerx_franka.franka_arm.pybullet.shared import release
+
+        release(simulator, "collision_checker", checker)
+
+    def _set(self, q: np.ndarray):
+        # A single call with the module-level api, to bypass the per-call overhead of the client.
+        positions = [[position] for position in np.asarray(q, dtype="float64").tolist()]
+        pybullet.resetJointStatesMultiDof(self.body_id, self.joint_indices, positions, physicsClientId=self.client._client)
+
+    def _contacts(self):
+        contacts = pybullet.getContactPoints(bodyA=self.body_id, physicsClientId=self.client._client)
+        return [c for c in contacts if c[8] < self.margin]
+
+    def is_free(self, q: np.ndarray) -> bool:
+        """Whether a configuration is free of collisions.
+
+        :param q: Positions of the joints.
+        """
+        self._set(q)
+        pybullet.performCollisionDetection(physicsClientId=self.client._client)
+        return not self._contacts()
+
+    def segment_free(self, start: np.ndarray, goal: np.ndarray, resolution: float = 0.05) -> bool:
+        """Whether the straight line between two configurations is free of collisions.
+
+        The line is checked at intervals of at most `resolution` per joint, with the endpoints excluded. The checks are
+        ordered by bisection, so that a collision is typically found after a few checks.
+
+        :param start: Positions of the joints at the start.
+        :param goal: Positions of the joints at the goal.
+        :param resolution: Maximum distance [rad] per joint between checked configurations.
+        """
+        start, goal = np.asarray(start, dtype="float64"), np.asarray(goal, dtype="float64")
+        steps = int(np.ceil(np.abs(goal - start).max() / resolution))
+        for i in _bisection_order(steps):
+            if not self.is_free(start + (i / steps) * (goal - start)):
+                return False
+        return True
+
+    def close(self):
+        self.client.disconnect()
+
+
+def _bisection_order(steps: int) -> List[int]:
+    """The integers 1, ..., steps - 1, ordered such that each one lies halfway between two earlier ones (or the ends)."""
+    order, intervals = [], [(0, steps)]
+    while intervals:
+        lo, hi = intervals.pop(0)
+        if hi - lo > 1:
+            mid = (lo + hi) // 2
+            order.append(mid)
+            intervals += [(lo, mid), (mid, hi)]
+    return order
@@ -1,4 +1,3 @@
-from dataclasses import dataclass
 import numpy as np
 from typing import Optional, List, Dict
 import pybullet
@@ -11,6 +10,331 @@ from eagerx.core.constants import process as p
 from eagerx.utils.utils import Msg
 from eagerx.core.entities import EngineNode
 import eagerx.core.register as register
+from eagerx_pybullet.enginenodes import JointController
+from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
+from eagerx_franka.franka_arm.buffers import OutputBuffers
+from eagerx_franka.franka_arm.trajectory import JointTrajectory, WaypointTrajectory
+
+
+class JointStates:
+    """Joint states of all (non-fixed) joints of an object, queried at most once per engine tick.
+
+    A single instance is shared by all engine nodes of an object via the `simulator` dict (see :meth:`get`), so
+    sensors and controllers that need joint measurements at the same tick share one `getJointStates` call. The
+    measurements are copied into preallocated arrays. Force-torque and applied torque measurements are only copied
+    for the joints that were requested with :meth:`index`.
+    """
+
+    def __init__(self, p, robot):
+        self._p = p
+        self.joints = list(robot.jdict.keys())
+        self.bodyUniqueId = robot.jdict[self.joints[0]].get_bodyid_jointindex()[0]
+        self.jointIndices = [robot.jdict[name].get_bodyid_jointindex()[1] for name in self.joints]
+        self.position = np.zeros(len(self.joints), dtype="float32")
+        self.velocity = np.zeros(len(self.joints), dtype="float32")
+        self.force_torque = np.zeros((len(self.joints), 6), dtype="float32")
+        self.applied_torque = np.zeros(len(self.joints), dtype="float32")
+        self._required = dict(force_torque=[], applied_torque=[])
+        self._tick = None
+
+    @classmethod
+    def get(cls, simulator: Dict) -> "JointStates":
+        if "joint_states" not in simulator:
+            simulator["joint_states"] = cls(simulator["client"], simulator["object"])
+        return simulator["joint_states"]
+
+    def index(self, joints: List[str], field: str = None) -> np.ndarray:
+        """Indices of `joints` in the state arrays.
+
+        :param joints: Joint names.
+        :param field: Optionally, `force_torque` or `applied_torque`, which is then measured for `joints`.
+        :return: Indices.
+        """
+        idx = [self.joints.index(name) for name in joints]
+        if field is not None:
+            self._required[field] = sorted(set(self._required[field] + idx))
+        return np.array(idx, dtype="int64")
+
+    def invalidate(self):
+        """Forces a new query on the next update (e.g. after the joints were reset)."""
+        self._tick = None
+
+    def update(self, tick: Optional[Msg] = None):
+        """Queries the joint states, unless they were already queried at this engine tick."""
+        tick = int(tick.msgs[-1]) if tick is not None else None
+        if tick is not None and tick == self._tick:
+            return
+        self._tick = tick
+        states = self._p.getJointStates(
+            bodyUniqueId=self.bodyUniqueId, jointIndices=self.jointIndices, physicsClientId=self._p._client
+        )
+        self.position[:] = [state[0] for state in states]
+        self.velocity[:] = [state[1] for state in states]
+        for i in self._required["force_torque"]:
+            self.force_torque[i] = states[i][2]
+        for i in self._required["applied_torque"]:
+            self.applied_torque[i] = states[i][3]
+
+
+class FrankaJointStateSensor(EngineNode):
+    @classmethod
+    def make(
+        cls,
+        name: str,
+        rate: float,
+        joints: List[str],
+        gripper_joints: List[str],
+        ft_joints: List[str] = None,
+        outputs: List[str] = None,
+        process: Optional[int] = p.ENGINE,
+        color: Optional[str] = "cyan",
+    ):
+        """A spec to create a sensor node that measures the arm and gripper joints with a single query per tick.
+
+        :param name: User specified node name.
+        :param rate: Rate (Hz) at which the callback is called.
+        :param joints: Arm joints. Its order determines the ordering of the `position` and `velocity` measurements.
+        :param gripper_joints: Gripper (finger) joints. The `gripper_position` is the position of the first joint.
+        :param ft_joints: Joints whose force-torque sensors are measured in `force_torque` (Fx, Fy, Fz, Mx, My, Mz).
+                          Defaults to the last arm joint.
+        :param outputs: Selected outputs: `position`, `velocity`, `force_torque`, and `gripper_position`. By default,
+                        all outputs are selected.
+        :param process: Process in which this node is launched. See :class:`~eagerx.core.constants.process` for all options.
+        :param color: Specifies the color of logged messages & node color in the GUI.
+        :return: NodeSpec
+        """
+        spec = cls.get_specification()
+
+        # Modify default node params
+        spec.config.update(name=name, rate=rate, process=process, color=color)
+        spec.config.inputs = ["tick"]
+        spec.config.outputs = outputs if outputs else ["position", "velocity", "force_torque", "gripper_position"]
+
+        # Set parameters, defined by the signature of cls.initialize(...)
+        spec.config.joints = joints
+        spec.config.gripper_joints = gripper_joints
+        spec.config.ft_joints = ft_joints if ft_joints else joints[-1:]
+        return spec
+
+    def initialize(self, spec: NodeSpec, simulator: Dict):
+        """Initializes the joint state sensor node according to the spec."""
+        assert self.process == p.ENGINE, (
+            "Simulation node requires a reference to the simulator," " hence it must be launched in the Engine process"
+        )
+        self.selected = spec.config.outputs
+        self.robot = simulator["object"]
+        self._p = simulator["client"]
+        self.physics_client_id = self._p._client
+        self.states = JointStates.get(simulator)
+        self.joint_idx = self.states.index(spec.config.joints)
+        self.gripper_idx = self.states.index(spec.config.gripper_joints[:1])
+        if "force_torque" in self.selected:
+            self.ft_idx = self.states.index(spec.config.ft_joints, "force_torque")
+            for pb_name in spec.config.ft_joints:
+                bodyid, jointindex = self.robot.jdict[pb_name].get_bodyid_jointindex()
+                self._p.enableJointForceTorqueSensor(
+                    bodyUniqueId=bodyid, jointIndex=jointindex, enableSensor=True, physicsClientId=self.physics_client_id
+                )
+
+    @register.states()
+    def reset(self):
+        # The joints may have been reset, so do not reuse the measurement of a previous episode.
+        self.states.invalidate()
+
+    @register.inputs(tick=Space(shape=(), dtype="int64"))
+    @register.outputs(
+        position=Space(dtype="float32"),
+        velocity=Space(dtype="float32"),
+        force_torque=Space(dtype="float32"),
+        gripper_position=Space(dtype="float32"),
+    )
+    def callback(self, t_n: float, tick: Optional[Msg] = None):
+        """Produces the selected joint state measurements from a single `getJointStates` call."""
+        self.states.update(tick)
+        output = dict()
+        if "position" in self.selected:
+            output["position"] = self.states.position[self.joint_idx]
+        if "velocity" in self.selected:
+            output["velocity"] = self.states.velocity[self.joint_idx]
+        if "force_torque" in self.selected:
+            output["force_torque"] = self.states.force_torque[self.ft_idx].reshape(-1)
+        if "gripper_position" in self.selected:
+            output["gripper_position"] = self.states.position[self.gripper_idx]
+        return output
+
+
+class FrankaLinkStateSensor(EngineNode):
+    @classmethod
+    def make(
+        cls,
+        name: str,
+        rate: float,
+        link: str,
+        outputs: List[str] = None,
+        process: Optional[int] = p.ENGINE,
+        color: Optional[str] = "cyan",
+    ):
+        """A spec to create a sensor node that measures the state of a link with a single query per tick.
+
+        :param name: User specified node name.
+        :param rate: Rate (Hz) at which the callback is called.
+        :param link: Measured link (e.g. the end-effector link).
+        :param outputs: Selected outputs: `position` (x, y, z), `orientation` (x, y, z, w), `velocity` (vx, vy, vz), and
+                        `angular_vel` (wx, wy, wz). By default, the position and orientation are selected.
+        :param process: Process in which this node is launched. See :class:`~eagerx.core.constants.process` for all options.
+        :param color: Specifies the color of logged messages & node color in the GUI.
+        :return: NodeSpec
+        """
+        spec = cls.get_specification()
+
+        # Modify default node params
+        spec.config.update(name=name, rate=rate, process=process, color=color)
+        spec.config.inputs = ["tick"]
+        spec.config.outputs = outputs if outputs else ["position", "orientation"]
+
+        # Set parameters, defined by the signature of cls.initialize(...)
+        spec.config.link = link
+        return spec
+
+    def initialize(self, spec: NodeSpec, simulator: Dict):
+        """Initializes the link state sensor node according to the spec."""
+        assert self.process == p.ENGINE, (
+            "Simulation node requires a reference to the simulator," " hence it must be launched in the Engine process"
+        )
+        self.selected = spec.config.outputs
+        self.robot = simulator["object"]
+        self._p = simulator["client"]
+        self.physics_client_id = self._p._client
+        self.bodyUniqueId, self.linkIndex = self.robot.parts[spec.config.link].get_bodyid_linkindex()
+        assert self.linkIndex != -1, "The link state sensor does not support base links."
+        self.computeLinkVelocity = int("velocity" in self.selected or "angular_vel" in self.selected)
+        self.buffers = OutputBuffers(position=3, orientation=4, velocity=3, angular_vel=3)
+
+    @register.states()
+    def reset(self):
+        """This link state sensor is stateless, so nothing happens here."""
+        pass
+
+    @register.inputs(tick=Space(shape=(), dtype="int64"))
+    @register.outputs(
+        position=Space(dtype="float32"),
+        orientation=Space(dtype="float32"),
+        velocity=Space(dtype="float32"),
+        angular_vel=Space(dtype="float32"),
+    )
+    def callback(self, t_n: float, tick: Optional[Msg] = None):
+        """Produces the selected link state measurements from a single `getLinkState` call."""
+        state = self._p.getLinkState(
+            self.bodyUniqueId,
+            self.linkIndex,
+            computeLinkVelocity=self.computeLinkVelocity,
+            physicsClientId=self.physics_client_id,
+        )
+        buf, output = self.buffers, dict()
+        for name, i in (("position", 0), ("orientation", 1), ("velocity", 6), ("angular_vel", 7)):
+            if name in self.selected:
+                getattr(buf, name)[:] = state[i]
+                output[name] = buf.emit(name)
+        return output
+
+
+class FrankaDynamicsSensor(EngineNode):
+    @classmethod
+    def make(
+        cls,
+        name: str,
+        rate: float,
+        joints: List[str],
+        link: str,
+        outputs: List[str] = None,
+        process: Optional[int] = p.ENGINE,
+        color: Optional[str] = "cyan",
+    ):
+        """A spec to create a sensor node that measures the Jacobian and mass matrix of the arm with (at most) one
+        `calculateJacobian` and one `calculateMassMatrix` call per tick.
+
+        :param name: User specified node name.
+        :param rate: Rate (Hz) at which the callback is called.
+        :param joints: Arm joints. Its order determines the order of the columns of the Jacobian and mass matrix.
+        :param link: Link whose Jacobian and twist are measured (e.g. the end-effector link).
+        :param outputs: Selected outputs: `jacobian` (6 x n, the rows of the linear and then the angular velocity in the
+                        world frame), `mass_matrix` (n x n), and `ee_twist` (vx, vy, vz, wx, wy, wz, the Jacobian times
+                        the joint velocities). By default, all outputs are selected.
+        :param process: Process in which this node is launched. See :class:`~eagerx.core.constants.process` for all options.
+        :param color: Specifies the color of logged messages & node color in the GUI.
+        :return: NodeSpec
+        """
+        spec = cls.get_specification()
+
+        # Modify default node params
+        spec.config.update(name=name, rate=rate, process=process, color=color)
+        spec.config.inputs = ["tick"]
+        spec.config.outputs = outputs if outputs else ["jacobian", "mass_matrix", "ee_twist"]
+
+        # Set parameters, defined by the signature of cls.initialize(...)
+        spec.config.joints = joints
+        spec.config.link = link
+        return spec
+
+    def initialize(self, spec: NodeSpec, simulator: Dict):
+        """Initializes the dynamics sensor node according to the spec."""
+        assert self.process == p.ENGINE, (
+            "Simulation node requires a reference to the simulator," " hence it must be launched in the Engine process"
+        )
+        self.selected = spec.config.outputs
+        self._p = simulator["client"]
+        self.physics_client_id = self._p._client
+        self.arm = simulator["object"].robot_objectid[0]
+        index = BodyIndex.get(simulator, self.arm)
+        self.linkIndex = index.link(spec.config.link)
+        self.states = JointStates.get(simulator)
+        # Pybullet expects the positions of all degrees of freedom (incl. the gripper), in the order of the joints.
+        dofs = index.joint_names[index.joint_type != pybullet.JOINT_FIXED].tolist()
+        self.dof_idx = self.states.index(dofs)
+        self.arm_dofs = np.array([dofs.index(joint) for joint in spec.config.joints], dtype="int64")
+        self.zeros = len(dofs) * [0.0]
+        n = len(self.arm_dofs)
+        self.buffers = OutputBuffers(J=(6, len(dofs)), jacobian=(6, n), mass_matrix=(n, n), ee_twist=6)
+
+    @register.states()
+    def reset(self):
+        # The joints may have been reset, so do not reuse the measurement of a previous episode.
+        self.states.invalidate()
+
+    @register.inputs(tick=Space(shape=(), dtype="int64"))
+    @register.outputs(
+        jacobian=Space(dtype="float32"),
+        mass_matrix=Space(dtype="float32"),
+        ee_twist=Space(dtype="float32"),
+    )
+    def callback(self, t_n: float, tick: Optional[Msg] = None):
+        """Produces the selected measurements from the joint states of this tick."""
+        buf = self.buffers
+        self.states.update(tick)
+        positions = self.states.position[self.dof_idx].tolist()
+        output = dict()
+        if "jacobian" in self.selected or "ee_twist" in self.selected:
+            linear, angular = self._p.calculateJacobian(
+                self.arm,
+                self.linkIndex,
+                [0.0, 0.0, 0.0],
+                positions,
+                self.zeros,
+                self.zeros,
+                physicsClientId=self.physics_client_id,
+            )
+            buf.J[:3], buf.J[3:] = linear, angular
+            if "jacobian" in self.selected:
+                np.take(buf.J, self.arm_dofs, axis=1, out=buf.jacobian)
+                output["jacobian"] = buf.emit("jacobian")
+            if "ee_twist" in self.selected:
+                np.matmul(buf.J, self.states.velocity[self.dof_idx], out=buf.ee_twist)
+                output["ee_twist"] = buf.emit("ee_twist")
+        if "mass_matrix" in self.selected:
+            mass_matrix = self._p.calculateMassMatrix(self.arm, positions, physicsClientId=self.physics_client_id)
+            buf.mass_matrix[:] = np.asarray(mass_matrix)[np.ix_(self.arm_dofs, self.arm_dofs)]
+            output["mass_matrix"] = buf.emit("mass_matrix")
+        return output
 
 
 class MoveItController(EngineNode):
@@ -28,8 +352,24 @@ class MoveItController(EngineNode):
         max_vel: List[float] = None,
         max_force: List[float] = None,
         vel_limit: List[float] = None,
+        acc_limit: List[float] = None,
+        jerk_limit: List[float] = None,
+        planner: str = None,
+        robot_type: str = "panda",
     ):
-        """A spec to create a JointController node that controls a set of joints.
+        """A spec to create a JointController node that moves a set of joints to the most recent goal.
+
+        When the goal changes, a time-optimal, jerk-limited trajectory from the current joint positions to the goal is
+        computed once (see :class:`~eagerx_franka.franka_arm.trajectory.JointTrajectory`), and every tick sets the next
+        sample of the trajectory in pybullet. A goal that changes by less than 1e-2 rad (the tolerance of the status)
+        while the arm moves retargets the running trajectory (see
+        :meth:`~eagerx_franka.franka_arm.trajectory.JointTrajectory.retarget`), so that a goal that changes slightly every
+        tick does not restart the motion. Larger changes are planned from rest.
+
+        With `planner="roadmap"`, the trajectory follows a path that is free of self-collisions and collisions with the
+        ground, planned over a precomputed roadmap (see :class:`~eagerx_franka.planning.roadmap.Roadmap`). The roadmap
+        is not built by the node: build it first with ``python scripts/build_roadmap.py``, which stores it in the cache
+        directory. If no path is found, the arm moves along the straight line.
 
         For more info on `vel_target`, `pos_gain`, and `vel_gain`, see `setJointMotorControlMultiDofArray` in
         https://docs.google.com/document/d/10sXEhzFRSnvFcl3XxNGhnD4N2SedqwdAvK3dsihxVUA/edit#
@@ -42,17 +382,24 @@ class MoveItController(EngineNode):
         :param vel_target: The desired velocity. Ordering according to `joints`.
         :param pos_gain: Position gain. Ordering according to `joints`.
         :param vel_gain: Velocity gain. Ordering according to `joints`.
-        :param max_vel: in `position_control` this limits the velocity to a maximum.
+        :param max_vel: Velocity limits of the trajectory, in addition to `vel_limit`. Ordering according to `joints`.
         :param max_force: Maximum force when mode in [`position_control`, `velocity_control`, `pd_control`]. Ordering
                           according to `joints`.
+        :param vel_limit: Velocity limits of the joints [rad/s]. Ordering according to `joints`.
+        :param acc_limit: Acceleration limits of the trajectory [rad/s^2]. Ordering according to `joints`.
+        :param jerk_limit: Jerk limits of the trajectory [rad/s^3]. Ordering according to `joints`.
+        :param planner: Path planner: None (straight lines in joint space) or `roadmap`.
+        :param robot_type: Robot type (e.g. `panda` or `fr3`), used to name the cached roadmap.
         :return: NodeSpec
         """
+        if planner not in [None, "roadmap"]:
+            raise ValueError(f"Planner '{planner}' not recognized.")
         spec = cls.get_specification()
 
         # Modify default node params
         spec.config.update(name=name, rate=rate, process=process, color=color)
         spec.config.inputs = ["tick", "action"]
-        spec.config.outputs = ["action_applied", "status"]
+        spec.config.outputs = ["action_applied", "status", "time_to_goal"]
 
         # Set parameters, defined by the signature of cls.initialize(...)
         spec.config.joints = joints
@@ -62,6 +409,10 @@ class MoveItController(EngineNode):
         spec.config.max_vel = max_vel if max_vel else [3.14] * len(joints)
         spec.config.max_force = max_force if max_force else [999.0] * len(joints)
         spec.config.vel_limit = vel_limit if vel_limit else [999.0] * len(joints)
+        spec.config.acc_limit = acc_limit if acc_limit else [5.0] * len(joints)
+        spec.config.jerk_limit = jerk_limit if jerk_limit else [2500.0] * len(joints)
+        spec.config.planner = planner
+        spec.config.robot_type = robot_type
         return spec
 
     def initialize(self, spec: NodeSpec, simulator: Dict):
@@ -86,7 +437,28 @@ class MoveItController(EngineNode):
             bodyid, jointindex = self.robot.jdict[pb_name].get_bodyid_jointindex()
             self.bodyUniqueId.append(bodyid), self.jointIndices.append(jointindex)
 
-        self.jpos_cb = self._joint_measurement(self._p, "position", self.bodyUniqueId[0], self.jointIndices)
+        self.states = JointStates.get(simulator)
+        self.joint_idx = self.states.index(spec.config.joints)
+        self.limits = dict(
+            vel_limit=np.minimum(spec.config.vel_limit, self.max_vel),
+            acc_limit=np.array(spec.config.acc_limit),
+            jerk_limit=np.array(spec.config.jerk_limit),
+        )
+        self.buffers = OutputBuffers(
+            **{k: len(self.joints) for k in ["currj", "stepj", "last_targj", "planned_targj", "tmp"]}, time_to_goal=()
+        )
+        self.simulator = simulator
+        self.roadmap, self.checker = None, None
+        if spec.config.planner == "roadmap":
+            from eagerx_franka.ik.table import READY
+            from eagerx_franka.franka_arm.pybullet.collision import CollisionChecker
+            from eagerx_franka.planning.roadmap import Roadmap
+
+            index = BodyIndex.get(simulator)
+            joints = index.joints(self.joints)
+            lower, upper = index.lower[joints], index.upper[joints]
+            self.checker = CollisionChecker.get(simulator, self.joints, np.clip(READY, lower, upper))
+            self.roadmap = Roadmap.load(self.checker, lower, upper, name=spec.config.robot_type)
         self.jmove_cb = self._joint_control(
             self._p,
             "position_control",
@@ -101,56 +473,89 @@ class MoveItController(EngineNode):
 
     @register.states()
     def reset(self):
-        self._last_targj = None
+        self._trajectory = None
+        self.states.invalidate()
 
     @register.inputs(tick=Space(shape=(), dtype="int64"), action=Space(dtype="float32"))
-    @register.outputs(status=Space(low=0, high=1, shape=(), dtype="int64"), action_applied=Space(dtype="float32"))
+    @register.outputs(
+        status=Space(low=0, high=1, shape=(), dtype="int64"),
+        action_applied=Space(dtype="float32"),
+        time_to_goal=Space(low=0, high=999, shape=(), dtype="float32"),
+    )
     def callback(
         self,
         t_n: float,
         tick: Optional[Msg] = None,
         action: Optional[Msg] = None,
     ):
-        currj = np.array(self.jpos_cb(), dtype="float32")
-        targj = np.array(action.msgs[-1], dtype="float32")
-        diffj = targj - currj
+        """Sets the next sample of the trajectory to the most recent goal in pybullet.
 
-        # Determine status: 0: ongoing, 1: success
-        if self._last_targj is None or not np.allclose(targj, self._last_targj):
-            self._last_targj = targj
-            status = 0
-        elif all(np.abs(diffj) < 1e-2):
-            status = 1
-        else:
-            status = 0
+        The output `status` is 1 once the trajectory has finished and all joints are within 1e-2 rad of the goal (0
+        otherwise), and `time_to_goal` is the remaining duration of the trajectory [s].
+        """
+        buf = self.buffers
+        self.states.update(tick)
+        np.take(self.states.position, self.joint_idx, out=buf.currj)
+        targj = action.msgs[-1]
+
+        # Retarget the running trajectory if the goal changed slightly since it was planned, from the last sample on.
+        # Otherwise, plan a new trajectory. It starts one tick ago, so that the first sample is a step ahead.
+        np.subtract(targj, buf.last_targj, out=buf.tmp)
+        if self._trajectory is None or np.abs(buf.tmp, out=buf.tmp).max() > 1e-5:
+            buf.last_targj[:] = targj
+            np.subtract(targj, buf.planned_targj, out=buf.tmp)
+            if (
+                self._trajectory is None
+                or np.abs(buf.tmp, out=buf.tmp).max() >= 1e-2
+                or not self._trajectory.retarget(targj, t_n - 1 / self.rate - self._t_start)
+            ):
+                buf.planned_targj[:] = targj
+                path = None if self.roadmap is None else self.roadmap.plan(buf.currj, targj, self.checker)
+                if path is None:
+                    self._trajectory = JointTrajectory(buf.currj, targj, **self.limits)
+                else:
+                    self._trajectory = WaypointTrajectory(path, **self.limits)
+                self._t_start = t_n - 1 / self.rate
+        self._trajectory.sample(t_n - self._t_start, out=buf.stepj)
+        buf.time_to_goal[...] = max(self._t_start + self._trajectory.duration - t_n, 0.0)
 
-        # Move with constant velocity
-        stepj = (currj + diffj * self.max_vel * (1 / self.rate)).astype("float32")
+        # Determine status: 0: ongoing, 1: success
+        np.subtract(targj, buf.currj, out=buf.tmp)
+        status = int(buf.time_to_goal == 0.0 and np.abs(buf.tmp, out=buf.tmp).max() < 1e-2)
 
         # Set action in pybullet
-        self.jmove_cb(stepj)
-        # Send status if action has finished.
-        return dict(status=np.array(status, dtype="int64"), action_applied=stepj)
+        self.jmove_cb(buf.stepj)
+        return dict(
+            status=np.array(status, dtype="int64"), action_applied=buf.emit("stepj"), time_to_goal=buf.emit("time_to_goal")
+        )
+
+    def shutdown(self):
+        if self.checker is not None:
+            from eagerx_franka.franka_arm.pybullet.collision import CollisionChecker
+
+            CollisionChecker.release(self.simulator, self.checker)
 
     @staticmethod
     def _joint_control(p, mode, bodyUniqueId, jointIndices, pos_gain, vel_gain, vel_target, max_vel, max_force):
+        # All modes apply the action with a single call. The array api ignores `maxVelocity` (also in
+        # setJointMotorControlMultiDofArray for revolute joints), so `max_vel` is unused. It is only kept for the
+        # signature of JointController._joint_control, and callers must apply the cap themselves: FrankaJointController
+        # clips the target to within `max_step` of the current positions, and MoveItController follows a trajectory
+        # within the velocity limits.
         if mode == "position_control":
 
             def cb(action):
-                for idx, a, v, kp, kd, mv, mf in zip(jointIndices, action, vel_target, pos_gain, vel_gain, max_vel, max_force):
-                    p.setJointMotorControl2(
-                        bodyIndex=bodyUniqueId,
-                        jointIndex=idx,
-                        controlMode=pybullet.POSITION_CONTROL,
-                        targetPosition=a,
-                        targetVelocity=v,
-                        positionGain=kp,
-                        velocityGain=kd,
-                        maxVelocity=mv,
-                        force=mf,
-                        physicsClientId=p._client,
-                    )
-                return
+                return p.setJointMotorControlArray(
+                    bodyUniqueId=bodyUniqueId,
+                    jointIndices=jointIndices,
+                    controlMode=pybullet.POSITION_CONTROL,
+                    targetPositions=action,
+                    targetVelocities=vel_target,
+                    positionGains=pos_gain,
+                    velocityGains=vel_gain,
+                    forces=max_force,
+                    physicsClientId=p._client,
+                )
 
         elif mode == "velocity_control":
 
@@ -197,62 +602,179 @@ class MoveItController(EngineNode):
             raise ValueError(f"Mode '{mode}' not recognized.")
         return cb
 
-    @staticmethod
-    def _joint_measurement(p, mode, bodyUniqueId, jointIndices):
-        def cb():
-            states = p.getJointStates(bodyUniqueId=bodyUniqueId, jointIndices=jointIndices, physicsClientId=p._client)
-            obs = []
-            if mode == "position":  # (x)
-                for _i, (pos, _vel, _force_torque, _applied_torque) in enumerate(states):
-                    obs.append(pos)
-            elif mode == "velocity":  # (v)
-                for _i, (_pos, vel, _force_torque, _applied_torque) in enumerate(states):
-                    obs.append(vel)
-            elif mode == "force_torque":  # (Fx, Fy, Fz, Mx, My, Mz)
-                for _i, (_pos, _vel, force_torque, _applied_torque) in enumerate(states):
-                    obs += list(force_torque)
-            elif mode == "applied_torque":  # (T)
-                for _i, (_pos, _vel, _force_torque, applied_torque) in enumerate(states):
-                    obs.append(applied_torque)
-            else:
-                raise ValueError(f"Mode '{mode}' not recognized.")
-            return obs
 
-        return cb
+class FrankaJointController(JointController):
+    """Same as :class:`eagerx_pybullet.enginenodes.JointController`, but every mode applies the action with a single
+    pybullet call per tick.
+
+    In `position_control`, the per-joint `max_vel` is enforced by clipping the target to within `max_vel / rate` of
+    the current joint positions.
+    """
+
+    _joint_control = staticmethod(MoveItController._joint_control)
+
+    def initialize(self, spec: NodeSpec, simulator: Dict):
+        super().initialize(spec, simulator)
+        self.states = JointStates.get(simulator)
+        self.joint_idx = self.states.index(spec.config.joints)
+        self.max_step = np.array(self.max_vel, dtype="float32") / self.rate
+        self.min_step = -self.max_step
+        self.buffers = OutputBuffers(currj=len(self.joints), action_applied=len(self.joints))
+
+    @register.states()
+    def reset(self):
+        self.states.invalidate()
 
+    @register.inputs(tick=Space(shape=(), dtype="int64"), action=Space(dtype="float32"))
+    @register.outputs(action_applied=Space(dtype="float32"))
+    def callback(
+        self,
+        t_n: float,
+        tick: Optional[Msg] = None,
+        action: Optional[Msg] = None,
+    ):
+        """Sets the most recently received `action` in the pybullet joint controller.
 
-@dataclass
-class IndexedJointObject:
-    """Index of a robot joint and its name."""
+        The output `action_applied` is the action that was set (i.e. after clipping in `position_control`)."""
+        if self.mode != "position_control":
+            self.joint_cb(action.msgs[-1])
+            return dict(action_applied=action.msgs[-1])
+        buf = self.buffers
+        self.states.update(tick)
+        np.take(self.states.position, self.joint_idx, out=buf.currj)
+        np.subtract(action.msgs[-1], buf.currj, out=buf.action_applied)
+        np.clip(buf.action_applied, self.min_step, self.max_step, out=buf.action_applied)
+        buf.action_applied += buf.currj
+        self.joint_cb(buf.action_applied)
+        return dict(action_applied=buf.emit("action_applied"))
 
-    joint_name: str
-    joint_uid: int
 
+class SafeJointController(FrankaJointController):
+    """Same as :class:`FrankaJointController` in `position_control` or `velocity_control`, but the action is filtered
+    before it is set: it is clipped to the joint limits and velocity limits, and the motion is held if it would lead
+    into a collision.
 
-def index_joints_and_ee_link(pb, physics_uid, robot_id, joints, ee_link):
-    """Map a list of joint names to indexed joints.
-    In other words, map named joints to the index used by
-    PyBullet to facilitate setting the configuration.
-    Parameters:
-      physics_uid: Index of the PyBullet physics server to use.
-      joints: list with joint name keys
-      ee_link: end effector link name
-    Returns: a list of IndexedJointObject
+    The commanded step is extrapolated over a `horizon` and checked for self-collisions, and for collisions with the
+    ground, with the sphere model of the arm (see :class:`~eagerx_franka.planning.spheres.SphereChecker`). The model is
+    placed at the base of the simulated arm and assumes that the gripper is open. If any of the extrapolated
+    configurations collides, the current joint positions are held (or the joints are stopped, in `velocity_control`).
+    Motions that start in a colliding configuration are not held, so that the arm can move out of it.
     """
-    indexed_joints = []
-    indexed_ee_link = None
-    n = pb.getNumJoints(robot_id, physics_uid)
-    for joint_name in joints:
-        for i in range(n):
-            info = pb.getJointInfo(robot_id, i, physics_uid)
-            if info[12].decode("utf8") == ee_link:
-                indexed_ee_link = i
-            if joint_name == info[1].decode("utf-8"):
-                indexed_joints.append(IndexedJointObject(joint_name, i))
-                continue
-    assert len(joints) == len(indexed_joints), "Not all joints were found in the provided urdf."
-    assert indexed_ee_link is not None, "End effector link not found in the provided urdf."
-    return indexed_joints, indexed_ee_link
+
+    @classmethod
+    def make(
+        cls,
+        name: str,
+        rate: float,
+        joints: List[str],
+        lower: List[float],
+        upper: List[float],
+        vel_limit: List[float],
+        robot_type: str = "panda",
+        horizon: float = None,
+        checks: int = 4,
+        ground_height: Optional[float] = 0.0,
+        margin: float = 0.0,
+        **kwargs,
+    ) -> NodeSpec:
+        """A spec to create a SafeJointController node that controls the seven arm joints.
+
+        :param name: User specified node name.
+        :param rate: Rate (Hz) at which the callback is called.
+        :param joints: Names of the seven arm joints.
+        :param lower: Lower joint limits [rad].
+        :param upper: Upper joint limits [rad].
+        :param vel_limit: Per-joint velocity limits [rad/s].
+        :param robot_type: Robot type (e.g. `panda` or `fr3`), see :mod:`eagerx_franka.franka_arm.mr_descriptions`.
+        :param horizon: Time over which the commanded step is extrapolated [s]. Defaults to two ticks.
+        :param checks: Number of configurations that is checked over the horizon.
+        :param ground_height: Height of the ground in the world frame [m], or None to not check the ground.
+        :param margin: Minimum distance between the links, and between the links and the ground [m].
+        :param kwargs: Other arguments of :meth:`eagerx_pybullet.enginenodes.JointController.make`.
+        :return: NodeSpec
+        """
+        if kwargs.get("mode", "position_control") not in ["position_control", "velocity_control"]:
+            raise ValueError(f"Mode '{kwargs['mode']}' is not supported, only `position_control` and `velocity_control`.")
+        spec = super().make(name, rate, joints, **kwargs)
+        spec.config.lower = lower
+        spec.config.upper = upper
+        spec.config.vel_limit = vel_limit
+        spec.config.robot_type = robot_type
+        spec.config.horizon = horizon if horizon else 2 / rate
+        spec.config.checks = checks
+        spec.config.ground_height = ground_height
+        spec.config.margin = margin
+        return spec
+
+    def initialize(self, spec: NodeSpec, simulator: Dict):
+        from eagerx_franka.franka_arm.pybullet.ik import _base_frame
+        from eagerx_franka.planning.spheres import SphereChecker
+
+        super().initialize(spec, simulator)
+        self.lower = np.array(spec.config.lower, dtype="float32")
+        self.upper = np.array(spec.config.upper, dtype="float32")
+        self.vel_limit = np.array(spec.config.vel_limit, dtype="float32")
+        # Multiples of the commanded step at which the motion is checked (the first is the current configuration).
+        ticks = spec.config.horizon * self.rate
+        self.multiples = np.linspace(0.0, ticks, spec.config.checks + 1, dtype="float32")[:, None]
+
+        # A single checker is shared by the controllers of an object via the `simulator` dict.
+        base_pos, base_orn = _base_frame(self._p, self.bodyUniqueId[0])
+        kwargs = dict(robot_type=spec.config.robot_type, ground_height=spec.config.ground_height, margin=spec.config.margin)
+        key = (self.bodyUniqueId[0], tuple(sorted(kwargs.items())))
+        cache = simulator.setdefault("sphere_checker", dict())
+        if key not in cache:
+            cache[key] = SphereChecker(base_pos=base_pos, base_orn=base_orn, **kwargs)
+        self.checker = cache[key]
+        n = len(self.joints)
+        self.buffers = OutputBuffers(currj=n, action_applied=n, step=n, low=n, configurations=(spec.config.checks + 1, n))
+
+    @register.states()
+    def reset(self):
+        self.states.invalidate()
+
+    @register.inputs(tick=Space(shape=(), dtype="int64"), action=Space(dtype="float32"))
+    @register.outputs(action_applied=Space(dtype="float32"))
+    def callback(
+        self,
+        t_n: float,
+        tick: Optional[Msg] = None,
+        action: Optional[Msg] = None,
+    ):
+        """Sets the most recently received `action` in the pybullet joint controller, after filtering it.
+
+        The output `action_applied` is the action that was set."""
+        buf = self.buffers
+        self.states.update(tick)
+        np.take(self.states.position, self.joint_idx, out=buf.currj)
+        if self.mode == "position_control":
+            np.clip(action.msgs[-1], self.lower, self.upper, out=buf.action_applied)
+            np.subtract(buf.action_applied, buf.currj, out=buf.step)
+            np.clip(buf.step, self.min_step, self.max_step, out=buf.step)
+            np.add(buf.currj, buf.step, out=buf.action_applied)
+        else:
+            # The velocity is limited, and such that the joint limits are not crossed within a tick.
+            np.subtract(self.lower, buf.currj, out=buf.low)
+            np.subtract(self.upper, buf.currj, out=buf.step)
+            buf.low *= self.rate
+            buf.step *= self.rate
+            np.clip(buf.low, -self.vel_limit, 0.0, out=buf.low)
+            np.clip(buf.step, 0.0, self.vel_limit, out=buf.step)
+            np.clip(action.msgs[-1], buf.low, buf.step, out=buf.action_applied)
+            np.divide(buf.action_applied, self.rate, out=buf.step)
+
+        # The current configuration and the extrapolated ones are checked in one batch.
+        configurations = buf.configurations
+        np.multiply(self.multiples, buf.step, out=configurations)
+        configurations += buf.currj
+        free = self.checker.check(configurations)
+        if free[0] and not free[1:].all():
+            if self.mode == "position_control":
+                buf.action_applied[:] = buf.currj
+            else:
+                buf.action_applied[:] = 0.0
+        self.joint_cb(buf.action_applied)
+        return dict(action_applied=buf.emit("action_applied"))
 
 
 class TaskSpaceControl(eagerx.EngineNode):
@@ -266,12 +788,25 @@ class TaskSpaceControl(eagerx.EngineNode):
         lower: List[float],
         ee_link: str,
         rest_poses: List[float],
+        ik_solver: str = "pybullet",
+        cache_size: int = 1024,
+        cache_pos_resolution: float = 0.001,
+        cache_orn_resolution: float = 0.01,
+        ik_client: str = "live",
+        ik_filter: bool = False,
+        ik_candidates: int = 8,
+        min_height: float = 0.0,
+        robot_type: str = "panda",
         process: int = p.ENGINE,
         color: str = "grey",
     ) -> NodeSpec:
         """
-        Filters goal joint positions that cause self-collisions or are below a certain height.
-        Also check velocity limits.
+        Solves the inverse kinematics of the goal end-effector pose.
+
+        With `ik_filter`, several candidate solutions are generated, and the one closest to the current joint positions
+        that causes no self-collisions and keeps all links above `min_height` is selected. The candidates are checked
+        on a kinematic copy of the arm (see :class:`~eagerx_franka.franka_arm.pybullet.collision.CollisionChecker`). If
+        no candidate is valid, the previous goal is kept (or the current joint positions, if there is none).
 
         :param name: Node name
         :param rate: Rate at which callback is called.
@@ -280,6 +815,32 @@ class TaskSpaceControl(eagerx.EngineNode):
         :param lower: lower joint limits
         :param ee_link: end effector link name
         :param rest_poses: rest poses of the robot
+        :param ik_solver: Inverse kinematics solver:
+                          - pybullet: `calculateInverseKinematics`.
+                          - analytical: The closed-form solution that is closest to the current joint positions (see
+                            :class:`~eagerx_franka.franka_arm.pybullet.ik.AnalyticalIK`). Falls back to pybullet if the
+                            pose has no solution within the joint limits.
+        :param cache_size: Number of solutions in the LRU cache of the ik solver (see
+                           :class:`~eagerx_franka.ik.cache.IKCache`). The cache persists across resets within a process
+                           (and across environments with the same node name, base pose, joint limits and filter), and is
+                           disabled if 0. Only solutions that reach the pose (within 1 mm and 0.01 rad, verified with the
+                           forward kinematics) are cached, and hits are verified again up to the resolution of the keys.
+        :param cache_pos_resolution: Position resolution of the cache keys [m].
+        :param cache_orn_resolution: Resolution of the quaternion components of the cache keys.
+        :param ik_client: Body on which pybullet's ik solver is run:
+                          - live: The simulated arm. The solver starts from the simulated joint positions (pybullet's
+                            iterations do not converge from `currentPositions`), so the cache does not look up warm
+                            starts.
+                          - shadow: A kinematic-only copy of the arm in a separate client (see
+                            :class:`~eagerx_franka.franka_arm.pybullet.ik.ShadowArm`). The solver starts from the
+                            measured joint positions (or the warm start of the cache), so the solution is deterministic.
+        :param ik_filter: Select a valid solution among several candidates. The candidates of the analytical solver
+                          sweep the redundancy angle q7, and those of pybullet's solver start from the current joint
+                          positions and from random seeds (which requires `ik_client="shadow"`). The cache is bypassed
+                          when the solution is not valid.
+        :param ik_candidates: Number of redundancy angles or seeds (besides the current q7 or joint positions).
+        :param min_height: Minimum height of all links in the world frame [m], if `ik_filter`.
+        :param robot_type: Robot type (e.g. `panda` or `fr3`), see :mod:`eagerx_franka.franka_arm.mr_descriptions`.
         :param process: {0: NEW_PROCESS, 1: ENVIRONMENT, 2: ENGINE, 3: EXTERNAL}
         :param color: console color of logged messages. {'black', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white', 'grey'}
         :return: Node specification.
@@ -300,6 +861,17 @@ class TaskSpaceControl(eagerx.EngineNode):
         spec.config.lower = lower
         spec.config.ee_link = ee_link
         spec.config.rest_poses = rest_poses
+        spec.config.ik_solver = ik_solver
+        spec.config.cache_size = cache_size
+        spec.config.cache_pos_resolution = cache_pos_resolution
+        spec.config.cache_orn_resolution = cache_orn_resolution
+        spec.config.ik_client = ik_client
+        spec.config.ik_filter = ik_filter
+        spec.config.ik_candidates = ik_candidates
+        spec.config.min_height = min_height
+        spec.config.robot_type = robot_type
+        if ik_filter and ik_solver == "pybullet" and ik_client != "shadow":
+            raise ValueError("Filtering the solutions of pybullet's ik solver requires `ik_client='shadow'`.")
 
         # Add converter & space
         spec.outputs.goal.space.update(low=lower, high=upper)
@@ -312,6 +884,7 @@ class TaskSpaceControl(eagerx.EngineNode):
         self.ee_link = spec.config.ee_link
         self.rest_poses = np.array(spec.config.rest_poses, dtype="float")
 
+        self.simulator = simulator
         self.robot = simulator["object"]
         self._p = simulator["client"]._client
         self.physics_client_id = self._p
@@ -319,14 +892,88 @@ class TaskSpaceControl(eagerx.EngineNode):
         # Setup physics server for ik solver
         self.pb = pybullet
         self.arm = self.robot.robot_objectid[0]
-        self.indexed_joints, self.index_ee_link = index_joints_and_ee_link(
-            self.pb, self._p, self.arm, self.joints, self.ee_link
-        )
+        self.index_ee_link = BodyIndex.get(simulator, self.arm).link(self.ee_link)
+        self.joint_ranges = self.upper - self.lower
+        self.buffers = OutputBuffers(last_ee_pose_goal=7, tmp=7, goal=len(self.lower))
+        self.joint_states = JointStates.get(simulator)
+        self.joint_idx = self.joint_states.index(self.joints)
+        index = BodyIndex.get(simulator, self.arm)
+        self.joint_indices = index.joints(self.joints).tolist()
+        if spec.config.ik_client == "shadow":
+            from eagerx_franka.franka_arm.pybullet.ik import ShadowArm
+
+            self.shadow = ShadowArm.get(simulator, self.arm)
+        elif spec.config.ik_client == "live":
+            self.shadow = None
+        else:
+            raise ValueError(f"IK client `{spec.config.ik_client}` not recognized.")
+        if spec.config.ik_solver == "analytical":
+            from eagerx_franka.franka_arm.pybullet.ik import AnalyticalIK
+
+            self.ik = AnalyticalIK(
+                simulator["client"],
+                self.arm,
+                self.joint_indices,
+                self.index_ee_link,
+                self.lower,
+                self.upper,
+                spec.config.robot_type,
+            )
+        elif spec.config.ik_solver == "pybullet":
+            self.ik = None
+        else:
+            raise ValueError(f"IK solver `{spec.config.ik_solver}` not recognized.")
+        if spec.config.cache_size > 0 or spec.config.ik_filter:
+            import eagerx_franka.franka_arm.mr_descriptions as mrd
+            from eagerx_franka.franka_arm.pybullet.ik import _measure_ee
+            from eagerx_franka.ik.kinematics import Kinematics
+
+            # Solutions are verified with the forward kinematics before they are cached (or selected).
+            robot_type = spec.config.robot_type
+            self._world_to_base, M = _measure_ee(
+                simulator["client"], self.arm, self.joint_indices, self.index_ee_link, robot_type
+            )
+            self.kinematics = Kinematics(getattr(mrd, robot_type).Slist, M)
+        self.cache = None
+        if spec.config.cache_size > 0:
+            from eagerx_franka.ik.cache import IKCache
+            from eagerx_franka.utils import content_hash
+
+            # The cache persists across environments in this process, so its name covers everything that the solutions
+            # depend on: the robot, its base pose, the end-effector, the joint limits, and the filter.
+            key = content_hash(
+                spec.config.robot_type,
+                *(np.round(x, 6).tobytes() for x in (self._world_to_base, M, self.lower, self.upper)),
+                repr((spec.config.ik_filter, spec.config.min_height)),
+            )
+            self.cache = IKCache.get(
+                f"{self.ns_name}/{spec.config.ik_solver}/{key[:16]}",
+                size=spec.config.cache_size,
+                pos_resolution=spec.config.cache_pos_resolution,
+                orn_resolution=spec.config.cache_orn_resolution,
+            )
+            # A hit may lie anywhere in the cell of its key, so it is verified up to the resolution of the keys.
+            self._hit_tolerance = (
+                1e-3 + np.sqrt(3) * spec.config.cache_pos_resolution,
+                0.01 + 4 * spec.config.cache_orn_resolution,
+            )
+        self.checker = None
+        if spec.config.ik_filter:
+            from eagerx_franka.franka_arm.pybullet.collision import CollisionChecker
+            from eagerx_franka.ik.table import READY
+
+            reference = np.clip(READY, self.lower, self.upper)
+            self.checker = CollisionChecker.get(simulator, self.joints, reference, ground_height=spec.config.min_height)
+            # Redundancy angles of the analytical solver, and seeds of pybullet's solver.
+            self._q7 = np.linspace(self.lower[6], self.upper[6], spec.config.ik_candidates + 2)[1:-1]
+            self._seeds = np.random.default_rng(0).uniform(
+                self.lower, self.upper, size=(spec.config.ik_candidates, len(self.lower))
+            )
 
     @register.states()
     def reset(self):
-        self._last_ee_pose_goal = None
-        self._last_goal = None
+        self._has_goal = False
+        self.joint_states.invalidate()
 
     @register.inputs(
         tick=Space(shape=(), dtype="int64"),
@@ -334,35 +981,233 @@ class TaskSpaceControl(eagerx.EngineNode):
     )
     @register.outputs(goal=Space(dtype="float32"))
     def callback(self, t_n: float, tick: Msg, ee_pose: Msg = None):
+        buf = self.buffers
         ee_pose_goal = ee_pose.msgs[-1]
-        ee_pos_goal = ee_pose_goal[:3]
-        ee_orn_goal = ee_pose_goal[3:]
 
-        # Determine status: 0: ongoing, 1: success
-        if self._last_ee_pose_goal is None or not np.allclose(self._last_ee_pose_goal, ee_pose_goal):
-            self._last_ee_pose_goal = ee_pose_goal
-            run_ik = True
+        # Only rerun the ik solver when the goal pose changed.
+        np.subtract(ee_pose_goal, buf.last_ee_pose_goal, out=buf.tmp)
+        if self._has_goal and np.abs(buf.tmp, out=buf.tmp).max() <= 1e-5:
+            return dict(goal=buf.emit("goal"))
+        buf.last_ee_pose_goal[:] = ee_pose_goal
+
+        self.joint_states.update(tick)
+        current = self.joint_states.position[self.joint_idx]
+        goal, warm_start = None, None
+        if self.cache is not None:
+            # Only the shadow client can start the iterations from a warm start.
+            goal, warm_start = self.cache.lookup(ee_pose_goal, current, warm_start=self.shadow is not None)
+        if goal is not None and self._reached(ee_pose_goal, goal[None], *self._hit_tolerance)[0]:
+            self._set_goal(ee_pose_goal, goal, cache=False)
         else:
-            run_ik = False
+            self._set_goal(ee_pose_goal, self._solve(ee_pose_goal, current, warm_start))
+        return dict(goal=buf.emit("goal"))
+
+    def _set_goal(self, ee_pose_goal: np.ndarray, goal: Optional[np.ndarray], cache: bool = True):
+        if goal is None:
+            # No valid solution (see `_solve_filtered`), so the previous goal is kept.
+            if self._has_goal:
+                return
+            goal, cache = self.joint_states.position[self.joint_idx], False
+        if cache and self.cache is not None and self._reached(ee_pose_goal, goal[None])[0]:
+            self.cache.store(ee_pose_goal, goal)
+        self.buffers.goal[:] = goal
+        self._has_goal = True
+
+    def _ik_kwargs(self, ee_pose_goal: np.ndarray) -> Dict:
+        return dict(
+            endEffectorLinkIndex=self.index_ee_link,
+            targetPosition=ee_pose_goal[:3],
+            targetOrientation=ee_pose_goal[3:],
+            lowerLimits=self.lower,
+            upperLimits=self.upper,
+            jointRanges=self.joint_ranges,
+            restPoses=self.rest_poses,
+            maxNumIterations=100,
+            residualThreshold=1e-5,
+        )
+
+    def _reached(self, ee_pose_goal: np.ndarray, q: np.ndarray, pos_tol: float = 1e-3, orn_tol: float = 0.01) -> np.ndarray:
+        """Whether joint positions (N x n) reach the pose within `pos_tol` [m] and `orn_tol` [rad] (N,)."""
+        from eagerx_franka.franka_arm.pybullet.ik import _pose_to_matrix
+
+        T = self._world_to_base @ _pose_to_matrix(pybullet, ee_pose_goal[:3], ee_pose_goal[3:])
+        reached = self.kinematics.fk(q)
+        pos_error = np.linalg.norm(reached[:, :3, 3] - T[:3, 3], axis=1)
+        cos_error = (np.einsum("nij,ij->n", reached[:, :3, :3], T[:3, :3]) - 1) / 2
+        return (pos_error < pos_tol) & (cos_error > np.cos(orn_tol))
 
-        if not run_ik and self._last_goal is not None:
-            return dict(goal=self._last_goal.astype("float32"))
+    def _solve(self, ee_pose_goal: np.ndarray, current: np.ndarray, warm_start: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if self.checker is not None:
+            return self._solve_filtered(ee_pose_goal, current, warm_start)
+        if self.ik is not None:
+            goal, success = self.ik.solve(ee_pose_goal[:3], ee_pose_goal[3:], current)
+            if success:
+                return goal
+
+        kwargs = self._ik_kwargs(ee_pose_goal)
+        if self.shadow is not None:
+            # Start the iterations from the solution of a nearby pose (if any), instead of from the current joint positions.
+            return self.shadow.inverse_kinematics(self.joint_indices, current if warm_start is None else warm_start, **kwargs)
+        # Pybullet's iterations do not converge when they start from `currentPositions`, so the live solver always
+        # starts from the simulated joint positions (and ignores the warm start).
+        goal = self.pb.calculateInverseKinematics(bodyUniqueId=self.arm, physicsClientId=self._p, **kwargs)
+        # goal[2:] = (goal[2:] + np.pi) % (2 * np.pi) - np.pi
+        return np.array(goal[: len(self.lower)])
+
+    def _solve_filtered(
+        self, ee_pose_goal: np.ndarray, current: np.ndarray, warm_start: Optional[np.ndarray]
+    ) -> Optional[np.ndarray]:
+        """The candidate closest to the current joint positions that is free of collisions, or None if there is none."""
+        pos, orn = ee_pose_goal[:3], ee_pose_goal[3:]
+        if self.ik is not None:
+            candidates = self.ik.solve_all(pos, orn, np.append(current[6], self._q7), current)
         else:
-            goal = self.pb.calculateInverseKinematics(
-                bodyUniqueId=self.arm,
-                endEffectorLinkIndex=self.index_ee_link,
-                targetPosition=ee_pos_goal,
-                targetOrientation=ee_orn_goal,
-                lowerLimits=self.lower,
-                upperLimits=self.upper,
-                jointRanges=self.upper - self.lower,
-                restPoses=self.rest_poses,
-                # currentPositions=current.tolist(),
-                maxNumIterations=100,
-                residualThreshold=1e-5,
-                physicsClientId=self._p,
-            )
-            goal = np.array(goal[0 : len(self.lower)], dtype="float32")
-            # goal[2:] = (goal[2:] + np.pi) % (2 * np.pi) - np.pi
-            self._last_goal = goal
-            return dict(goal=goal)
+            kwargs = self._ik_kwargs(ee_pose_goal)
+            seeds = [current if warm_start is None else warm_start, *self._seeds]
+            candidates = np.array([self.shadow.inverse_kinematics(self.joint_indices, seed, **kwargs) for seed in seeds])
+            candidates = np.clip(candidates, self.lower, self.upper)
+            # Pybullet's solver does not always converge, so the pose of every candidate is verified.
+            candidates = candidates[self._reached(ee_pose_goal, candidates)]
+        for i in np.argsort(np.linalg.norm(candidates - current, axis=1)).tolist():
+            if self.checker.is_free(candidates[i]):
+                return candidates[i]
+        return None
+
+    def shutdown(self):
+        if self.shadow is not None:
+            from eagerx_franka.franka_arm.pybullet.ik import ShadowArm
+
+            ShadowArm.release(self.simulator, self.shadow)
+        if self.checker is not None:
+            from eagerx_franka.franka_arm.pybullet.collision import CollisionChecker
+
+            CollisionChecker.release(self.simulator, self.checker)
+
+
+class EndEffectorDownwardControl(EngineNode):
+    @classmethod
+    def make(
+        cls,
+        name: str,
+        rate: float,
+        robot_type: str,
+        joints: List[str],
+        ee_link: str,
+        upper: List[float],
+        lower: List[float],
+        max_dxyz: List[float],
+        max_dyaw: float,
+        min_z: float = 0.03,
+        eomg: float = 0.001,
+        ev: float = 0.001,
+        solver: str = "dls",
+        time_budget: Optional[float] = None,
+        max_iter: int = 20,
+        outputs: List[str] = None,
+        process: Optional[int] = p.ENGINE,
+        color: Optional[str] = "green",
+    ) -> NodeSpec:
+        """Engine-resident variant of :class:`~eagerx_franka.ik.node.EndEffectorDownward`.
+
+        The current joint positions and end-effector pose are read from the simulated arm (at most once per tick, see
+        :class:`JointStates`), instead of being received from the position, ee_pos, and ee_orn sensors, so only
+        `dxyz` and `dyaw` are inputs. The end-effector pose is expressed in the base frame of the arm, and the
+        inverse kinematics are solved for the end-effector link itself (its frame is measured from the simulated arm).
+
+        :param name: Node name.
+        :param rate: Rate at which callback is called.
+        :param robot_type: Robot type (e.g. `panda` or `fr3`), see :mod:`eagerx_franka.franka_arm.mr_descriptions`.
+        :param joints: Names of the arm joints.
+        :param ee_link: Name of the end-effector link.
+        :param upper: Upper joint limits.
+        :param lower: Lower joint limits.
+        :param max_dxyz: Maximum delta position in xyz [m/s].
+        :param max_dyaw: Maximum delta rotation in yaw [rad/s].
+        :param min_z: Minimum z position of the end-effector link [m].
+        :param eomg: Tolerance on the end-effector orientation error.
+        :param ev: Tolerance on the end-effector position error.
+        :param solver: Inverse kinematics solver (see :meth:`~eagerx_franka.ik.node.EndEffectorDownward.make`).
+        :param time_budget: Deadline of a solve [s] (dls only).
+        :param max_iter: Maximum number of iterations of the dls solver.
+        :param outputs: Selected outputs (see :meth:`~eagerx_franka.ik.node.EndEffectorDownward.make`). By default,
+                        `target` and `dtarget` are selected.
+        :param process: {0: NEW_PROCESS, 1: ENVIRONMENT, 2: ENGINE, 3: EXTERNAL}
+        :param color: console color of logged messages. {'black', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white', 'grey'}
+        :return: Node specification.
+        """
+        from eagerx_franka.ik.node import DownwardIK
+
+        spec = cls.get_specification()
+
+        # Modify default node params
+        spec.config.update(name=name, rate=rate, process=process, color=color)
+        spec.config.inputs = ["tick", "dxyz", "dyaw"]
+        spec.config.outputs = outputs if outputs else ["target", "dtarget"]
+        DownwardIK.check(solver, time_budget, spec.config.outputs)
+
+        # Modify custom node params
+        spec.config.robot_type = robot_type
+        spec.config.joints = joints
+        spec.config.ee_link = ee_link
+        spec.config.upper = upper
+        spec.config.lower = lower
+        spec.config.max_dxyz = max_dxyz
+        spec.config.max_dyaw = max_dyaw
+        spec.config.min_z = min_z
+        spec.config.eomg = eomg
+        spec.config.ev = ev
+        spec.config.solver = solver
+        spec.config.time_budget = time_budget
+        spec.config.max_iter = max_iter
+
+        # Add converter & space
+        spec.inputs.dxyz.space.update(low=[-i for i in max_dxyz], high=max_dxyz)
+        spec.inputs.dyaw.space.update(low=-max_dyaw, high=max_dyaw)
+        spec.outputs.target.space.update(low=lower, high=upper)
+        return spec
+
+    def initialize(self, spec: NodeSpec, simulator: Dict):
+        assert self.process == p.ENGINE, (
+            "Simulation node requires a reference to the simulator," " hence it must be launched in the Engine process"
+        )
+        import eagerx_franka.franka_arm.mr_descriptions as mrd
+        from eagerx_franka.franka_arm.pybullet.ik import _measure_ee
+        from eagerx_franka.ik.node import DownwardIK
+
+        self._p = simulator["client"]
+        self.physics_client_id = self._p._client
+        self.arm = simulator["object"].robot_objectid[0]
+        index = BodyIndex.get(simulator, self.arm)
+        self.index_ee_link = index.link(spec.config.ee_link)
+        self.joint_states = JointStates.get(simulator)
+        self.joint_idx = self.joint_states.index(spec.config.joints)
+        joint_indices = index.joints(spec.config.joints).tolist()
+        self.world_to_base, M = _measure_ee(self._p, self.arm, joint_indices, self.index_ee_link, spec.config.robot_type)
+        self.ik = DownwardIK(spec.config, self.rate, Slist=getattr(mrd, spec.config.robot_type).Slist, M=M)
+        self.T = np.eye(4)
+
+    @register.states()
+    def reset(self):
+        self.joint_states.invalidate()
+
+    @register.inputs(
+        tick=Space(shape=(), dtype="int64"),
+        dxyz=Space(shape=(3,), dtype="float32"),
+        dyaw=Space(shape=(), dtype="float32"),
+    )
+    @register.outputs(
+        target=Space(dtype="float32"),
+        dtarget=Space(dtype="float32"),
+        residual=Space(low=0, high=np.inf, shape=(2,), dtype="float32"),
+        iterations=Space(low=0, high=np.iinfo("int64").max, shape=(), dtype="int64"),
+        overruns=Space(low=0, high=np.iinfo("int64").max, shape=(), dtype="int64"),
+    )
+    def callback(self, t_n: float, tick: Msg, dxyz: Msg, dyaw: Msg):
+        self.joint_states.update(tick)
+        current = self.joint_states.position[self.joint_idx]
+        pos, orn = self._p.getLinkState(self.arm, self.index_ee_link, physicsClientId=self.physics_client_id)[:2]
+        T = self.T
+        T[:3, :3] = np.reshape(self._p.getMatrixFromQuaternion(orn), (3, 3))
+        T[:3, 3] = pos
+        T = self.world_to_base @ T
+        return self.ik(np.array(dxyz.msgs[-1]), dyaw.msgs[-1], T[:3, 3], T[:3, :3], current)
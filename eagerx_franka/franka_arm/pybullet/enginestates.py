@@ -1,9 +1,9 @@
-from dataclasses import dataclass
 import numpy as np
 import eagerx
 from typing import Any, List, Dict
 from eagerx.core.specs import EngineStateSpec
 import pybullet
+from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
 
 
 class FrankaGripper(eagerx.EngineState):
@@ -22,13 +22,11 @@ class FrankaGripper(eagerx.EngineState):
         self._p = simulator["client"]
         self.physics_client_id = self._p._client
 
-        self.bodyUniqueId = []
-        self.jointIndices = []
-        for _idx, pb_name in enumerate(spec.config.joints):
-            bodyid, jointindex = self.robot.jdict[pb_name].get_bodyid_jointindex()
-            self.bodyUniqueId.append(bodyid), self.jointIndices.append(jointindex)
+        index = BodyIndex.get(simulator)
+        self.bodyUniqueId = index.body_id
+        self.jointIndices = index.joints(self.joints).tolist()
         self.gripper_cb = self._gripper_reset(
-            self._p, self.bodyUniqueId[0], self.jointIndices, self.constant, self.scale, self.fixed
+            self._p, self.bodyUniqueId, self.jointIndices, self.constant, self.scale, self.fixed
         )
 
     def reset(self, state: Any):
@@ -76,6 +74,10 @@ class PoseState(eagerx.EngineState):
         lower: List[float],
         ee_link: str,
         rest_poses: List[float],
+        ik_solver: str = "pybullet",
+        ik_client: str = "live",
+        ik_table: bool = False,
+        robot_type: str = "panda",
     ) -> EngineStateSpec:
         spec = cls.get_specification()
         spec.config.joints = joints
@@ -83,6 +85,10 @@ class PoseState(eagerx.EngineState):
         spec.config.lower = lower
         spec.config.ee_link = ee_link
         spec.config.rest_poses = rest_poses
+        spec.config.ik_solver = ik_solver
+        spec.config.ik_client = ik_client
+        spec.config.ik_table = ik_table
+        spec.config.robot_type = robot_type
         return spec
 
     def initialize(self, spec: EngineStateSpec, simulator: Dict):
@@ -101,13 +107,53 @@ class PoseState(eagerx.EngineState):
         self.pb = pybullet
 
         self.arm = self.robot.robot_objectid[0]
-        self.indexed_joints, self.index_ee_link = index_joints_and_ee_link(
-            self.pb, self._p, self.arm, self.joints, self.ee_link
-        )
+        index = BodyIndex.get(simulator, self.arm)
+        self.joint_indices = index.joints(self.joints).tolist()
+        self.index_ee_link = index.link(self.ee_link)
 
         # Reset to sleep position
-        for i, joint in enumerate(self.indexed_joints):
-            self.pb.resetJointState(self.arm, joint.joint_uid, self.rest_poses[i], physicsClientId=self._p)
+        for i, joint in enumerate(self.joint_indices):
+            self.pb.resetJointState(self.arm, joint, self.rest_poses[i], physicsClientId=self._p)
+
+        if spec.config.ik_solver == "analytical":
+            from eagerx_franka.franka_arm.pybullet.ik import AnalyticalIK
+
+            self.ik = AnalyticalIK(
+                simulator["client"],
+                self.arm,
+                self.joint_indices,
+                self.index_ee_link,
+                self.lower,
+                self.upper,
+                spec.config.robot_type,
+            )
+        elif spec.config.ik_solver == "pybullet":
+            self.ik = None
+        else:
+            raise ValueError(f"IK solver `{spec.config.ik_solver}` not recognized.")
+        if spec.config.ik_client == "shadow":
+            from eagerx_franka.franka_arm.pybullet.ik import ShadowArm
+
+            self.shadow = ShadowArm.get(simulator, self.arm)
+        elif spec.config.ik_client == "live":
+            self.shadow = None
+        else:
+            raise ValueError(f"IK client `{spec.config.ik_client}` not recognized.")
+        if spec.config.ik_table:
+            from eagerx_franka.franka_arm.pybullet.ik import TableIK
+
+            self.table = TableIK(
+                simulator["client"],
+                self.arm,
+                self.joint_indices,
+                self.index_ee_link,
+                self.lower,
+                self.upper,
+                spec.config.robot_type,
+                self.ee_link,
+            )
+        else:
+            self.table = None
 
     def reset(self, state):
         ee_pose_goal = state
@@ -117,55 +163,30 @@ class PoseState(eagerx.EngineState):
         ee_orn_goal = ee_pose_goal[3:]
 
         # Get inverse kinematics solution
-        goal = self.pb.calculateInverseKinematics(
-            bodyUniqueId=self.arm,
-            endEffectorLinkIndex=self.index_ee_link,
-            targetPosition=ee_pos_goal,
-            targetOrientation=ee_orn_goal,
-            lowerLimits=self.lower,
-            upperLimits=self.upper,
-            jointRanges=self.upper - self.lower,
-            restPoses=self.rest_poses,
-            # currentPositions=current.tolist(),
-            maxNumIterations=100,
-            residualThreshold=1e-5,
-            physicsClientId=self._p,
-        )
+        success = False
+        if self.table is not None:
+            goal, success = self.table.solve(ee_pos_goal, ee_orn_goal)
+        if not success and self.ik is not None:
+            goal, success = self.ik.solve(ee_pos_goal, ee_orn_goal, self.ik.current())
+        if not success:
+            kwargs = dict(
+                endEffectorLinkIndex=self.index_ee_link,
+                targetPosition=ee_pos_goal,
+                targetOrientation=ee_orn_goal,
+                lowerLimits=self.lower,
+                upperLimits=self.upper,
+                jointRanges=self.upper - self.lower,
+                restPoses=self.rest_poses,
+                maxNumIterations=100,
+                residualThreshold=1e-5,
+            )
+            if self.shadow is not None:
+                states = self.pb.getJointStates(self.arm, self.joint_indices, physicsClientId=self._p)
+                goal = self.shadow.inverse_kinematics(self.joint_indices, [s[0] for s in states], **kwargs)
+            else:
+                goal = self.pb.calculateInverseKinematics(bodyUniqueId=self.arm, physicsClientId=self._p, **kwargs)
 
         # Set joints to goal
-        for i, joint in enumerate(self.indexed_joints):
-            self.pb.resetJointState(self.arm, joint.joint_uid, goal[i], physicsClientId=self._p)
-
-
-@dataclass
-class IndexedJointObject:
-    """Index of a robot joint and its name."""
-
-    joint_name: str
-    joint_uid: int
-
-
-def index_joints_and_ee_link(pb, physics_uid, robot_id, joints, ee_link):
-    """Map a list of joint names to indexed joints.
-    In other words, map named joints to the index used by
-    PyBullet to facilitate setting the configuration.
-    Parameters:
-      physics_uid: Index of the PyBullet physics server to use.
-      joints: list with joint name keys
-      ee_link: end effector link name
-    Returns: a list of IndexedJointObject
-    """
-    indexed_joints = []
-    indexed_ee_link = None
-    n = pb.getNumJoints(robot_id, physics_uid)
-    for joint_name in joints:
-        for i in range(n):
-            info = pb.getJointInfo(robot_id, i, physics_uid)
-            if info[12].decode("utf8") == ee_link:
-                indexed_ee_link = i
-            if joint_name == info[1].decode("utf-8"):
-                indexed_joints.append(IndexedJointObject(joint_name, i))
-                continue
-    assert len(joints) == len(indexed_joints), "Not all joints were found in the provided urdf."
-    assert indexed_ee_link is not None, "End effector link not found in the provided urdf."
-    return indexed_joints, indexed_ee_link
+        self.pb.resetJointStatesMultiDof(
+            self.arm, self.joint_indices, targetValues=[[g] for g in goal[: len(self.joint_indices)]], physicsClientId=self._p
+        )
@@ -0,0 +1,235 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pybullet
+from eagerx_franka.ik.analytical import AnalyticalSolver, FLANGE_HOME
+from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
+
+
+def _pose_to_matrix(p, pos, orn) -> np.ndarray:
+    T = np.eye(4)
+    T[:3, :3] = np.reshape(p.getMatrixFromQuaternion(orn), (3, 3))
+    T[:3, 3] = pos
+    return T
+
+
+def _base_frame(p, body_id: int) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """The position and orientation (x, y, z, w) of the link frame of the base of a body in the world frame."""
+    # Pybullet reports the pose of the base's center of mass, rather than of its link frame.
+    inertial = p.getDynamicsInfo(body_id, -1, physicsClientId=p._client)
+    pos, orn = p.getBasePositionAndOrientation(body_id, physicsClientId=p._client)
+    return p.multiplyTransforms(pos, orn, *p.invertTransform(inertial[3], inertial[4]))
+
+
+def _measure_ee(p, body_id: int, joint_indices: List[int], ee_link: int, robot_type: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Measures the base and end-effector frames of an arm from its current state.
+
+    :param robot_type: Robot type (e.g. `panda` or `fr3`), see :mod:`eagerx_franka.franka_arm.mr_descriptions`.
+    :return: The transformation from the world to the base frame, and the home configuration of the end-effector in the
+             base frame (see :mod:`eagerx_franka.franka_arm.mr_descriptions`).
+    """
+    import eagerx_franka.franka_arm.mr_descriptions as mrd
+    from eagerx_franka.ik.dls import DLSSolver
+
+    world_to_base = np.linalg.inv(_pose_to_matrix(p, *_base_frame(p, body_id)))
+    q = [s[0] for s in p.getJointStates(body_id, joint_indices, physicsClientId=p._client)]
+    state = p.getLinkState(body_id, ee_link, computeForwardKinematics=True, physicsClientId=p._client)
+    T_be = world_to_base @ _pose_to_matrix(p, state[0], state[1])
+    T_bf = DLSSolver(getattr(mrd, robot_type).Slist, FLANGE_HOME).fk(np.array(q))
+    return world_to_base, FLANGE_HOME @ np.linalg.solve(T_bf, T_be)
+
+
+class AnalyticalIK:
+    """Analytical inverse kinematics (see :class:`~eagerx_franka.ik.analytical.AnalyticalSolver`) of a Franka arm in
+    pybullet, for end-effector poses in the world frame.
+
+    The pose of the end-effector link relative to the flange is measured once, from the state of the body at
+    construction, so any link that is rigidly attached to the flange (e.g. the grasp target) can be used. The base is
+    assumed to be fixed, so :meth:`solve` does not query the client (and can be called from any thread).
+    """
+
+    def __init__(
+        self,
+        p,
+        body_id: int,
+        joint_indices: List[int],
+        ee_link: int,
+        lower: List[float],
+        upper: List[float],
+        robot_type: str = "panda",
+    ):
+        """
+        :param p: Pybullet client.
+        :param body_id: Body unique id of the arm.
+        :param joint_indices: Pybullet indices of the seven arm joints.
+        :param ee_link: Pybullet index of the end-effector link.
+        :param lower: Lower joint limits.
+        :param upper: Upper joint limits.
+        :param robot_type: Robot type (e.g. `panda` or `fr3`).
+        """
+        self._p = p
+        self.body_id = body_id
+        self.joint_indices = joint_indices
+        self._world_to_base, M = _measure_ee(p, body_id, joint_indices, ee_link, robot_type)
+        self.solver = AnalyticalSolver(lower, upper, M=M)
+
+    def solve(self, pos: np.ndarray, orn: np.ndarray, seed: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """Computes the solution that is closest to the seed (see :meth:`AnalyticalSolver.solve`).
+
+        :param pos: Desired position of the end-effector in the world frame.
+        :param orn: Desired orientation of the end-effector in the world frame (quaternion, xyzw).
+        :param seed: The current joint positions.
+        :return: The joint positions and whether a solution within the joint limits exists.
+        """
+        return self.solver.solve(self._world_to_base @ _pose_to_matrix(pybullet, pos, orn), seed)
+
+    def solve_all(self, pos: np.ndarray, orn: np.ndarray, q7: List[float], seed: np.ndarray) -> np.ndarray:
+        """Computes all solutions for a set of redundancy angles (see :meth:`AnalyticalSolver.solve_all`).
+
+        :param pos: Desired position of the end-effector in the world frame.
+        :param orn: Desired orientation of the end-effector in the world frame (quaternion, xyzw).
+        :param q7: Redundancy angles.
+        :param seed: The current joint positions (its q1 is used if q1 is undetermined).
+        :return: The solutions within the joint limits (K x 7).
+        """
+        T = self._world_to_base @ _pose_to_matrix(pybullet, pos, orn)
+        q = np.concatenate([self.solver.solve_all(T, angle, q1_singular=seed[0]) for angle in q7])
+        return q[~np.isnan(q[:, 0])]
+
+    def current(self) -> np.ndarray:
+        """The current joint positions."""
+        states = self._p.getJointStates(self.body_id, self.joint_indices, physicsClientId=self._p._client)
+        return np.array([s[0] for s in states])
+
+
+class TableIK:
+    """Inverse kinematics of a Franka arm in pybullet from a precomputed table (see :class:`~eagerx_franka.ik.table.IKTable`),
+    for end-effector poses in the world frame.
+
+    The solution of the nearest pose in the table is refined with a few iterations of
+    :class:`~eagerx_franka.ik.dls.DLSSolver`, so the solution only depends on the target (and not on the current joint
+    positions). As in :class:`AnalyticalIK`, the end-effector frame is measured once, and the base is assumed to be fixed.
+    """
+
+    def __init__(
+        self,
+        p,
+        body_id: int,
+        joint_indices: List[int],
+        ee_link: int,
+        lower: List[float],
+        upper: List[float],
+        robot_type: str,
+        name: str,
+        max_iter: int = 10,
+        build: bool = False,
+        processes: Optional[int] = None,
+    ):
+        """
+        :param p: Pybullet client.
+        :param body_id: Body unique id of the arm.
+        :param joint_indices: Pybullet indices of the seven arm joints.
+        :param ee_link: Pybullet index of the end-effector link.
+        :param lower: Lower joint limits.
+        :param upper: Upper joint limits.
+        :param robot_type: Robot type (e.g. `panda` or `fr3`).
+        :param name: Name of the end-effector link (part of the file name of the table).
+        :param max_iter: Maximum number of refinement iterations.
+        :param build: Builds the table if it is not in the cache, instead of raising a FileNotFoundError (see
+                      :meth:`~eagerx_franka.ik.table.IKTable.load`).
+        :param processes: Number of worker processes that build the table. Defaults to the number of cpus.
+        """
+        import eagerx_franka.franka_arm.mr_descriptions as mrd
+        from eagerx_franka.ik.dls import DLSSolver
+        from eagerx_franka.ik.table import IKTable
+
+        self._world_to_base, M = _measure_ee(p, body_id, joint_indices, ee_link, robot_type)
+        self.table = IKTable.load(robot_type, M, lower, upper, name=name, processes=processes, build=build)
+        self.solver = DLSSolver(getattr(mrd, robot_type).Slist, M, lower, upper, max_iter=max_iter)
+
+    def solve(self, pos: np.ndarray, orn: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """Computes the solution of a pose.
+
+        :param pos: Desired position of the end-effector in the world frame.
+        :param orn: Desired orientation of the end-effector in the world frame (quaternion, xyzw).
+        :return: The joint positions and whether they were found (i.e. the pose lies in the table and was refined).
+        """
+        T = self._world_to_base @ _pose_to_matrix(pybullet, pos, orn)
+        seed = self.table.lookup(T)
+        if seed is None:
+            return None, False
+        return self.solver.solve(T, seed)
+
+
+class ShadowArm:
+    """Kinematic-only copy of an arm in a separate pybullet client (DIRECT mode), for `calculateInverseKinematics`.
+
+    The copy is never stepped and has no collisions. Its joints are set to the seed before every solve, so that the
+    solution only depends on the target and the seed, and not on the simulated joint state.
+
+    A single copy is shared by all engine nodes and engine states of an object via the `simulator` dict (see
+    :meth:`get`). Engine nodes release it at shutdown, and the engine closes it at shutdown if engine states still use it.
+    """
+
+    def __init__(self, p, body_id: int, urdf: str):
+        """
+        :param p: Pybullet client of the simulation.
+        :param body_id: Body unique id of the arm in the simulation.
+        :param urdf: Path to the urdf of the arm.
+        """
+        from pybullet_utils.bullet_client import BulletClient
+
+        self.client = BulletClient(connection_mode=pybullet.DIRECT)
+        self.body_id = self.client.loadURDF(urdf, useFixedBase=True, physicsClientId=self.client._client)
+        pos, orn = p.getBasePositionAndOrientation(body_id, physicsClientId=p._client)
+        self.client.resetBasePositionAndOrientation(self.body_id, pos, orn, physicsClientId=self.client._client)
+        index = BodyIndex(self.client, self.body_id)
+        for link in range(-1, len(index.joint_names)):
+            self.client.setCollisionFilterGroupMask(self.body_id, link, 0, 0, physicsClientId=self.client._client)
+        # Joint indices of the degrees of freedom, in the order of the positions of `calculateInverseKinematics`.
+        self.dofs = np.flatnonzero(index.joint_type != pybullet.JOINT_FIXED)
+
+    @classmethod
+    def get(cls, simulator: Dict, body_id: int = None) -> "ShadowArm":
+        """Get the (shared) copy of a body, and count a reference to it (see
+        :func:`~eagerx_franka.franka_arm.pybullet.shared.acquire`).
+
+        :param simulator: The simulator dict of the object.
+        :param body_id: Body unique id. Defaults to the (first) body of the object.
+        :return: The copy.
+        """
+        from eagerx_franka.franka_arm.pybullet.shared import acquire
+
+        body_id = simulator["object"].robot_objectid[0] if body_id is None else body_id
+        return acquire(
+            simulator, "shadow_arm", body_id, lambda: cls(simulator["client"], body_id, simulator["object"].model_urdf)
+        )
+
+    @staticmethod
+    def release(simulator: Dict, shadow: "ShadowArm"):
+        """Releases a reference to a copy (see :meth:`get`). The last one closes it."""
+        from eagerx_franka.franka_arm.pybullet.shared import release
+
+        release(simulator, "shadow_arm", shadow)
+
+    def inverse_kinematics(self, joint_indices: List[int], seed: np.ndarray, **kwargs) -> np.ndarray:
+        """Calls `calculateInverseKinematics` for the copy.
+
+        :param joint_indices: Pybullet indices of the joints of `seed`. The other joints are set to zero.
+        :param seed: Joint positions from which the solver starts.
+        :param kwargs: Arguments of `calculateInverseKinematics`, except for `bodyUniqueId` and `currentPositions`
+                       (the iterations do not converge when they start from `currentPositions`, so the joints of the
+                       copy are reset to the seed instead).
+        :return: The solution for the joints in `joint_indices`.
+        """
+        idx = np.searchsorted(self.dofs, joint_indices)
+        positions = np.zeros(len(self.dofs))
+        positions[idx] = seed
+        client, body_id = self.client, self.body_id
+        for joint, position in zip(self.dofs.tolist(), positions.tolist()):
+            client.resetJointState(body_id, joint, position, physicsClientId=client._client)
+        goal = client.calculateInverseKinematics(bodyUniqueId=body_id, physicsClientId=client._client, **kwargs)
+        return np.array(goal)[idx]
+
+    def close(self):
+        """Disconnects the client."""
+        self.client.disconnect()
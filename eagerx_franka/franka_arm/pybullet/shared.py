@@ -0,0 +1,65 @@
+from typing import Callable, Dict, Hashable, TypeVar
+import pybullet
+
+T = TypeVar("T")
+
+
+def acquire(simulator: Dict, cache: str, key: Hashable, create: Callable[[], T]) -> T:
+    """Gets a resource with its own pybullet client (e.g. a :class:`~eagerx_franka.franka_arm.pybullet.ik.ShadowArm`)
+    that is shared by the engine nodes and engine states of an object via the `simulator` dict, and counts a reference
+    to it.
+
+    The resource is created with `create` on first use. It is closed when its last reference is released (see
+    :func:`release`), or when the engine disconnects from the simulator at shutdown, whichever comes first. Engine
+    states have no shutdown hook, so they never release their references, and the engine closes the resources they use.
+
+    :param simulator: The simulator dict of the object.
+    :param cache: Name of the cache in the simulator dict.
+    :param key: Key of the resource in the cache.
+    :param create: Creates the resource, which must have a `close` method.
+    :return: The resource.
+    """
+    entries = simulator.setdefault(cache, dict())
+    if key not in entries:
+        entries[key] = [create(), 0]
+        _close_on_disconnect(simulator["client"], entries, key)
+    entries[key][1] += 1
+    return entries[key][0]
+
+
+def release(simulator: Dict, cache: str, resource) -> None:
+    """Releases a reference to a shared resource (see :func:`acquire`), and closes it if it was the last one.
+
+    :param simulator: The simulator dict of the object.
+    :param cache: Name of the cache in the simulator dict.
+    :param resource: The resource.
+    """
+    entries = simulator.get(cache, dict())
+    for key, entry in list(entries.items()):
+        if entry[0] is resource:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del entries[key]
+                resource.close()
+            return
+
+
+def _close_on_disconnect(client, entries: Dict, key: Hashable):
+    # The engine calls `disconnect` of the client of the simulator at shutdown. BulletClient resolves it with
+    # __getattr__, which marks the client as disconnected as soon as the attribute is accessed, so it is replaced by an
+    # instance attribute that closes the resources first.
+    pending = client.__dict__.get("_shared_resources")
+    if pending is None:
+        pending = client._shared_resources = []
+
+        def disconnect():
+            for resources, name in reversed(pending):
+                entry = resources.pop(name, None)
+                if entry is not None:
+                    entry[0].close()
+            pending.clear()
+            pybullet.disconnect(physicsClientId=client._client)
+            client._client = -1
+
+        client.disconnect = disconnect
+    pending.append((entries, key))
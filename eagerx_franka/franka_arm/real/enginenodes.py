@@ -5,7 +5,16 @@ from eagerx.core.specs import NodeSpec
 import eagerx.core.register as register
 from eagerx.utils.utils import Msg
 import numpy as np
-from eagerx_franka.panda_ros.panda import Panda as Client
+from eagerx_franka.franka_arm.buffers import OutputBuffers
+
+
+def _get_client(simulator: Any):
+    # Only import the ROS client (rospy, numpy-quaternion, dynamic_reconfigure) when a real arm is used.
+    if "client" not in simulator:
+        from eagerx_franka.panda_ros.panda import Panda as Client
+
+        simulator["client"] = Client()
+    return simulator["client"]
 
 
 class FrankaSensor(eagerx.EngineNode):
@@ -69,9 +78,9 @@ class FrankaSensor(eagerx.EngineNode):
             raise NotImplementedError(f"This mode is not implemented: {spec.config.mode}")
 
         # Get arm client
-        if "client" not in simulator:
-            simulator["client"] = Client()
-        self.arm = simulator["client"]
+        self.arm = _get_client(simulator)
+        size = dict(ee_position=3, ee_orientation=4, ee_pose=7, gripper_position=1).get(self.mode, len(spec.config.joints))
+        self.buffers = OutputBuffers(obs=size)
 
         # Remap joint measurements & commands according to ordering in spec.config.joints.
         # self.arm.set_joint_remapping(spec.config.joints)
@@ -84,32 +93,26 @@ class FrankaSensor(eagerx.EngineNode):
     @register.outputs(obs=Space(dtype="float32"))
     def callback(self, t_n: float, tick: Msg):
         # Select based on mode of node.
+        obs = self.buffers.obs
         if self.mode == "position":
-            position = self.arm.curr_joint
-            obs = np.array(position, dtype="float32")
+            obs[:] = self.arm.curr_joint
         elif self.mode == "velocity":
-            velocity = self.arm.curr_joint_vel
-            obs = np.array(velocity, dtype="float32")
+            obs[:] = self.arm.curr_joint_vel
         elif self.mode == "ee_position":
-            ee_position = self.arm.curr_pos
-            obs = np.array(ee_position, dtype="float32")
+            obs[:] = self.arm.curr_pos
         elif self.mode == "ee_orientation":
-            ori = self.arm.curr_ori
             # w should be the last element instead of the first element
-            ori = np.roll(ori, -1)
-            obs = np.array(ori, dtype="float32")
-        elif self.mode == "ee_pose":
-            pos = self.arm.curr_pos
             ori = self.arm.curr_ori
+            obs[:3], obs[3] = ori[1:], ori[0]
+        elif self.mode == "ee_pose":
             # w should be the last element instead of the first element
-            ori = np.roll(ori, -1)
-            obs = np.concatenate([pos, ori])
+            ori = self.arm.curr_ori
+            obs[:3], obs[3:6], obs[6] = self.arm.curr_pos, ori[1:], ori[0]
         elif self.mode == "gripper_position":
-            gripper_pos = self.arm.gripper_width
-            obs = np.array([gripper_pos], dtype="float32")
+            obs[0] = self.arm.gripper_width
         else:
             raise NotImplementedError(f"This mode is not implemented: {self.mode}")
-        return dict(obs=obs)
+        return dict(obs=self.buffers.emit("obs"))
 
     def close(self):
         pass
@@ -144,9 +147,7 @@ class FrankaGripper(eagerx.EngineNode):
 
     def initialize(self, spec: NodeSpec, simulator: Any):
         # Get arm client
-        if "client" not in simulator:
-            simulator["client"] = Client()
-        self.arm = simulator["client"]
+        self.arm = _get_client(simulator)
 
     @register.states()
     def reset(self):
@@ -181,7 +182,7 @@ class DummySensor(eagerx.EngineNode):
         return spec
 
     def initialize(self, spec: NodeSpec, simulator: Any):
-        pass
+        self.buffers = OutputBuffers(obs=0)
 
     @register.states()
     def reset(self):
@@ -190,7 +191,7 @@ class DummySensor(eagerx.EngineNode):
     @register.inputs(tick=Space(shape=(), dtype="int64"))
     @register.outputs(obs=Space(dtype="float32"))
     def callback(self, t_n: float, tick: Msg):
-        return dict(obs=np.asarray([], dtype="float32"))
+        return dict(obs=self.buffers.emit("obs"))
 
     def shutdown(self):
         pass
@@ -225,9 +226,8 @@ class TaskSpaceControl(eagerx.EngineNode):
 
     def initialize(self, spec: NodeSpec, simulator: Any):
         # Get arm client
-        if "client" not in simulator:
-            simulator["client"] = Client()
-        self.arm = simulator["client"]
+        self.arm = _get_client(simulator)
+        self.buffers = OutputBuffers(goal_pose=7)
 
     @register.states()
     def reset(self):
@@ -239,10 +239,12 @@ class TaskSpaceControl(eagerx.EngineNode):
     )
     @register.outputs(goal=Space(low=[-2, -2, 0, -1, -1, -1, -1], high=[2, 2, 2, 1, 1, 1, 1], dtype="float32"))
     def callback(self, t_n: float, tick: Msg, ee_pose: Msg):
-        goal_pose = ee_pose.msgs[-1]
-        goal_pose[3:] = np.roll(goal_pose[3:], 1)
-        self.arm.go_to_pose_array(np.squeeze([goal_pose]))
-        return dict(goal=ee_pose.msgs[-1])
+        # The client expects the orientation as (w, x, y, z). Reorder in a buffer, so that the received message (and
+        # hence the goal that is sent) is not modified.
+        ee_pose, goal_pose = ee_pose.msgs[-1], self.buffers.goal_pose
+        goal_pose[:3], goal_pose[3], goal_pose[4:] = ee_pose[:3], ee_pose[6], ee_pose[3:6]
+        self.arm.go_to_pose_array(goal_pose)
+        return dict(goal=ee_pose)
 
     def shutdown(self):
         curr_pos = self.arm.curr_pos
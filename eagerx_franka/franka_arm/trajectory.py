@@ -0,0 +1,167 @@
+from typing import Tuple
+import numpy as np
+
+
+class JointTrajectory:
+    """Time-optimal, jerk-limited trajectory along the straight line between two joint configurations at rest.
+
+    The joints move synchronously along the line, so the trajectory is a single path parameter s(t) from 0 to 1 with a
+    seven-segment (s-curve) profile: the jerk is +J, 0, -J, 0, -J, 0, +J. The limits of the path parameter are the
+    tightest of the per-joint limits divided by the distance that each joint travels, so the slowest joint moves at its
+    limits and the others scale along. The profile is computed once per goal, and :meth:`sample` only evaluates a
+    cubic polynomial.
+    """
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        goal: np.ndarray,
+        vel_limit: np.ndarray,
+        acc_limit: np.ndarray,
+        jerk_limit: np.ndarray,
+        eps: float = 1e-9,
+    ):
+        """
+        :param start: Joint positions at the start (at rest).
+        :param goal: Joint positions at the goal (at rest).
+        :param vel_limit: Per-joint velocity limits [rad/s].
+        :param acc_limit: Per-joint acceleration limits [rad/s^2].
+        :param jerk_limit: Per-joint jerk limits [rad/s^3].
+        :param eps: Distance [rad] below which a joint is considered not to move.
+        """
+        self.start = np.array(start, dtype="float64")
+        self.goal = np.array(goal, dtype="float64")
+        self.delta = self.goal - self.start
+        distance = np.abs(self.delta)
+        moving = distance > eps
+        if not moving.any():
+            self.duration = 0.0
+            self._t0 = np.zeros(1)
+            self._segments = np.array([[1.0, 0.0, 0.0, 0.0]])
+            return
+
+        V, A, J = (
+            float(np.min(np.asarray(lim, dtype="float64")[moving] / distance[moving]))
+            for lim in (vel_limit, acc_limit, jerk_limit)
+        )
+        # Durations of the jerk (tj), constant acceleration (ta), and constant velocity (tv) segments for peak velocity v.
+        v = V
+        if v * (A / J + v / A if v * J >= A * A else 2 * np.sqrt(v / J)) > 1.0:
+            # The peak velocity is not reached within a unit distance.
+            v = A * (np.sqrt((A / J) ** 2 + 4 / A) - A / J) / 2
+            if v * J < A * A:
+                v = (J / 4) ** (1 / 3)
+        if v * J >= A * A:
+            tj, ta = A / J, v / A - A / J
+        else:
+            tj, ta = np.sqrt(v / J), 0.0
+        tv = max(1.0 / v - (2 * tj + ta), 0.0)
+
+        jerks = [J, 0.0, -J, 0.0, -J, 0.0, J]
+        durations = [tj, ta, tj, tv, tj, ta, tj]
+        # State (s, ds, dds) and jerk at the start of each segment.
+        segments, t0, state = [], [], np.zeros(3)
+        time = 0.0
+        for jerk, dt in zip(jerks, durations):
+            segments.append([*state, jerk])
+            t0.append(time)
+            state = self._integrate(*state, jerk, dt)
+            time += dt
+        self.duration = time
+        self._t0 = np.array(t0)
+        self._segments = np.array(segments)
+
+    @staticmethod
+    def _integrate(s, ds, dds, jerk, dt) -> np.ndarray:
+        return np.array(
+            [
+                s + ds * dt + dds * dt**2 / 2 + jerk * dt**3 / 6,
+                ds + dds * dt + jerk * dt**2 / 2,
+                dds + jerk * dt,
+            ]
+        )
+
+    def path(self, t: float) -> Tuple[float, float]:
+        """The path parameter s and its derivative ds/dt at time t [s] since the start."""
+        if t >= self.duration:
+            return 1.0, 0.0
+        t = max(t, 0.0)
+        i = int(np.searchsorted(self._t0, t, side="right")) - 1
+        s, ds, dds, jerk = self._segments[i]
+        dt = t - self._t0[i]
+        return s + ds * dt + dds * dt**2 / 2 + jerk * dt**3 / 6, ds + dds * dt + jerk * dt**2 / 2
+
+    def retarget(self, goal: np.ndarray, t: float) -> bool:
+        """Moves the goal, but keeps the timing of the trajectory and the joint positions at time t [s] since the start.
+
+        The remaining motion is stretched along the line to the new goal, and the limits are not recomputed, so this is
+        only meant for small changes of the goal.
+
+        :param goal: New joint positions at the goal.
+        :param t: Time since the start [s].
+        :return: Whether the trajectory was retargeted, which fails if it has (nearly) finished at time t.
+        """
+        s = self.path(t)[0]
+        if 1.0 - s < 1e-6:
+            return False
+        position = self.start + s * self.delta
+        self.goal = np.array(goal, dtype="float64")
+        self.delta = (self.goal - position) / (1.0 - s)
+        self.start = position - s * self.delta
+        return True
+
+    def sample(self, t: float, out: np.ndarray = None) -> np.ndarray:
+        """The joint positions at time t [s] since the start (the goal after :attr:`duration`).
+
+        :param t: Time since the start [s].
+        :param out: Optional array to write the positions to.
+        :return: The joint positions.
+        """
+        s = self.path(t)[0]
+        if out is None:
+            return self.start + s * self.delta
+        np.multiply(self.delta, s, out=out, casting="unsafe")
+        out += self.start
+        return out
+
+
+class WaypointTrajectory:
+    """Sequence of :class:`JointTrajectory` segments through a list of waypoints (e.g. a path planned with
+    :meth:`~eagerx_franka.planning.roadmap.Roadmap.plan`).
+
+    The arm comes to rest at every waypoint, so every segment is a straight line in joint space and the path is
+    followed exactly.
+    """
+
+    def __init__(self, waypoints: np.ndarray, vel_limit: np.ndarray, acc_limit: np.ndarray, jerk_limit: np.ndarray):
+        """
+        :param waypoints: Joint positions of the waypoints (K x n), including the start and the goal.
+        :param vel_limit: Per-joint velocity limits [rad/s].
+        :param acc_limit: Per-joint acceleration limits [rad/s^2].
+        :param jerk_limit: Per-joint jerk limits [rad/s^3].
+        """
+        self.segments = [
+            JointTrajectory(start, goal, vel_limit, acc_limit, jerk_limit)
+            for start, goal in zip(waypoints[:-1], waypoints[1:])
+        ]
+        self._t0 = np.cumsum([0.0] + [segment.duration for segment in self.segments])
+        self.duration = float(self._t0[-1])
+
+    def retarget(self, goal: np.ndarray, t: float) -> bool:
+        """Moves the goal of the last segment (see :meth:`JointTrajectory.retarget`).
+
+        :param goal: New joint positions at the goal.
+        :param t: Time since the start [s].
+        :return: Whether the trajectory was retargeted, which fails if it has (nearly) finished at time t.
+        """
+        return self.segments[-1].retarget(goal, t - self._t0[-2])
+
+    def sample(self, t: float, out: np.ndarray = None) -> np.ndarray:
+        """The joint positions at time t [s] since the start (the goal after :attr:`duration`).
+
+        :param t: Time since the start [s].
+        :param out: Optional array to write the positions to.
+        :return: The joint positions.
+        """
+        i = min(max(int(np.searchsorted(self._t0, t, side="right")) - 1, 0), len(self.segments) - 1)
+        return self.segments[i].sample(t - self._t0[i], out=out)
@@ -0,0 +1,235 @@
+import math
+import typing as t
+import numpy as np
+
+# Kinematic parameters of the Panda (identical for the FR3).
+D1, D3, D5, D7 = 0.333, 0.316, 0.384, 0.107
+A4, A7 = 0.0825, 0.088
+LL24, LL46 = A4**2 + D3**2, A4**2 + D5**2
+L24, L46 = math.sqrt(LL24), math.sqrt(LL46)
+THETA_H46 = math.atan(D5 / A4)
+THETA_342 = math.atan(D3 / A4)
+THETA_46H = math.atan(A4 / D5)
+
+# Home configuration of the flange (link8), i.e. `M` in eagerx_franka.franka_arm.mr_descriptions.
+FLANGE_HOME = np.array([[1.0, 0.0, 0.0, A7], [0.0, -1.0, 0.0, 0.0], [0.0, 0.0, -1.0, D1 + D3 + D5 - D7], [0.0, 0.0, 0.0, 1.0]])
+
+
+def _transinv(T: np.ndarray) -> np.ndarray:
+    Tinv = np.eye(4)
+    Tinv[:3, :3] = T[:3, :3].T
+    Tinv[:3, 3] = -T[:3, :3].T @ T[:3, 3]
+    return Tinv
+
+
+# The solver works on 3-vectors (tuples) and 3 x 3 matrices (tuples of columns) with scalar math, because the overhead
+# of NumPy dominates for arrays this small.
+def _add(a, b, s=1.0):
+    return a[0] + s * b[0], a[1] + s * b[1], a[2] + s * b[2]
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross(a, b):
+    return a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]
+
+
+def _unit(a):
+    n = math.sqrt(_dot(a, a))
+    return a[0] / n, a[1] / n, a[2] / n
+
+
+def _mul(R, a):
+    """R @ a, for R given by its columns."""
+    return _add(_add(_add((0.0, 0.0, 0.0), R[0], a[0]), R[1], a[1]), R[2], a[2])
+
+
+def _tmul(R, a):
+    """R.T @ a, for R given by its columns."""
+    return _dot(R[0], a), _dot(R[1], a), _dot(R[2], a)
+
+
+class AnalyticalSolver:
+    """Closed-form inverse kinematics of the Panda and FR3, parameterized by the redundancy angle q7.
+
+    Implements the geometric solution of He & Liu, "Analytical Inverse Kinematics for Franka Emika Panda - a Geometrical
+    Solver for 7-DOF Manipulators with Unconventional Design" (ICCAR 2021). For a given q7, every elbow configuration
+    comes with two solutions for q6, which each come with two solutions for (q1, q2). Solutions that violate the joint
+    limits are discarded, and :meth:`solve` returns the one that is closest to the seed.
+
+    The paper only considers the elbow configuration in which the interior angle at joint 4 is below pi. The other one
+    is reachable with q4 close to its upper limit (nearly stretched arm). It is solved with the same construction for
+    the mirrored elbow, and its solutions are verified with the forward kinematics.
+
+    The solver has the same interface as :class:`~eagerx_franka.ik.dls.DLSSolver`.
+    """
+
+    def __init__(
+        self,
+        lower: t.List[float],
+        upper: t.List[float],
+        M: t.Optional[t.Union[np.ndarray, t.List[t.List[float]]]] = None,
+        tol: float = 1e-6,
+    ):
+        """
+        :param lower: Lower joint limits.
+        :param upper: Upper joint limits.
+        :param M: The home configuration of the end-effector (4 x 4) (e.g. of the grasp target). Defaults to the flange
+                  (see :data:`FLANGE_HOME`). The end-effector must be rigidly attached to the flange.
+        :param tol: Tolerance of the forward kinematics check of the mirrored elbow configuration.
+        """
+        from eagerx_franka.franka_arm.mr_descriptions import panda
+        from eagerx_franka.ik.dls import DLSSolver
+
+        self.lower = np.array(lower, dtype="float64")
+        self.upper = np.array(upper, dtype="float64")
+        self._limits = list(zip(self.lower.tolist(), self.upper.tolist()))
+        self.M = FLANGE_HOME if M is None else np.array(M, dtype="float64")
+        # Transformation from the end-effector to the flange.
+        self.ee_to_flange = _transinv(_transinv(FLANGE_HOME) @ self.M)
+        self.tol = tol
+        self._fk = DLSSolver(panda.Slist, self.M).fk
+
+    def solve_all(self, T: np.ndarray, q7: float, q1_singular: float = 0.0) -> np.ndarray:
+        """Computes all solutions for a given q7.
+
+        :param T: The desired end-effector configuration (4 x 4), in the base frame of the arm.
+        :param q7: Redundancy angle.
+        :param q1_singular: The value of q1 if it is undetermined (i.e. the wrist center is above joint 2).
+        :return: The solutions (8 x 7), four per elbow configuration. Solutions that do not exist or violate the joint
+                 limits are NaN.
+        """
+        q = np.full((8, 7), np.nan)
+        if not self._limits[6][0] < q7 < self._limits[6][1]:
+            return q
+
+        # Position of the wrist (joint 6) from the flange pose.
+        T = np.asarray(T, dtype="float64")
+        x_ee, y_ee, z_ee, p_ee = [tuple(c) for c in (T @ self.ee_to_flange)[:3].T.tolist()]
+        x_6 = _unit(_mul((x_ee, y_ee, z_ee), (math.cos(q7), -math.sin(q7), 0.0)))
+        p_6 = _add(_add(p_ee, z_ee, -D7), x_6, -A7)
+        z_6 = _unit(_cross(z_ee, x_6))
+        R_6 = (x_6, _unit(_cross(z_6, x_6)), z_6)
+
+        # Angles of the triangle of joints 2, 4, and 6.
+        V26 = (p_6[0], p_6[1], p_6[2] - D1)
+        LL26 = _dot(V26, V26)
+        L26 = math.sqrt(LL26)
+        if L24 + L46 < L26 or L24 + L26 < L46 or L26 + L46 < L24:
+            return q
+        theta246 = math.acos(min(max((LL24 + LL46 - LL26) / 2.0 / L24 / L46, -1.0), 1.0))
+        theta462 = math.acos(min(max((LL26 + LL46 - LL24) / 2.0 / L26 / L46, -1.0), 1.0))
+
+        for elbow, (theta246, theta462) in enumerate([(theta246, theta462), (2.0 * math.pi - theta246, -theta462)]):
+            q4 = theta246 + THETA_H46 + THETA_342 - 2.0 * math.pi
+            if not self._limits[3][0] < q4 < self._limits[3][1]:
+                continue
+            rows = q[4 * elbow : 4 * elbow + 4]
+            self._solve_elbow(rows, R_6, p_6, V26, L26, theta246, theta462, q1_singular)
+            rows[:, 3], rows[:, 6] = q4, q7
+            if elbow == 1:
+                for row in rows:
+                    if not np.isnan(row[0]) and np.abs(self._fk(row)[:3] - T[:3]).max() > self.tol:
+                        row[:] = np.nan
+        return q
+
+    def _solve_elbow(self, rows, R_6, p_6, V26, L26, theta246, theta462, q1_singular):
+        """Solves q1, q2, q3, q5, and q6 of one elbow configuration, in-place in `rows` (4 x 7)."""
+        lim = self._limits
+
+        # Two solutions for q6
+        theta26H = THETA_46H + theta462
+        D26 = -L26 * math.cos(theta26H)
+        V_6_62 = _tmul(R_6, V26)
+        Phi6 = math.atan2(-V_6_62[1], -V_6_62[0])
+        sinTheta6 = D26 / math.hypot(V_6_62[0], V_6_62[1])
+        if abs(sinTheta6) > 1.0:
+            # Joint 2 is too close to the axis of joint 6 for this q7.
+            return
+        Theta6 = math.asin(sinTheta6)
+
+        # Two solutions for (q1, q2) per q6
+        thetaP26 = 1.5 * math.pi - theta462 - theta246 - THETA_342
+        thetaP = math.pi - thetaP26 - theta26H
+        LP6 = L26 * math.sin(thetaP26) / math.sin(thetaP)
+        for i, q6 in enumerate([math.pi - Theta6 - Phi6, Theta6 - Phi6]):
+            if q6 <= lim[5][0]:
+                q6 += 2.0 * math.pi
+            elif q6 >= lim[5][1]:
+                q6 -= 2.0 * math.pi
+            if not lim[5][0] < q6 < lim[5][1]:
+                continue
+            s6, c6 = math.sin(q6), math.cos(q6)
+            z_5 = _mul(R_6, (s6, c6, 0.0))
+            V2P = _add(V26, z_5, -LP6)
+            L2P = math.sqrt(_dot(V2P, V2P))
+            if math.hypot(V2P[0], V2P[1]) < 1e-9 * L2P:
+                q12 = [(q1_singular, 0.0)]
+            else:
+                q1, q2 = math.atan2(V2P[1], V2P[0]), math.acos(V2P[2] / L2P)
+                q12 = [(q1, q2), (q1 + math.pi if q1 < 0 else q1 - math.pi, -q2)]
+
+            # q5 from the position of the elbow in frame 5
+            z_3 = _unit(V2P)
+            x_3 = _cross(_unit(_cross(V2P, V26)), z_3)
+            R_5 = (_mul(R_6, (c6, -s6, 0.0)), _mul(R_6, (0.0, 0.0, -1.0)), z_5)
+            VH4 = _add(_add(_add((0.0, 0.0, D1), z_3, D3), x_3, A4), _add(p_6, z_5, -D5), -1.0)
+            V_5_H4 = _tmul(R_5, VH4)
+            q5 = -math.atan2(V_5_H4[1], V_5_H4[0])
+            if not lim[4][0] < q5 < lim[4][1]:
+                continue
+
+            for j, (q1, q2) in enumerate(q12):
+                if not (lim[0][0] < q1 < lim[0][1] and lim[1][0] < q2 < lim[1][1]):
+                    continue
+                # q3 from the x-axis of frame 3, expressed in frame 2
+                c1, s1, c2, s2 = math.cos(q1), math.sin(q1), math.cos(q2), math.sin(q2)
+                R_2 = ((c1 * c2, s1 * c2, -s2), (-c1 * s2, -s1 * s2, -c2), (-s1, c1, 0.0))
+                x_2_3 = _tmul(R_2, x_3)
+                q3 = math.atan2(x_2_3[2], x_2_3[0])
+                if lim[2][0] < q3 < lim[2][1]:
+                    rows[2 * i + j, [0, 1, 2, 4, 5]] = q1, q2, q3, q5, q6
+
+    def solve(self, T: np.ndarray, seed: np.ndarray, q7: t.Optional[float] = None) -> t.Tuple[np.ndarray, bool]:
+        """Computes the solution that is closest to the seed.
+
+        :param T: The desired end-effector configuration (4 x 4), in the base frame of the arm.
+        :param seed: The current joint positions. Its q7 is used if `q7` is not provided.
+        :param q7: Redundancy angle.
+        :return: The joint positions and whether a solution within the joint limits exists. If not, the seed is returned.
+        """
+        seed = np.asarray(seed, dtype="float64")
+        q = self.solve_all(T, seed[6] if q7 is None else q7, q1_singular=seed[0])
+        valid = ~np.isnan(q[:, 0])
+        if not valid.any():
+            return seed.copy(), False
+        q = q[valid]
+        return q[np.argmin(np.sum((q - seed) ** 2, axis=1))], True
+
+    def solve_near(
+        self, T: np.ndarray, seed: np.ndarray, max_offset: float = 0.5, resolution: float = 0.05
+    ) -> t.Tuple[np.ndarray, bool]:
+        """Same as :meth:`solve`, but if the pose cannot be reached with the q7 of the seed, q7 is swept around it.
+
+        The offsets grow in steps of `resolution`, and the solution closest to the seed of the first offset (in either
+        direction) with a solution is returned, so that q7 changes as little as possible.
+
+        :param T: The desired end-effector configuration (4 x 4), in the base frame of the arm.
+        :param seed: The current joint positions.
+        :param max_offset: Maximum change of q7 [rad].
+        :param resolution: Step between the swept values of q7 [rad].
+        :return: The joint positions and whether a solution within the joint limits was found. If not, the seed is
+                 returned.
+        """
+        q, success = self.solve(T, seed)
+        if success:
+            return q, success
+        seed = np.asarray(seed, dtype="float64")
+        for offset in np.arange(1, int(round(max_offset / resolution)) + 1) * resolution:
+            q = np.concatenate([self.solve_all(T, seed[6] + sign * offset, q1_singular=seed[0]) for sign in (-1, 1)])
+            q = q[~np.isnan(q[:, 0])]
+            if len(q):
+                return q[np.argmin(np.sum((q - seed) ** 2, axis=1))], True
+        return seed.copy(), False
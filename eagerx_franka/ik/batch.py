@@ -0,0 +1,190 @@
+import typing as t
+from dataclasses import dataclass
+import numpy as np
+from eagerx_franka.ik.dls import DLSSolver
+from eagerx_franka.ik.kinematics import _cross
+
+
+@dataclass
+class BatchIKResult:
+    """Solutions of :func:`solve_batch`, ordered like the target poses."""
+
+    joints: np.ndarray  # (N, 7) joint positions, within the joint limits.
+    success: np.ndarray  # (N,) whether the joint positions achieve the target within the tolerances.
+    residual: np.ndarray  # (N, 2) norm of the orientation [rad] and linear [m] error (space twist), as in `IKinSpace`.
+
+
+def load_joint_limits(robot_type: str, joint_limits: str = None) -> t.Tuple[np.ndarray, np.ndarray]:
+    """Lower and upper joint limits of the arm, from its joint limits file (see :func:`eagerx_franka.utils.get_joint_limits`)."""
+    from eagerx_franka.utils import get_joint_limits
+
+    limits = get_joint_limits(robot_type, joint_limits).values()
+    return np.array([j["limit"]["lower"] for j in limits]), np.array([j["limit"]["upper"] for j in limits])
+
+
+def poses_to_matrices(poses: np.ndarray) -> np.ndarray:
+    """Converts (N, 7) poses [x, y, z, qx, qy, qz, qw] to (N, 4, 4) transformation matrices."""
+    poses = np.asarray(poses, dtype="float64")
+    x, y, z, w = (poses[:, 3:] / np.linalg.norm(poses[:, 3:], axis=1, keepdims=True)).T
+    T = np.zeros((len(poses), 4, 4))
+    T[:, 0, 0], T[:, 0, 1], T[:, 0, 2] = 1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)
+    T[:, 1, 0], T[:, 1, 1], T[:, 1, 2] = 2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)
+    T[:, 2, 0], T[:, 2, 1], T[:, 2, 2] = 2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)
+    T[:, :3, 3], T[:, 3, 3] = poses[:, :3], 1.0
+    return T
+
+
+def _log6(R: np.ndarray, p: np.ndarray) -> np.ndarray:
+    """Batched version of :func:`eagerx_franka.ik.dls._log6`, for (N, 3, 3) rotations and (N, 3) positions."""
+    acosinput = 0.5 * (np.trace(R, axis1=1, axis2=2) - 1.0)
+    theta = np.arccos(np.clip(acosinput, -1.0, 1.0))
+    zero, pi = acosinput >= 1.0, acosinput <= -1.0
+    w = np.stack([R[:, 2, 1] - R[:, 1, 2], R[:, 0, 2] - R[:, 2, 0], R[:, 1, 0] - R[:, 0, 1]], axis=1)
+    w *= (theta / np.where(zero | pi, 1.0, 2.0 * np.sin(theta)))[:, None]
+    w[zero] = 0.0
+    if pi.any():
+        # Rotation of pi around an axis that is recovered from the diagonal.
+        for i in np.flatnonzero(pi):
+            r = R[i]
+            j = 2 if abs(1.0 + r[2, 2]) > 1e-6 else 1 if abs(1.0 + r[1, 1]) > 1e-6 else 0
+            w[i] = np.pi / np.sqrt(2.0 * (1.0 + r[j, j])) * (r[:, j] + np.eye(3)[j])
+    # v = G^-1(theta) p, with G^-1 = I - [w] / 2 + k [w]^2
+    theta = np.where(zero, 1.0, theta)
+    k = (1.0 / theta - 0.5 / np.tan(0.5 * theta)) / theta
+    q = _cross(w, p)
+    return np.concatenate([w, p - 0.5 * q + k[:, None] * _cross(w, q)], axis=1)
+
+
+class BatchDLSSolver(DLSSolver):
+    """Vectorized version of :class:`~eagerx_franka.ik.dls.DLSSolver` that solves a batch of target poses at once.
+
+    Every iteration updates all targets that did not converge yet with a single batched evaluation of the forward
+    kinematics, space Jacobian, and damped least-squares step.
+    """
+
+    def fk_jacobian_batch(self, theta: np.ndarray) -> t.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Forward kinematics and space Jacobian of a batch of joint positions.
+
+        :param theta: Joint positions (N x n).
+        :return: Rotations (N x 3 x 3) and positions (N x 3) of the end-effector, and the space Jacobians (N x 6 x n).
+        """
+        result = self.kinematics.forward(theta, jacobians=True)
+        return result.T[:, :3, :3], result.T[:, :3, 3], result.Js
+
+    def _twist_batch(self, Rsb, psb, Rsd, psd) -> np.ndarray:
+        RsbT = Rsb.transpose(0, 2, 1)
+        Vb = _log6(RsbT @ Rsd, np.einsum("nij,nj->ni", RsbT, psd - psb))
+        omg_s = np.einsum("nij,nj->ni", Rsb, Vb[:, :3])
+        return np.concatenate([omg_s, np.einsum("nij,nj->ni", Rsb, Vb[:, 3:]) + _cross(psb, omg_s)], axis=1)
+
+    def _step_batch(self, J: np.ndarray, Vs: np.ndarray) -> np.ndarray:
+        x = np.linalg.solve(J @ J.transpose(0, 2, 1) + self.damping2, Vs[:, :, None])
+        return np.einsum("nij,ni->nj", J, x[:, :, 0])
+
+    def solve_batch(self, T: np.ndarray, seeds: np.ndarray) -> t.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Computes joint positions that achieve a batch of end-effector configurations.
+
+        :param T: The desired end-effector configurations (N x 4 x 4).
+        :param seeds: Initial guesses of the joint positions (N x n).
+        :return: The joint positions (N x n), whether they achieve `T` within the tolerances (N,), and the final error
+                 (space twist) (N x 6).
+        """
+        T = np.asarray(T, dtype="float64")
+        theta = np.array(seeds, dtype="float64")
+        if self.lower is not None:
+            np.clip(theta, self.lower, self.upper, out=theta)
+        success, residual = np.zeros(len(theta), dtype="bool"), np.zeros((len(theta), 6))
+
+        active = np.arange(len(theta))
+        for i in range(self.max_iter + 1):
+            Rsb, psb, J = self.fk_jacobian_batch(theta[active])
+            Vs = self._twist_batch(Rsb, psb, T[active, :3, :3], T[active, :3, 3])
+            residual[active] = Vs
+            done = (np.sum(Vs[:, :3] ** 2, axis=1) <= self.eomg**2) & (np.sum(Vs[:, 3:] ** 2, axis=1) <= self.ev**2)
+            success[active[done]] = True
+            active, J, Vs = active[~done], J[~done], Vs[~done]
+            if i == self.max_iter or not len(active):
+                break
+
+            dtheta = self._step_batch(J, Vs)
+            if self.lower is None:
+                theta[active] += dtheta
+                continue
+            # Joints at a limit that would be pushed beyond it are locked, and the others compensate for them.
+            current = theta[active]
+            locked = ((current <= self.lower) & (dtheta < 0)) | ((current >= self.upper) & (dtheta > 0))
+            rows = locked.any(axis=1)
+            if rows.any():
+                J = J[rows] * ~locked[rows, None, :]
+                dtheta[rows] = self._step_batch(J, Vs[rows])
+            theta[active] = np.clip(current + dtheta, self.lower, self.upper)
+        return theta, success, residual
+
+
+def _solve_chunk(args) -> t.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    (Slist, M, lower, upper, kwargs), T, seeds = args
+    return BatchDLSSolver(Slist, M, lower, upper, **kwargs).solve_batch(T, seeds)
+
+
+def solve_batch(
+    poses: np.ndarray,
+    seeds: t.Optional[np.ndarray] = None,
+    robot_type: str = "panda",
+    joint_limits: t.Union[str, t.Tuple[np.ndarray, np.ndarray]] = None,
+    eomg: float = 0.001,
+    ev: float = 0.001,
+    damping: float = 0.01,
+    max_iter: int = 50,
+    processes: int = 0,
+    chunk_size: int = 2048,
+    M: t.Optional[np.ndarray] = None,
+) -> BatchIKResult:
+    """Inverse kinematics of a batch of end-effector poses (of the flange, link8, by default) in the base frame of the arm.
+
+    The robot is described by its screw axes in :mod:`eagerx_franka.franka_arm.mr_descriptions`, and the solutions are
+    computed with :class:`BatchDLSSolver`.
+
+    :param poses: Target poses, either as (N x 7) [x, y, z, qx, qy, qz, qw] or as (N x 4 x 4) transformation matrices.
+    :param seeds: Initial guesses of the joint positions (N x 7), or one guess for all targets (7,). Defaults to the
+                  middle of the joint limits.
+    :param robot_type: Robot type (e.g. `panda` or `fr3`).
+    :param joint_limits: Path to a joint limits file, or the (lower, upper) joint limits. Defaults to the file in the
+                         assets of `robot_type`.
+    :param eomg: Tolerance on the norm of the orientation error (space twist).
+    :param ev: Tolerance on the norm of the linear error (space twist).
+    :param damping: Damping factor of the least-squares update.
+    :param max_iter: Maximum number of iterations.
+    :param processes: Number of worker processes over which the batch is split in chunks of `chunk_size`. The batch is
+                      solved in the calling process if 0.
+    :param chunk_size: Number of targets per worker task.
+    :param M: Home configuration of the end-effector, if it is another frame than the flange (e.g. the grasp target).
+    :return: The solutions.
+    """
+    import eagerx_franka.franka_arm.mr_descriptions as mrd
+
+    des = getattr(mrd, robot_type)
+    if joint_limits is None or isinstance(joint_limits, str):
+        lower, upper = load_joint_limits(robot_type, joint_limits)
+    else:
+        lower, upper = (np.asarray(x, dtype="float64") for x in joint_limits)
+    poses = np.asarray(poses, dtype="float64")
+    T = poses if poses.ndim == 3 else poses_to_matrices(poses)
+    seeds = (lower + upper) / 2 if seeds is None else np.asarray(seeds, dtype="float64")
+    seeds = np.broadcast_to(seeds, (len(T), len(lower)))
+
+    M = des.M if M is None else np.asarray(M, dtype="float64")
+    config = (des.Slist, M, lower, upper, dict(eomg=eomg, ev=ev, damping=damping, max_iter=max_iter))
+    chunks = [(config, T[i : i + chunk_size], seeds[i : i + chunk_size]) for i in range(0, len(T), chunk_size)]
+    if processes > 0 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(processes, len(chunks))) as pool:
+            results = list(pool.map(_solve_chunk, chunks))
+    else:
+        results = [_solve_chunk(chunk) for chunk in chunks]
+
+    if not results:
+        return BatchIKResult(joints=np.zeros((0, len(lower))), success=np.zeros(0, dtype="bool"), residual=np.zeros((0, 2)))
+    joints, success, twist = [np.concatenate(r) for r in zip(*results)]
+    residual = np.stack([np.linalg.norm(twist[:, :3], axis=1), np.linalg.norm(twist[:, 3:], axis=1)], axis=1)
+    return BatchIKResult(joints=joints, success=success, residual=residual)
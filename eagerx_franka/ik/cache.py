@@ -0,0 +1,116 @@
+import math
+import typing as t
+from collections import OrderedDict
+import numpy as np
+
+# Caches shared by all engine nodes within a process, so that they persist across resets (and environments).
+_CACHES: t.Dict[str, t.Tuple[t.Dict, "IKCache"]] = {}
+
+
+class IKCache:
+    """LRU cache of inverse kinematics solutions, keyed by the quantized end-effector pose.
+
+    A pose [x, y, z, qx, qy, qz, qw] is quantized with `pos_resolution` [m] and `orn_resolution` (per quaternion
+    component, with the sign of the quaternion fixed by its largest component). A cached solution is only returned if it lies on the
+    branch of the current configuration, i.e. if no joint is more than `branch_tolerance` [rad] away from it, so
+    that a hit never makes the arm swing to another configuration. On a miss, the solution of a nearby pose (in the same
+    cell at `warm_start_factor` times the resolution) is returned as a warm start for the solver, if it lies on the
+    branch.
+    """
+
+    def __init__(
+        self,
+        size: int = 1024,
+        pos_resolution: float = 0.001,
+        orn_resolution: float = 0.01,
+        branch_tolerance: float = 0.5 * math.pi,
+        warm_start_factor: int = 10,
+    ):
+        """
+        :param size: Maximum number of cached solutions.
+        :param pos_resolution: Position resolution of the keys [m].
+        :param orn_resolution: Resolution of the quaternion components of the keys.
+        :param branch_tolerance: Maximum distance of a cached solution to the current configuration, per joint [rad].
+                                 Other branches of the same pose typically differ by more (e.g. by pi in q1).
+        :param warm_start_factor: Resolution of the warm start lookup, relative to the resolution of the keys.
+        """
+        self.size = size
+        self.branch_tolerance = branch_tolerance
+        self.warm_start_factor = warm_start_factor
+        self._scale = np.array(3 * [1 / pos_resolution] + 4 * [1 / orn_resolution])
+        self._solutions: t.OrderedDict[t.Tuple[int, ...], np.ndarray] = OrderedDict()
+        self._nearby: t.Dict[t.Tuple[int, ...], t.Tuple[int, ...]] = dict()
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0
+
+    @classmethod
+    def get(cls, name: str, **kwargs) -> "IKCache":
+        """Get the cache with `name` in this process, or create it.
+
+        :param name: Cache name (e.g. the name of the engine node).
+        :param kwargs: Arguments of the constructor. A new cache is created if they differ from those of the existing one.
+        :return: The cache.
+        """
+        if name not in _CACHES or _CACHES[name][0] != kwargs:
+            _CACHES[name] = (kwargs, cls(**kwargs))
+        return _CACHES[name][1]
+
+    def _keys(self, pose: np.ndarray) -> t.Tuple[t.Tuple[int, ...], t.Tuple[int, ...]]:
+        pose = np.array(pose, dtype="float64")
+        if pose[3 + np.argmax(np.abs(pose[3:]))] < 0:
+            pose[3:] *= -1
+        scaled = pose * self._scale
+        key = tuple(np.rint(scaled).astype("int64").tolist())
+        return key, tuple(np.rint(scaled / self.warm_start_factor).astype("int64").tolist())
+
+    def _on_branch(self, solution: np.ndarray, current: np.ndarray) -> bool:
+        return np.abs(solution - current).max() <= self.branch_tolerance
+
+    def lookup(
+        self, pose: np.ndarray, current: np.ndarray, warm_start: bool = True
+    ) -> t.Tuple[t.Optional[np.ndarray], t.Optional[np.ndarray]]:
+        """Looks up the solution of a pose.
+
+        :param pose: End-effector pose [x, y, z, qx, qy, qz, qw].
+        :param current: Current joint positions.
+        :param warm_start: Whether to look up a warm start on a miss (i.e. whether the solver can start from one).
+        :return: The cached solution (on a hit), and otherwise a warm start for the solver (if available).
+        """
+        key, nearby = self._keys(pose)
+        solution = self._solutions.get(key)
+        if solution is not None and self._on_branch(solution, current):
+            self._solutions.move_to_end(key)
+            self.hits += 1
+            return solution, None
+        self.misses += 1
+        if not warm_start:
+            return None, None
+        solution = self._solutions.get(self._nearby.get(nearby))
+        if solution is not None and self._on_branch(solution, current):
+            self.warm_starts += 1
+            return None, solution
+        return None, None
+
+    def store(self, pose: np.ndarray, solution: np.ndarray):
+        """Stores the solution of a pose, and evicts the least recently used one if the cache is full."""
+        key, nearby = self._keys(pose)
+        self._solutions[key] = np.array(solution, dtype="float64")
+        self._solutions.move_to_end(key)
+        self._nearby[nearby] = key
+        if len(self._solutions) > self.size:
+            self._solutions.popitem(last=False)
+            if len(self._nearby) > 2 * self.size:
+                # Drop the references to evicted solutions.
+                self._nearby = {k: v for k, v in self._nearby.items() if v in self._solutions}
+
+    def clear(self):
+        """Removes all solutions and resets the counters."""
+        self._solutions.clear()
+        self._nearby.clear()
+        self.hits = self.misses = self.warm_starts = 0
+
+    @property
+    def stats(self) -> t.Dict[str, int]:
+        """Number of hits, misses, and misses for which a warm start was available, and the number of cached solutions."""
+        return dict(hits=self.hits, misses=self.misses, warm_starts=self.warm_starts, size=len(self._solutions))
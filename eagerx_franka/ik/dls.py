@@ -0,0 +1,176 @@
+import math
+import time
+import typing as t
+import numpy as np
+from eagerx_franka.ik.kinematics import Kinematics, _cross
+
+
+def _log6(R: np.ndarray, p: np.ndarray) -> np.ndarray:
+    """Closed-form matrix logarithm of the transformation (R, p), as the twist (omega, v).
+
+    Equivalent to `se3ToVec(MatrixLog6(T))` of the modern robotics toolkit, but evaluated with scalar math.
+    """
+    (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = R.tolist()
+    p0, p1, p2 = p.tolist()
+    acosinput = 0.5 * (r00 + r11 + r22 - 1.0)
+    if acosinput >= 1.0:
+        return np.array([0.0, 0.0, 0.0, p0, p1, p2])
+    if acosinput <= -1.0:
+        # Rotation of pi around an axis that is recovered from the diagonal.
+        theta = math.pi
+        if abs(1.0 + r22) > 1e-6:
+            k = theta / math.sqrt(2.0 * (1.0 + r22))
+            w0, w1, w2 = k * r02, k * r12, k * (1.0 + r22)
+        elif abs(1.0 + r11) > 1e-6:
+            k = theta / math.sqrt(2.0 * (1.0 + r11))
+            w0, w1, w2 = k * r01, k * (1.0 + r11), k * r21
+        else:
+            k = theta / math.sqrt(2.0 * (1.0 + r00))
+            w0, w1, w2 = k * (1.0 + r00), k * r10, k * r20
+    else:
+        theta = math.acos(acosinput)
+        k = theta / (2.0 * math.sin(theta))
+        w0, w1, w2 = k * (r21 - r12), k * (r02 - r20), k * (r10 - r01)
+    # v = G^-1(theta) p, with G^-1 = I - [w] / 2 + k [w]^2
+    k = (1.0 / theta - 0.5 / math.tan(0.5 * theta)) / theta
+    q0, q1, q2 = w1 * p2 - w2 * p1, w2 * p0 - w0 * p2, w0 * p1 - w1 * p0
+    r0, r1, r2 = w1 * q2 - w2 * q1, w2 * q0 - w0 * q2, w0 * q1 - w1 * q0
+    return np.array([w0, w1, w2, p0 - 0.5 * q0 + k * r0, p1 - 0.5 * q1 + k * r1, p2 - 0.5 * q2 + k * r2])
+
+
+class DLSSolver:
+    """Damped least-squares inverse kinematics of a serial arm with revolute joints, described by its screw axes in the
+    space frame (see :mod:`eagerx_franka.franka_arm.mr_descriptions`).
+
+    A drop-in replacement for `IKinSpace` of the modern robotics toolkit, with the same error measure and tolerances,
+    but tailored to a fixed screw list:
+
+    - The forward kinematics and space Jacobian are computed in the same pass, with the kernel of
+      :class:`~eagerx_franka.ik.kinematics.Kinematics`. The matrix logarithm of the error is evaluated with scalar
+      math.
+    - The update is damped, which keeps the steps bounded near singularities, and the joints are clamped to their
+      limits after every step. Joints at a limit are excluded from the update if it pushes them beyond the limit.
+    - Without an explicit seed, the solver warm starts from its previous solution.
+    - With a `time_budget`, the iterations stop at the deadline, and the best iterate found so far is returned.
+    """
+
+    def __init__(
+        self,
+        Slist: t.Union[np.ndarray, t.List[t.List[float]]],
+        M: t.Union[np.ndarray, t.List[t.List[float]]],
+        lower: t.Optional[t.List[float]] = None,
+        upper: t.Optional[t.List[float]] = None,
+        eomg: float = 0.001,
+        ev: float = 0.001,
+        damping: float = 0.01,
+        max_iter: int = 20,
+        time_budget: t.Optional[float] = None,
+    ):
+        """
+        :param Slist: The joint screw axes in the space frame when the manipulator is at the home position (6 x n), with
+                      unit rotation axes.
+        :param M: The home configuration of the end-effector (4 x 4).
+        :param lower: Lower joint limits. The joints are not clamped if not provided.
+        :param upper: Upper joint limits. The joints are not clamped if not provided.
+        :param eomg: Tolerance on the norm of the orientation error (space twist).
+        :param ev: Tolerance on the norm of the linear error (space twist).
+        :param damping: Damping factor of the least-squares update.
+        :param max_iter: Maximum number of iterations.
+        :param time_budget: Maximum duration of a solve [s]. Without a budget, the last iterate is returned.
+        """
+        self.kinematics = Kinematics(Slist, M)
+        self.M = self.kinematics.M
+        self.n = self.kinematics.n
+        self.lower = None if lower is None else np.array(lower, dtype="float64")
+        self.upper = None if upper is None else np.array(upper, dtype="float64")
+        self.eomg = eomg
+        self.ev = ev
+        self.damping2 = damping**2 * np.eye(6)
+        self.max_iter = max_iter
+        self.time_budget = time_budget
+        self.theta = None
+        self.iterations = 0
+        self.residual = np.zeros(2)  # Norm of the orientation and linear error of the last solution.
+        self.timed_out = False  # Whether the last solve was stopped by the time budget.
+
+    def fk(self, theta: np.ndarray) -> np.ndarray:
+        """Forward kinematics.
+
+        :param theta: Joint positions (n,).
+        :return: The end-effector configuration (4 x 4).
+        """
+        R, p, _ = self.fk_jacobian(theta)
+        T = np.eye(4)
+        T[:3, :3], T[:3, 3] = R, p
+        return T
+
+    def fk_jacobian(self, theta: np.ndarray) -> t.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Forward kinematics and space Jacobian.
+
+        :param theta: Joint positions (n,).
+        :return: Rotation (3 x 3) and position (3,) of the end-effector, and the space Jacobian (6 x n).
+        """
+        P = self.kinematics._products(np.asarray(theta, dtype="float64")[None])
+        w, v = self.kinematics._space_jacobian(P)
+        T = P[0, self.n] @ self.M
+        return T[:3, :3], T[:3, 3], np.concatenate([w[0], v[0]], axis=1).T
+
+    def _twist(self, Rsb, psb, Rsd, psd) -> np.ndarray:
+        # Body twist from the current to the desired pose, expressed in the space frame.
+        Vb = _log6(Rsb.T @ Rsd, Rsb.T @ (psd - psb))
+        omg_s = Rsb @ Vb[:3]
+        return np.concatenate([omg_s, Rsb @ Vb[3:] + _cross(psb, omg_s)])
+
+    def solve(self, T: np.ndarray, seed: t.Optional[np.ndarray] = None) -> t.Tuple[np.ndarray, bool]:
+        """Computes joint positions that achieve the desired end-effector configuration.
+
+        :param T: The desired end-effector configuration Tsd (4 x 4).
+        :param seed: An initial guess of the joint positions. Defaults to the previous (successful) solution.
+        :return: The joint positions and whether they achieve `T` within the tolerances `eomg` and `ev`. With a time
+                 budget, the joint positions of an unsuccessful solve are those of the best iterate (at worst the seed).
+        """
+        if seed is None and self.theta is None:
+            raise ValueError("A seed is required for the first solve.")
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        theta = np.array(self.theta if seed is None else seed, dtype="float64")
+        if self.lower is not None:
+            np.clip(theta, self.lower, self.upper, out=theta)
+        T = np.asarray(T, dtype="float64")
+        Rsd, psd = T[:3, :3], T[:3, 3]
+
+        self.iterations = 0
+        self.timed_out = False
+        best, best_error = None, math.inf
+        while True:
+            Rsb, psb, J = self.fk_jacobian(theta)
+            Vs = self._twist(Rsb, psb, Rsd, psd)
+            e_omg, e_v = Vs[:3] @ Vs[:3], Vs[3:] @ Vs[3:]
+            success = e_omg <= self.eomg**2 and e_v <= self.ev**2
+            if success or deadline is None:
+                self.residual[:] = math.sqrt(e_omg), math.sqrt(e_v)
+            else:
+                # The error relative to the tolerances decides which iterate is the best.
+                error = e_omg / self.eomg**2 + e_v / self.ev**2
+                if error < best_error:
+                    best, best_error, self.residual[:] = theta.copy(), error, (math.sqrt(e_omg), math.sqrt(e_v))
+                self.timed_out = self.iterations < self.max_iter and time.perf_counter() >= deadline
+                if self.timed_out or self.iterations >= self.max_iter:
+                    theta = best
+                    break
+            if success or self.iterations >= self.max_iter:
+                break
+            dtheta = J.T @ np.linalg.solve(J @ J.T + self.damping2, Vs)
+            if self.lower is not None:
+                # Joints at a limit that would be pushed beyond it are locked, and the others compensate for them.
+                locked = ((theta <= self.lower) & (dtheta < 0)) | ((theta >= self.upper) & (dtheta > 0))
+                if locked.any():
+                    J[:, locked] = 0.0
+                    dtheta = J.T @ np.linalg.solve(J @ J.T + self.damping2, Vs)
+                theta += dtheta
+                np.clip(theta, self.lower, self.upper, out=theta)
+            else:
+                theta += dtheta
+            self.iterations += 1
+        if success:
+            self.theta = theta
+        return theta.copy(), bool(success)
@@ -0,0 +1,153 @@
+import typing as t
+from dataclasses import dataclass
+import numpy as np
+
+
+# Levi-Civita symbol
+_EPS = np.zeros((3, 3, 3))
+_EPS[0, 1, 2] = _EPS[1, 2, 0] = _EPS[2, 0, 1] = 1.0
+_EPS[0, 2, 1] = _EPS[2, 1, 0] = _EPS[1, 0, 2] = -1.0
+
+
+def _skew(v: np.ndarray) -> np.ndarray:
+    """Skew-symmetric matrices of a (..., 3) array of vectors."""
+    S = np.zeros(v.shape[:-1] + (3, 3), dtype=v.dtype)
+    S[..., 0, 1], S[..., 0, 2] = -v[..., 2], v[..., 1]
+    S[..., 1, 0], S[..., 1, 2] = v[..., 2], -v[..., 0]
+    S[..., 2, 0], S[..., 2, 1] = -v[..., 1], v[..., 0]
+    return S
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cross product of (..., 3) arrays (np.cross has a large overhead for small arrays)."""
+    return np.einsum("ijk,...j,...k->...i", _EPS, a, b)
+
+
+def _exp_basis(w: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Constant matrices of the exponentials of n screws (w, v), with unit rotation axes w (n x 3).
+
+    exp([S] theta) = I + sin(theta) Es + (1 - cos(theta)) Ec + theta Et (Rodrigues' formula), so the exponentials of
+    all screws follow from a single product of the coefficients [sin(theta), 1 - cos(theta), theta] with the
+    returned (n x 3 x 16) basis [Es, Ec, Et].
+    """
+    W = _skew(w)
+    W2 = W @ W
+    Wv, W2v = np.einsum("nij,nj->ni", W, v), np.einsum("nij,nj->ni", W2, v)
+    Es, Ec, Et = np.zeros((3, len(w), 4, 4))
+    Es[:, :3, :3], Es[:, :3, 3] = W, -W2v
+    Ec[:, :3, :3], Ec[:, :3, 3] = W2, Wv
+    Et[:, :3, 3] = v + W2v
+    return np.stack([Es, Ec, Et], axis=1).reshape(len(w), 3, 16)
+
+
+@dataclass
+class FKResult:
+    """Results of :meth:`Kinematics.forward`, with a leading batch dimension N (unless a single configuration was given)."""
+
+    T: np.ndarray  # (N, 4, 4) end-effector poses.
+    links: t.Optional[np.ndarray] = None  # (N, L, 4, 4) poses of the link frames, ordered like `Mlist`.
+    Js: t.Optional[np.ndarray] = None  # (N, 6, n) space Jacobians.
+    Jb: t.Optional[np.ndarray] = None  # (N, 6, n) body Jacobians (in the end-effector frame).
+
+
+class Kinematics:
+    """Vectorized forward kinematics and Jacobians of a serial arm with revolute joints, described by its screw axes in
+    the space frame (see :mod:`eagerx_franka.franka_arm.mr_descriptions`).
+
+    Everything that only depends on the screw list is computed once (see :func:`_exp_basis`), so
+    a batch of joint configurations is evaluated with one pass over the joints, without pybullet. The results are
+    equivalent to `FKinSpace`, `JacobianSpace`, and `JacobianBody` of the modern robotics toolkit.
+    """
+
+    def __init__(
+        self,
+        Slist: t.Union[np.ndarray, t.List[t.List[float]]],
+        M: t.Union[np.ndarray, t.List[t.List[float]]],
+        Mlist: t.Optional[t.Union[np.ndarray, t.List]] = None,
+    ):
+        """Precomputes the constant matrices of the screw list.
+
+        :param Slist: The joint screw axes in the space frame when the manipulator is at the home position (6 x n), with
+                      unit rotation axes.
+        :param M: The home configuration of the end-effector (4 x 4).
+        :param Mlist: Home configurations of the link frames (L x 4 x 4). Link i < n is moved by joints 1 to i + 1, and
+                      the links beyond the n-th by all joints.
+        """
+        S = np.array(Slist, dtype="float64")
+        self.M = np.array(M, dtype="float64")
+        self.n = S.shape[1]
+        self.w, self.v = S[:3].T.copy(), S[3:].T.copy()
+        self._E_basis = _exp_basis(self.w, self.v)
+        self._wv = np.stack([self.w, self.v], axis=-1)
+        self.Mlist = None if Mlist is None else np.array(Mlist, dtype="float64")
+        # Number of joints that move each link.
+        self._link_joints = None if Mlist is None else np.minimum(np.arange(1, len(self.Mlist) + 1), self.n)
+
+    @classmethod
+    def from_description(cls, robot_type: str = "panda", M: t.Optional[np.ndarray] = None) -> "Kinematics":
+        """Kinematics of a Franka arm in :mod:`eagerx_franka.franka_arm.mr_descriptions`.
+
+        :param robot_type: Robot type (e.g. `panda` or `fr3`).
+        :param M: The home configuration of the end-effector. Defaults to the flange (link8).
+        :return: The kinematics, with the frames of link1 to link8 as links.
+        """
+        import eagerx_franka.franka_arm.mr_descriptions as mrd
+
+        des = getattr(mrd, robot_type)
+        return cls(des.Slist, des.M if M is None else M, des.Mlist)
+
+    def forward(self, theta: np.ndarray, links: bool = False, jacobians: bool = False) -> FKResult:
+        """Forward kinematics, and optionally the link frames and Jacobians, of a batch of joint configurations.
+
+        :param theta: Joint positions (N x n), or a single configuration (n,).
+        :param links: Whether to compute the poses of the link frames (requires `Mlist`).
+        :param jacobians: Whether to compute the space and body Jacobians.
+        :return: The results, without the batch dimension for a single configuration.
+        """
+        theta = np.asarray(theta, dtype="float64")
+        single = theta.ndim == 1
+        P = self._products(np.atleast_2d(theta))
+        result = FKResult(T=P[:, self.n] @ self.M)
+
+        if links:
+            if self.Mlist is None:
+                raise ValueError("The link frames require `Mlist`.")
+            result.links = P[:, self._link_joints] @ self.Mlist
+        if jacobians:
+            w, v = self._space_jacobian(P)
+            result.Js = np.concatenate([w, v], axis=2).transpose(0, 2, 1)
+            # Jb = [Ad_Tsb^-1] Js, with [Ad_T^-1] (w, v) = (R^T w, R^T (v - p x w))
+            R, p = result.T[:, :3, :3], result.T[:, None, :3, 3]
+            Rt = R.transpose(0, 2, 1)[:, None]
+            wb = (Rt @ w[..., None])[..., 0]
+            vb = (Rt @ (v - _cross(p, w))[..., None])[..., 0]
+            result.Jb = np.concatenate([wb, vb], axis=2).transpose(0, 2, 1)
+
+        if single:
+            for key, value in vars(result).items():
+                if value is not None:
+                    setattr(result, key, value[0])
+        return result
+
+    def _products(self, theta: np.ndarray) -> np.ndarray:
+        """Products of the exponentials of the first i joints (i = 0, ..., n) of a batch of configurations (N x n), as an
+        (N x n + 1 x 4 x 4) array. This is the kernel of the forward kinematics of all solvers."""
+        coef = np.stack([np.sin(theta), 1.0 - np.cos(theta), theta], axis=-1)[:, :, None, :]
+        E = (coef @ self._E_basis).reshape(len(theta), self.n, 4, 4)
+        E += np.eye(4)
+        P = np.empty((len(theta), self.n + 1, 4, 4))
+        P[:, 0] = np.eye(4)
+        for i in range(self.n):
+            np.matmul(P[:, i], E[:, i], out=P[:, i + 1])
+        return P
+
+    def _space_jacobian(self, P: np.ndarray) -> t.Tuple[np.ndarray, np.ndarray]:
+        """The angular and linear parts (N x n x 3) of the columns of the space Jacobians, from :meth:`_products`."""
+        # The screw of joint i is transformed by the product of the exponentials of the joints before it.
+        Ps = P[:, : self.n]
+        wv = Ps[:, :, :3, :3] @ self._wv
+        return wv[..., 0], wv[..., 1] + _cross(Ps[:, :, :3, 3], wv[..., 0])
+
+    def fk(self, theta: np.ndarray) -> np.ndarray:
+        """End-effector poses (N x 4 x 4) of a batch of joint configurations (N x n), or the pose (4 x 4) of one (n,)."""
+        return self.forward(theta).T
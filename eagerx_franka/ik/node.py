@@ -8,8 +8,127 @@ from eagerx.utils.utils import Msg
 
 # import roboticstoolbox as rtb
 # from spatialmath import SE3
-from scipy.spatial.transform import Rotation as R
-import modern_robotics as mr
+
+
+class DownwardIK:
+    """Computes the target joint positions of :class:`EndEffectorDownward` from a delta position and yaw.
+
+    Shared by :class:`EndEffectorDownward` and its engine-resident variant
+    (:class:`~eagerx_franka.franka_arm.pybullet.enginenodes.EndEffectorDownwardControl`), which differ only in how the
+    current joint positions and end-effector pose are obtained.
+    """
+
+    def __init__(self, config, rate: float, Slist: np.ndarray = None, M: np.ndarray = None):
+        """
+        :param config: The config of the node (see :meth:`EndEffectorDownward.make`).
+        :param rate: Rate of the node.
+        :param Slist: The joint screw axes. Defaults to `config.Slist`.
+        :param M: The home configuration of the end-effector. Defaults to `config.M`.
+        """
+        self.rate = rate
+        self.Slist = np.array(config.Slist if Slist is None else Slist, dtype="float32")
+        self.M = np.array(config.M if M is None else M, dtype="float32")
+        self.max_dxyz = np.array(config.max_dxyz, dtype="float32")
+        self.max_dyaw = np.array(config.max_dyaw, dtype="float32")
+        self.eomg = config.eomg
+        self.ev = config.ev
+        self.min_z = config.min_z
+        self.selected = config.outputs
+        self.time_budget = config.time_budget
+        self.overruns = 0
+        if config.solver == "dls":
+            from eagerx_franka.ik.dls import DLSSolver
+
+            self.dls = DLSSolver(
+                self.Slist,
+                self.M,
+                config.lower,
+                config.upper,
+                eomg=self.eomg,
+                ev=self.ev,
+                max_iter=config.max_iter,
+                time_budget=self.time_budget,
+            )
+            self.solver = self.dls.solve
+        elif config.solver == "analytical":
+            from eagerx_franka.ik.analytical import AnalyticalSolver
+            from eagerx_franka.ik.dls import DLSSolver
+
+            self.analytical = AnalyticalSolver(config.lower, config.upper, self.M)
+            self.dls = DLSSolver(
+                self.Slist, self.M, config.lower, config.upper, eomg=self.eomg, ev=self.ev, max_iter=config.max_iter
+            )
+            self.solver = self._solve_analytical
+        elif config.solver == "mr":
+            import modern_robotics as mr
+
+            self.solver = lambda T, seed: mr.IKinSpace(self.Slist, self.M, T, seed, self.eomg, self.ev)
+        else:
+            raise ValueError(f"Solver `{config.solver}` not recognized.")
+
+    def _solve_analytical(self, T: np.ndarray, seed: np.ndarray) -> t.Tuple[np.ndarray, bool]:
+        # If the pose cannot be reached near the q7 of the seed, the dls solver starts from the seed.
+        theta, success = self.analytical.solve_near(T, seed)
+        if not success:
+            theta, success = self.dls.solve(T, seed)
+        return theta, success
+
+    @staticmethod
+    def check(solver: str, time_budget: t.Optional[float], outputs: t.List[str]):
+        """Raises a ValueError if the selected options are not supported by the solver."""
+        if solver != "dls" and (time_budget is not None or {"residual", "iterations", "overruns"} & set(outputs)):
+            raise ValueError("A time budget and the `residual`, `iterations`, and `overruns` outputs require the dls solver.")
+
+    def __call__(
+        self, dxyz: np.ndarray, dyaw: np.ndarray, xyz: np.ndarray, rot_ee2b: np.ndarray, current: np.ndarray
+    ) -> t.Dict[str, np.ndarray]:
+        """Computes the selected outputs.
+
+        :param dxyz: Desired delta position [m/s].
+        :param dyaw: Desired delta yaw [rad/s].
+        :param xyz: Current position of the end-effector.
+        :param rot_ee2b: Current orientation of the end-effector (3 x 3).
+        :param current: Current joint positions.
+        :return: The selected outputs.
+        """
+        # Limit dz
+        dz = dxyz[-1]
+        z = xyz[-1]
+        dxyz[-1] = max(dz, self.max_dxyz[-1] * (-1 + 1 / np.exp(max(0, 10 * (z - self.min_z)))))
+
+        # Calculate the target pose
+        yaw = np.arctan2(rot_ee2b[1, 0], rot_ee2b[0, 0])
+        yaw_target = (yaw + dyaw / self.rate) % (2 * np.pi)
+        yaw_target_cos = np.cos(yaw_target)
+        yaw_target_sin = np.sin(yaw_target)
+        rot_t2b = np.array([[yaw_target_cos, yaw_target_sin, 0], [yaw_target_sin, -yaw_target_cos, 0], [0, 0, -1]])
+
+        # 4x4 Transformation Matrix representing the transform from the
+        # /<robot_name>/base_link frame to the /<robot_name>/ee_gripper_link frame
+        T_sd = np.identity(4)
+        T_sd[:3, :3] = rot_t2b
+        T_sd[:3, 3] = xyz + dxyz / self.rate  # Scale delta position with rate
+
+        theta_list, success = self.solver(T_sd, current)
+        if self.time_budget is not None:
+            # The best iterate (at worst the current joint positions) is used if the solve did not converge in time.
+            self.overruns += self.dls.timed_out
+            success = True
+        if success:
+            target = np.array(theta_list, dtype="float32")
+            dtarget = (target - current) * self.rate  # [rad/sec]
+        else:
+            # self.backend.logwarn("no solution")
+            target = current
+            dtarget = current * 0
+        output = dict(target=target, dtarget=dtarget)
+        if "residual" in self.selected:
+            output["residual"] = self.dls.residual.astype("float32")
+        if "iterations" in self.selected:
+            output["iterations"] = np.array(self.dls.iterations, dtype="int64")
+        if "overruns" in self.selected:
+            output["overruns"] = np.array(self.overruns, dtype="int64")
+        return output
 
 
 class EndEffectorDownward(eagerx.Node):
@@ -27,6 +146,10 @@ class EndEffectorDownward(eagerx.Node):
         min_z: float = 0.03,
         eomg: float = 0.001,
         ev: float = 0.001,
+        solver: str = "dls",
+        time_budget: t.Optional[float] = None,
+        max_iter: int = 20,
+        outputs: t.List[str] = None,
         process: int = eagerx.NEW_PROCESS,
     ) -> NodeSpec:
         """
@@ -48,6 +171,23 @@ class EndEffectorDownward(eagerx.Node):
         :param ev: A small positive tolerance on the end-effector linear position
                    error. The returned joint angles must give an end-effector
                    position error less than ev. See modern robotics toolkit.
+        :param solver: Inverse kinematics solver:
+                       - dls: Damped least-squares solver that respects the joint limits (see
+                         :class:`~eagerx_franka.ik.dls.DLSSolver`).
+                       - analytical: Closed-form solution that is closest to the current joint positions (see
+                         :class:`~eagerx_franka.ik.analytical.AnalyticalSolver`). Only for the Panda and FR3, with an
+                         end-effector that is rigidly attached to the flange. If the pose cannot be reached with the
+                         current q7, q7 is swept around it (see :meth:`~eagerx_franka.ik.analytical.AnalyticalSolver.solve_near`),
+                         and if that fails, the dls solver starts from the current joint positions.
+                       - mr: `IKinSpace` of the modern robotics toolkit.
+        :param time_budget: Deadline of a solve [s] (e.g. 0.002), so that a slow solve cannot make the node miss its
+                            rate (dls only). When the deadline (or `max_iter`) is reached, the best iterate is used as
+                            the target, instead of the current joint positions. Such solves are counted as overruns.
+        :param max_iter: Maximum number of iterations of the dls solver.
+        :param outputs: Selected outputs: `target`, `dtarget`, `residual` (norm of the orientation [rad] and position
+                        [m] error of the target), `iterations` (of the solver), and `overruns` (number of solves that were
+                        stopped by the time budget since the node was initialized). The last three require the dls
+                        solver. By default, `target` and `dtarget` are selected.
         :param process: {0: NEW_PROCESS, 1: ENVIRONMENT, 2: ENGINE, 3: EXTERNAL}.
         :return: Parameter specification of the node.
         """
@@ -58,7 +198,8 @@ class EndEffectorDownward(eagerx.Node):
         spec.config.rate = rate
         spec.config.process = process
         spec.config.inputs = ["dxyz", "dyaw", "current", "xyz", "orn"]
-        spec.config.outputs = ["target", "dtarget"]
+        spec.config.outputs = outputs if outputs else ["target", "dtarget"]
+        DownwardIK.check(solver, time_budget, spec.config.outputs)
 
         # Modify custom node params
         spec.config.Slist = Slist
@@ -68,6 +209,11 @@ class EndEffectorDownward(eagerx.Node):
         spec.config.eomg = eomg
         spec.config.ev = ev
         spec.config.min_z = min_z
+        spec.config.solver = solver
+        spec.config.time_budget = time_budget
+        spec.config.max_iter = max_iter
+        spec.config.upper = upper
+        spec.config.lower = lower
 
         # Add converter & space
         spec.inputs.dxyz.space.update(low=[-i for i in max_dxyz], high=max_dxyz)
@@ -77,13 +223,7 @@ class EndEffectorDownward(eagerx.Node):
 
     def initialize(self, spec: NodeSpec):
         np.set_printoptions(precision=2, suppress=True)
-        self.Slist = np.array(spec.config.Slist, dtype="float32")
-        self.M = np.array(spec.config.M, dtype="float32")
-        self.max_dxyz = np.array(spec.config.max_dxyz, dtype="float32")
-        self.max_dyaw = np.array(spec.config.max_dyaw, dtype="float32")
-        self.eomg = spec.config.eomg
-        self.ev = spec.config.ev
-        self.min_z = spec.config.min_z
+        self.ik = DownwardIK(spec.config, self.rate)
 
     @register.states()
     def reset(self):
@@ -96,39 +236,15 @@ class EndEffectorDownward(eagerx.Node):
         dyaw=Space(shape=(), dtype="float32"),
         current=Space(dtype="float32"),
     )
-    @register.outputs(target=Space(dtype="float32"), dtarget=Space(dtype="float32"))
+    @register.outputs(
+        target=Space(dtype="float32"),
+        dtarget=Space(dtype="float32"),
+        residual=Space(low=0, high=np.inf, shape=(2,), dtype="float32"),
+        iterations=Space(low=0, high=np.iinfo("int64").max, shape=(), dtype="int64"),
+        overruns=Space(low=0, high=np.iinfo("int64").max, shape=(), dtype="int64"),
+    )
     def callback(self, t_n: float, dxyz: Msg, xyz: Msg, orn: Msg, dyaw: Msg, current: Msg):
-        dxyz = dxyz.msgs[-1]
-        xyz = xyz.msgs[-1]
-        orn = orn.msgs[-1]
-        dyaw = dyaw.msgs[-1]
-        current = current.msgs[-1]
+        from scipy.spatial.transform import Rotation as R
 
-        # Limit dz
-        dz = dxyz[-1]
-        z = xyz[-1]
-        dxyz[-1] = max(dz, self.max_dxyz[-1] * (-1 + 1 / np.exp(max(0, 10 * (z - self.min_z)))))
-
-        # Calculate the target pose
-        rot_ee2b = R.from_quat(orn).as_matrix()
-        yaw = np.arctan2(rot_ee2b[1, 0], rot_ee2b[0, 0])
-        yaw_target = (yaw + dyaw / self.rate) % (2 * np.pi)
-        yaw_target_cos = np.cos(yaw_target)
-        yaw_target_sin = np.sin(yaw_target)
-        rot_t2b = np.array([[yaw_target_cos, yaw_target_sin, 0], [yaw_target_sin, -yaw_target_cos, 0], [0, 0, -1]])
-
-        # 4x4 Transformation Matrix representing the transform from the
-        # /<robot_name>/base_link frame to the /<robot_name>/ee_gripper_link frame
-        T_sd = np.identity(4)
-        T_sd[:3, :3] = rot_t2b
-        T_sd[:3, 3] = xyz + dxyz / self.rate  # Scale delta position with rate
-
-        theta_list, success = mr.IKinSpace(self.Slist, self.M, T_sd, current, self.eomg, self.ev)
-        if success:
-            target = np.array(theta_list, dtype="float32")
-            dtarget = (target - current) * self.rate  # [rad/sec]
-        else:
-            # self.backend.logwarn("no solution")
-            target = current
-            dtarget = current * 0
-        return dict(target=target, dtarget=dtarget)
+        rot_ee2b = R.from_quat(orn.msgs[-1]).as_matrix()
+        return self.ik(dxyz.msgs[-1], dyaw.msgs[-1], xyz.msgs[-1], rot_ee2b, current.msgs[-1])
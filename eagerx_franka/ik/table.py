@@ -0,0 +1,160 @@
+import os
+import math
+import typing as t
+import numpy as np
+from eagerx_franka.utils import get_cache_dir, content_hash
+
+# Bump whenever the construction of the table changes, so that stale tables are rebuilt.
+_FORMAT_VERSION = "1"
+
+# Seed of all solutions, so that the table holds configurations of the same branch.
+READY = np.array([0.0, -0.25 * math.pi, 0.0, -0.75 * math.pi, 0.0, 0.5 * math.pi, 0.25 * math.pi])
+
+# Tables that were loaded in this process.
+_TABLES: t.Dict[str, "IKTable"] = {}
+
+
+def downward_orientations(yaw_steps: int = 8, tilts: t.Sequence[float] = (math.pi / 6,)) -> np.ndarray:
+    """Rotations of an end-effector that points (approximately) downward.
+
+    :param yaw_steps: Number of yaw angles (around the vertical axis) over a full turn.
+    :param tilts: Tilts of the end-effector away from vertical [rad]. Each tilt is applied around the x and y axis of the
+                  end-effector, in both directions.
+    :return: The rotations (K x 3 x 3), with K = yaw_steps * (1 + 4 * len(tilts)).
+    """
+
+    def rot(axis: int, angle: float) -> np.ndarray:
+        c, s = math.cos(angle), math.sin(angle)
+        i, j = [(1, 2), (2, 0), (0, 1)][axis]
+        R = np.eye(3)
+        R[i, i], R[i, j], R[j, i], R[j, j] = c, -s, s, c
+        return R
+
+    down = np.diag([1.0, -1.0, -1.0])
+    tilted = [np.eye(3)] + [rot(axis, sign * tilt) for tilt in tilts for axis in (0, 1) for sign in (1, -1)]
+    yaws = [rot(2, 2 * math.pi * i / yaw_steps) for i in range(yaw_steps)]
+    return np.stack([Rz @ down @ Rt for Rz in yaws for Rt in tilted])
+
+
+class IKTable:
+    """Memory-mapped table of inverse kinematics solutions over a grid of end-effector poses in the base frame.
+
+    The grid is the product of a regular grid of positions (with spacing `resolution` between `low` and `high`) and a set
+    of orientations (see :func:`downward_orientations`). All solutions are computed with
+    :func:`~eagerx_franka.ik.batch.solve_batch` from the same seed (:data:`READY`), so that nearby poses map to
+    nearby configurations. Unreachable poses are stored as NaN.
+
+    A table is stored once in the cache directory (see :func:`eagerx_franka.utils.get_cache_dir`), under a key that
+    covers the robot, the end-effector, the joint limits and the grid, and is memory-mapped by every process that uses it.
+    """
+
+    def __init__(self, joints: np.ndarray, low: np.ndarray, resolution: float, orientations: np.ndarray):
+        """
+        :param joints: Solutions (X x Y x Z x K x n), NaN for unreachable poses.
+        :param low: Lower bound of the positions [m].
+        :param resolution: Spacing of the positions [m].
+        :param orientations: The K rotations of the grid (K x 3 x 3).
+        """
+        self.joints = joints
+        self.low = np.asarray(low, dtype="float64")
+        self.resolution = resolution
+        self.orientations = orientations.reshape(len(orientations), 9)
+        self.shape = np.array(joints.shape[:3])
+
+    @classmethod
+    def load(
+        cls,
+        robot_type: str,
+        M: np.ndarray,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        name: str = "ee",
+        low: t.Sequence[float] = (0.2, -0.5, 0.0),
+        high: t.Sequence[float] = (0.8, 0.5, 0.8),
+        resolution: float = 0.05,
+        yaw_steps: int = 8,
+        tilts: t.Sequence[float] = (math.pi / 6,),
+        processes: t.Optional[int] = None,
+        build: bool = False,
+    ) -> "IKTable":
+        """Loads the table of an end-effector from the cache.
+
+        Building a table takes a while (tens of seconds with all cpus), so it is only built with `build=True`, e.g. with
+        ``python scripts/build_ik_table.py``.
+
+        :param robot_type: Robot type (e.g. `panda` or `fr3`), see :mod:`eagerx_franka.franka_arm.mr_descriptions`.
+        :param M: The home configuration of the end-effector in the base frame (4 x 4).
+        :param lower: Lower joint limits.
+        :param upper: Upper joint limits.
+        :param name: Name of the end-effector (e.g. the link name), to make the file name recognizable.
+        :param low: Lower bound of the positions in the base frame [m].
+        :param high: Upper bound of the positions in the base frame [m].
+        :param resolution: Spacing of the positions [m].
+        :param yaw_steps: Number of yaw angles of the orientations.
+        :param tilts: Tilts of the orientations [rad].
+        :param processes: Number of worker processes that build the table (see :func:`~eagerx_franka.ik.batch.solve_batch`).
+                          Defaults to the number of cpus.
+        :param build: Builds the table if it is not in the cache, instead of raising a FileNotFoundError.
+        :return: The table.
+        """
+        import eagerx_franka.franka_arm.mr_descriptions as mrd
+
+        low, high = np.array(low, dtype="float64"), np.array(high, dtype="float64")
+        M, lower, upper = (np.asarray(x, dtype="float64") for x in (M, lower, upper))
+        orientations = downward_orientations(yaw_steps, tilts)
+        grid = tuple(np.rint((high - low) / resolution).astype("int64") + 1)
+        key = content_hash(
+            _FORMAT_VERSION,
+            getattr(mrd, robot_type).Slist.tobytes(),
+            *(np.round(x, 9).tobytes() for x in (M, lower, upper, low, orientations)),
+            repr((grid, resolution)),
+        )
+        path = os.path.join(get_cache_dir("ik_table"), f"{robot_type}_{name}_{key[:16]}.npy")
+        if path not in _TABLES:
+            if not os.path.exists(path):
+                if not build:
+                    raise FileNotFoundError(
+                        f"The ik table of `{name}` ({robot_type}) is not in the cache (`{path}`). "
+                        f"Build it first with `python scripts/build_ik_table.py --robot {robot_type}`."
+                    )
+                joints = cls._build(robot_type, M, lower, upper, low, resolution, grid, orientations, processes)
+                tmp = f"{path}.{os.getpid()}.tmp.npy"
+                try:
+                    np.save(tmp, joints)
+                    os.replace(tmp, path)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+            _TABLES[path] = cls(np.load(path, mmap_mode="r"), low, resolution, orientations)
+        return _TABLES[path]
+
+    @staticmethod
+    def _build(robot_type, M, lower, upper, low, resolution, grid, orientations, processes) -> np.ndarray:
+        from eagerx_franka.ik.batch import solve_batch
+
+        axes = [low[i] + resolution * np.arange(grid[i]) for i in range(3)]
+        positions = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+        T = np.zeros((len(positions), len(orientations), 4, 4))
+        T[:, :, :3, :3], T[:, :, :3, 3], T[:, :, 3, 3] = orientations, positions[:, None], 1.0
+        T = T.reshape(-1, 4, 4)
+        seeds = np.clip(READY, lower, upper)
+        processes = os.cpu_count() if processes is None else processes
+        result = solve_batch(T, seeds, robot_type, (lower, upper), max_iter=50, processes=processes, M=M)
+        joints = np.where(result.success[:, None], result.joints, np.nan).astype("float32")
+        return joints.reshape(*grid, len(orientations), -1)
+
+    def lookup(self, T: np.ndarray) -> t.Optional[np.ndarray]:
+        """The solution of the nearest pose in the grid.
+
+        :param T: End-effector pose in the base frame (4 x 4).
+        :return: The joint positions, or None if the position lies outside of the grid or the nearest pose is unreachable.
+        """
+        index = np.rint((T[:3, 3] - self.low) / self.resolution).astype("int64")
+        if np.any(index < 0) or np.any(index >= self.shape):
+            return None
+        # The nearest orientation has the largest trace(R_k^T R).
+        k = int(np.argmax(self.orientations @ np.ravel(T[:3, :3])))
+        joints = self.joints[index[0], index[1], index[2], k]
+        if np.isnan(joints[0]):
+            return None
+        return joints.astype("float64")
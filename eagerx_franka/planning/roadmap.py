@@ -0,0 +1,218 @@
+import os
+import heapq
+import shutil
+import typing as t
+import numpy as np
+from eagerx_franka.utils import get_cache_dir, content_hash
+
+# Bump whenever the construction of the roadmap changes, so that stale roadmaps are rebuilt.
+_FORMAT_VERSION = "1"
+
+# Roadmaps that were loaded in this process.
+_ROADMAPS: t.Dict[str, "Roadmap"] = {}
+
+# The arrays of a roadmap, each stored as a .npy file in the directory of the roadmap.
+_ARRAYS = ["nodes", "indptr", "indices", "weights"]
+
+
+class Roadmap:
+    """Memory-mapped probabilistic roadmap (PRM) of collision-free joint configurations of an arm.
+
+    The roadmap is built once, offline: configurations are sampled uniformly within the joint limits, and every
+    collision-free one is connected to its nearest neighbors (in joint space) if the straight line between them is
+    collision-free. The graph is stored in compressed sparse row format (`indptr`, `indices`, `weights`) in the cache
+    directory (see :func:`eagerx_franka.utils.get_cache_dir`), under a key that covers the collision model and the
+    construction parameters, and is memory-mapped by every process that uses it.
+
+    A query (see :meth:`plan`) only checks the straight line between start and goal, and the connections of start and
+    goal to their nearest nodes, before an A* search over the stored graph.
+    """
+
+    def __init__(self, nodes: np.ndarray, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray):
+        """
+        :param nodes: Collision-free configurations (N x n).
+        :param indptr: Offsets of the neighbors of every node in `indices` (N + 1).
+        :param indices: Neighbors of the nodes (E).
+        :param weights: Lengths of the edges in joint space (E).
+        """
+        self.nodes = nodes
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+    @classmethod
+    def load(
+        cls,
+        checker,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        name: str = "arm",
+        samples: int = 1000,
+        neighbors: int = 10,
+        resolution: float = 0.05,
+        seed: int = 0,
+        build: bool = False,
+    ) -> "Roadmap":
+        """Loads the roadmap of a collision model from the cache.
+
+        Building a roadmap takes a while (several seconds), so it is only built with `build=True`, e.g. with
+        ``python scripts/build_roadmap.py``.
+
+        :param checker: Collision checker of the arm, with a `key` that identifies its collision model, and `is_free` and
+                        `segment_free` checks (see :class:`~eagerx_franka.franka_arm.pybullet.collision.CollisionChecker`).
+        :param lower: Lower joint limits.
+        :param upper: Upper joint limits.
+        :param name: Name of the arm (e.g. the robot type), to make the directory name recognizable.
+        :param samples: Number of nodes.
+        :param neighbors: Number of nearest neighbors that every node is connected to (if the connection is free).
+        :param resolution: Maximum distance [rad] per joint between the checked configurations of an edge.
+        :param seed: Seed of the sampled configurations.
+        :param build: Builds the roadmap if it is not in the cache, instead of raising a FileNotFoundError.
+        :return: The roadmap.
+        """
+        lower, upper = np.asarray(lower, dtype="float64"), np.asarray(upper, dtype="float64")
+        key = content_hash(
+            _FORMAT_VERSION,
+            checker.key,
+            *(np.round(x, 9).tobytes() for x in (lower, upper)),
+            repr((samples, neighbors, resolution, seed)),
+        )
+        path = os.path.join(get_cache_dir("roadmap"), f"{name}_{key[:16]}")
+        if path not in _ROADMAPS:
+            if not os.path.exists(path):
+                if not build:
+                    raise FileNotFoundError(
+                        f"The roadmap of `{name}` is not in the cache (`{path}`). Build it first with "
+                        f"`python scripts/build_roadmap.py --robot {name}` (and the base pose of the arm)."
+                    )
+                arrays = cls._build(checker, lower, upper, samples, neighbors, resolution, seed)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                try:
+                    os.makedirs(tmp)
+                    for array in _ARRAYS:
+                        np.save(os.path.join(tmp, f"{array}.npy"), arrays[array])
+                    os.replace(tmp, path)
+                except OSError:
+                    if not os.path.exists(path):
+                        raise
+                finally:
+                    shutil.rmtree(tmp, ignore_errors=True)
+            _ROADMAPS[path] = cls(*(np.load(os.path.join(path, f"{array}.npy"), mmap_mode="r") for array in _ARRAYS))
+        return _ROADMAPS[path]
+
+    @staticmethod
+    def _build(checker, lower, upper, samples, neighbors, resolution, seed) -> t.Dict[str, np.ndarray]:
+        rng = np.random.default_rng(seed)
+        nodes = []
+        while len(nodes) < samples:
+            q = rng.uniform(lower, upper)
+            if checker.is_free(q):
+                nodes.append(q)
+        nodes = np.array(nodes)
+
+        # Candidate edges to the nearest neighbors, in both directions.
+        distances = np.linalg.norm(nodes[:, None] - nodes[None], axis=-1)
+        np.fill_diagonal(distances, np.inf)
+        nearest = np.argpartition(distances, neighbors, axis=1)[:, :neighbors]
+        pairs = np.sort(np.stack([np.repeat(np.arange(samples), neighbors), nearest.ravel()], axis=1), axis=1)
+        pairs = np.unique(pairs, axis=0)
+        free = np.array([checker.segment_free(nodes[i], nodes[j], resolution) for i, j in pairs], dtype="bool")
+        edges = np.concatenate([pairs[free], pairs[free][:, ::-1]])
+        edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+
+        indptr = np.searchsorted(edges[:, 0], np.arange(samples + 1)).astype("int64")
+        return dict(
+            nodes=nodes.astype("float32"),
+            indptr=indptr,
+            indices=edges[:, 1].astype("int32"),
+            weights=distances[edges[:, 0], edges[:, 1]].astype("float32"),
+        )
+
+    def _connect(self, q: np.ndarray, checker, neighbors: int, connections: int, resolution: float) -> t.Dict[int, float]:
+        """The (at most `connections`) nearest nodes that can be reached from `q` along a free straight line, and their
+        distances."""
+        distances = np.linalg.norm(self.nodes - q, axis=1)
+        connected = dict()
+        for i in np.argsort(distances)[:neighbors].tolist():
+            if checker.segment_free(q, self.nodes[i], resolution):
+                connected[i] = float(distances[i])
+                if len(connected) == connections:
+                    break
+        return connected
+
+    def plan(
+        self,
+        start: np.ndarray,
+        goal: np.ndarray,
+        checker,
+        neighbors: int = 10,
+        connections: int = 3,
+        resolution: float = 0.05,
+    ) -> t.Optional[np.ndarray]:
+        """Plans a collision-free path from `start` to `goal`.
+
+        The path is the straight line if it is free. Otherwise, it is the shortest path over the roadmap (found with
+        A*) between the nodes that start and goal connect to, after which waypoints are skipped where the straight line
+        to a later waypoint is free. The start and goal themselves are not checked.
+
+        :param start: Joint positions at the start.
+        :param goal: Joint positions at the goal.
+        :param checker: Collision checker of the arm (the one of the roadmap, or one with the same collision model).
+        :param neighbors: Number of nearest nodes to which the connections of start and goal are checked.
+        :param connections: Maximum number of (free) connections of start and goal to the roadmap.
+        :param resolution: Maximum distance [rad] per joint between checked configurations.
+        :return: The waypoints (K x n), including the start and goal, or None if there is no path over the roadmap.
+        """
+        start, goal = np.asarray(start, dtype="float64"), np.asarray(goal, dtype="float64")
+        if checker.segment_free(start, goal, resolution):
+            return np.stack([start, goal])
+        sources = self._connect(start, checker, neighbors, connections, resolution)
+        targets = self._connect(goal, checker, neighbors, connections, resolution)
+        nodes = self._search(sources, targets, goal)
+        if nodes is None:
+            return None
+        path = np.concatenate([start[None], self.nodes[nodes], goal[None]])
+        return self._shortcut(path, checker, resolution)
+
+    def _search(self, sources: t.Dict[int, float], targets: t.Dict[int, float], goal: np.ndarray) -> t.Optional[t.List[int]]:
+        """A* search from the sources to the targets, with the distance to the goal as heuristic."""
+        if not sources or not targets:
+            return None
+        heuristic = np.linalg.norm(self.nodes - goal, axis=1)
+        cost = dict(sources)
+        parent = {node: None for node in sources}
+        queue = [(c + heuristic[node], c, node) for node, c in sources.items()]
+        heapq.heapify(queue)
+        done, best, best_node = set(), np.inf, None
+        while queue:
+            f, c, node = heapq.heappop(queue)
+            if f >= best:
+                break
+            if node in done:
+                continue
+            done.add(node)
+            if node in targets and c + targets[node] < best:
+                best, best_node = c + targets[node], node
+            for i in range(self.indptr[node], self.indptr[node + 1]):
+                neighbor, total = int(self.indices[i]), c + float(self.weights[i])
+                if total < cost.get(neighbor, np.inf):
+                    cost[neighbor], parent[neighbor] = total, node
+                    heapq.heappush(queue, (total + heuristic[neighbor], total, neighbor))
+        if best_node is None:
+            return None
+        nodes = [best_node]
+        while parent[nodes[-1]] is not None:
+            nodes.append(parent[nodes[-1]])
+        return nodes[::-1]
+
+    @staticmethod
+    def _shortcut(path: np.ndarray, checker, resolution: float) -> np.ndarray:
+        """Skips waypoints where the straight line to a later waypoint is free."""
+        keep, i = [0], 0
+        while i < len(path) - 1:
+            j = len(path) - 1
+            while j > i + 1 and not checker.segment_free(path[i], path[j], resolution):
+                j -= 1
+            keep.append(j)
+            i = j
+        return path[keep]
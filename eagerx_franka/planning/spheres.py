@@ -0,0 +1,348 @@
+import os
+import typing as t
+import numpy as np
+from eagerx_franka.utils import content_hash
+
+# Links of the collision model, in the order of the kinematic chain. The hand and fingers are rigidly attached to the
+# flange (link8), which has no collision mesh.
+LINKS = [
+    "panda_link0",
+    "panda_link1",
+    "panda_link2",
+    "panda_link3",
+    "panda_link4",
+    "panda_link5",
+    "panda_link6",
+    "panda_link7",
+    "panda_hand",
+    "panda_leftfinger",
+    "panda_rightfinger",
+]
+
+# Parent (index in LINKS) of every link.
+_PARENTS = [-1, 0, 1, 2, 3, 4, 5, 6, 7, 8, 8]
+
+# Spheres fitted to the collision meshes of the shipped urdf (see scripts/fit_collision_spheres.py).
+_SPHERES = "assets/franka_panda/collision_spheres.yaml"
+
+# Offset of the fingers from the hand (panda_finger_joint1 and panda_finger_joint2), and their axes.
+_FINGER_OFFSET = 0.0584
+_FINGER_AXES = {"panda_leftfinger": 1.0, "panda_rightfinger": -1.0}
+
+
+def read_obj(path: str) -> t.Tuple[np.ndarray, np.ndarray]:
+    """Reads the vertices and the (triangulated) faces of a Wavefront obj file.
+
+    :param path: Path to the obj file.
+    :return: The vertices (V x 3) and the vertex indices of the triangles (F x 3).
+    """
+    vertices, faces = [], []
+    with open(path, "r") as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "v":
+                vertices.append([float(x) for x in fields[1:4]])
+            elif fields[0] == "f":
+                # Indices are 1-based and may be followed by texture and normal indices (v/vt/vn). Polygons are fanned.
+                polygon = [int(field.split("/")[0]) - 1 for field in fields[1:]]
+                faces += [[polygon[0], polygon[i], polygon[i + 1]] for i in range(1, len(polygon) - 1)]
+    return np.array(vertices), np.array(faces, dtype="int64")
+
+
+def sample_surface(vertices: np.ndarray, faces: np.ndarray, n: int, seed: int = 0) -> np.ndarray:
+    """Samples points uniformly on the surface of a triangle mesh.
+
+    :param vertices: The vertices (V x 3).
+    :param faces: The vertex indices of the triangles (F x 3).
+    :param n: Number of points.
+    :param seed: Seed of the samples.
+    :return: The points (n x 3).
+    """
+    rng = np.random.default_rng(seed)
+    a, b, c = (vertices[faces[:, i]] for i in range(3))
+    area = np.linalg.norm(np.cross(b - a, c - a), axis=1)
+    triangle = rng.choice(len(faces), size=n, p=area / area.sum())
+    u, v = rng.uniform(size=(2, n, 1))
+    flip = (u + v) > 1
+    u, v = np.where(flip, 1 - u, u), np.where(flip, 1 - v, v)
+    return a[triangle] + u * (b - a)[triangle] + v * (c - a)[triangle]
+
+
+def fit_spheres(points: np.ndarray, n: int, iterations: int = 50, restarts: int = 10, seed: int = 0) -> np.ndarray:
+    """Fits a set of spheres that contains all points.
+
+    The points are clustered with k-means, and every cluster is enclosed by an (approximately) minimal sphere. Every
+    point lies within (at least) the sphere of its cluster. Of the restarts of k-means, the set with the smallest total
+    volume is kept.
+
+    :param points: The points (e.g. the vertices and surface samples of a collision mesh).
+    :param n: Number of spheres.
+    :param iterations: Number of k-means iterations.
+    :param restarts: Number of initializations of k-means.
+    :param seed: Seed of the initial cluster centers.
+    :return: The spheres (n x 4), as center (x, y, z) and radius.
+    """
+    rng = np.random.default_rng(seed)
+    best = None
+    for _ in range(restarts):
+        spheres = _fit_spheres(points, n, iterations, rng)
+        if best is None or np.sum(spheres[:, 3] ** 3) < np.sum(best[:, 3] ** 3):
+            best = spheres
+    return best
+
+
+def _fit_spheres(points: np.ndarray, n: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    # k-means++ initialization
+    centers = [points[rng.integers(len(points))]]
+    for _ in range(1, n):
+        distance = np.min(np.linalg.norm(points[:, None] - np.array(centers)[None], axis=-1), axis=1) ** 2
+        centers.append(points[rng.choice(len(points), p=distance / distance.sum())])
+    centers = np.array(centers)
+    for _ in range(iterations):
+        labels = np.argmin(np.linalg.norm(points[:, None] - centers[None], axis=-1), axis=1)
+        centers = np.array([points[labels == i].mean(axis=0) if np.any(labels == i) else centers[i] for i in range(n)])
+    labels = np.argmin(np.linalg.norm(points[:, None] - centers[None], axis=-1), axis=1)
+
+    spheres = []
+    for i in np.unique(labels):
+        cluster = points[labels == i]
+        # Approximate minimum enclosing sphere (Badoiu-Clarkson): the center steps towards the farthest point.
+        center = (cluster.min(axis=0) + cluster.max(axis=0)) / 2
+        best = [*center, np.linalg.norm(cluster - center, axis=1).max()]
+        for k in range(1, 200):
+            distance = np.linalg.norm(cluster - center, axis=1)
+            if distance.max() < best[3]:
+                best = [*center, distance.max()]
+            center = center + (cluster[np.argmax(distance)] - center) / (k + 1)
+        spheres.append(best)
+    return np.array(spheres)
+
+
+def load_spheres(path: str = None) -> t.Dict[str, np.ndarray]:
+    """Loads a sphere model of the links of a Franka arm.
+
+    :param path: Path to a yaml file that maps link names to lists of spheres [x, y, z, radius] in the link frames.
+                 Defaults to the shipped model of the collision meshes of `assets/franka_panda/panda.urdf`.
+    :return: The spheres (K x 4) of every link.
+    """
+    import yaml
+    import eagerx_franka
+
+    if path is None:
+        path = os.path.join(os.path.dirname(eagerx_franka.__file__), _SPHERES)
+    with open(path, "r") as f:
+        spheres = yaml.safe_load(f)
+    return {link: np.array(spheres[link], dtype="float64").reshape(-1, 4) for link in LINKS if link in spheres}
+
+
+def _transform(pos: t.Sequence[float], orn: t.Sequence[float]) -> np.ndarray:
+    from scipy.spatial.transform import Rotation
+
+    T = np.eye(4)
+    T[:3, :3] = Rotation.from_quat(orn).as_matrix()
+    T[:3, 3] = pos
+    return T
+
+
+class SphereChecker:
+    """Vectorized self-collision and workspace checks of a Franka arm, with its links approximated by spheres.
+
+    The spheres (see :func:`load_spheres`) are placed with the batched forward kinematics of
+    :class:`~eagerx_franka.ik.kinematics.Kinematics`, so a batch of configurations is checked with a few array
+    operations per link pair, without pybullet. Two spheres collide if the distance between their surfaces is below
+    `margin`. The link pairs are checked in order of how often they collide in random configurations, and every pair
+    is only checked for the configurations that are still free, so that most colliding configurations drop out early.
+
+    Like :class:`~eagerx_franka.franka_arm.pybullet.collision.CollisionChecker`, adjacent links and the link pairs that
+    collide in the `reference` configuration are excluded, and links that violate the workspace in the `reference`
+    configuration (e.g. the base, which stands on the ground) are not checked against it. The spheres contain the
+    collision meshes, so the checks are conservative.
+
+    The checker has the interface of :class:`~eagerx_franka.franka_arm.pybullet.collision.CollisionChecker` that
+    :class:`~eagerx_franka.planning.roadmap.Roadmap` uses (`key`, `is_free`, and `segment_free`).
+    """
+
+    def __init__(
+        self,
+        robot_type: str = "panda",
+        reference: t.Sequence[float] = None,
+        finger_width: float = 0.04,
+        base_pos: t.Sequence[float] = (0.0, 0.0, 0.0),
+        base_orn: t.Sequence[float] = (0.0, 0.0, 0.0, 1.0),
+        ground_height: t.Optional[float] = 0.0,
+        workspace: t.Optional[t.Tuple[t.Sequence[float], t.Sequence[float]]] = None,
+        margin: float = 0.0,
+        spheres: t.Dict[str, np.ndarray] = None,
+        chunk_size: int = 1024,
+    ):
+        """
+        :param robot_type: Robot type (e.g. `panda` or `fr3`), see :mod:`eagerx_franka.franka_arm.mr_descriptions`.
+        :param reference: A collision-free configuration of the seven arm joints. Defaults to the ready configuration.
+        :param finger_width: Position of the finger joints [m], i.e. half the opening of the gripper.
+        :param base_pos: Position of the base link frame (link0) in the world frame.
+        :param base_orn: Orientation of the base link frame in the world frame (x, y, z, w).
+        :param ground_height: Height of the ground in the world frame [m], or None to not check the ground.
+        :param workspace: Lower and upper bounds (x, y, z) of the workspace in the world frame [m], or None.
+        :param margin: Minimum distance between the spheres, and between the spheres and the workspace bounds [m].
+        :param spheres: Spheres of the links (see :func:`load_spheres`). Defaults to the shipped model.
+        :param chunk_size: Maximum number of configurations that is checked at once (to bound the memory use).
+        """
+        from eagerx_franka.ik.batch import load_joint_limits
+        from eagerx_franka.ik.kinematics import Kinematics
+        from eagerx_franka.ik.table import READY
+
+        spheres = load_spheres() if spheres is None else spheres
+        self.kinematics = Kinematics.from_description(robot_type)
+        self.margin = margin
+        self.chunk_size = chunk_size
+        world_to_base = _transform(base_pos, base_orn)
+        self._world_to_base = None if np.allclose(world_to_base, np.eye(4)) else world_to_base
+
+        # The spheres in the frames of the kinematics, ordered by link: frame 0 is the base, and frame i > 0 is the
+        # i-th link of the kinematics (link1 to link8), to which the hand and fingers are attached.
+        hand = np.eye(4)
+        hand[:2, :2] = [[np.cos(-np.pi / 4), -np.sin(-np.pi / 4)], [np.sin(-np.pi / 4), np.cos(-np.pi / 4)]]
+        frames, centers, radii, links = [], [], [], []
+        for i, link in enumerate(LINKS):
+            if link not in spheres:
+                continue
+            T = np.eye(4)
+            if i >= 8:
+                T = hand.copy()
+                if link in _FINGER_AXES:
+                    T[:3, 3] = hand[:3, :3] @ [0.0, _FINGER_AXES[link] * finger_width, _FINGER_OFFSET]
+            frames += [min(i, 8)] * len(spheres[link])
+            centers.append(spheres[link][:, :3] @ T[:3, :3].T + T[:3, 3])
+            radii.append(spheres[link][:, 3])
+            links += [i] * len(spheres[link])
+        frames = np.array(frames)
+        self.radii = np.concatenate(radii)
+        self.links = np.array(links)
+        # Homogeneous centers (4 x K), and the range of spheres of every frame and link.
+        self._centers = np.concatenate([np.concatenate(centers), np.ones((len(self.radii), 1))], axis=1).T
+        self._centers = self._centers.astype("float32")
+        self._frames = [(f, *_range(frames == f)) for f in np.unique(frames).tolist()]
+        self._link_ranges = {link: _range(self.links == link) for link in np.unique(self.links).tolist()}
+
+        # Link pairs that are excluded.
+        reference = READY if reference is None else np.asarray(reference, dtype="float64")
+        ref = self.centers(reference)[0].T
+        overlap = np.linalg.norm(ref[:, None] - ref[None], axis=-1) < self.radii[:, None] + self.radii[None] + margin
+        i, j = np.nonzero(overlap)
+        excluded = {(min(a, b), max(a, b)) for a, b in zip(self.links[i].tolist(), self.links[j].tolist())}
+        excluded |= {(parent, link) for link, parent in enumerate(_PARENTS) if parent >= 0}
+        self.excluded = sorted((a, b) for a, b in excluded if a != b)
+        pairs = [(a, b) for a in self._link_ranges for b in self._link_ranges if a < b and (a, b) not in excluded]
+
+        # Bounds of the sphere centers (3 x K) in the world frame, of the links that are within the workspace at the
+        # reference.
+        low, high = np.full(3, -np.inf), np.full(3, np.inf)
+        if workspace is not None:
+            low, high = np.array(workspace[0], dtype="float64"), np.array(workspace[1], dtype="float64")
+        if ground_height is not None:
+            low[2] = max(low[2], ground_height)
+        self._low = low[:, None] + (self.radii + margin)
+        self._high = high[:, None] - (self.radii + margin)
+        outside = np.any((ref.T < self._low) | (ref.T > self._high), axis=0)
+        self.unbounded = sorted(set(self.links[outside].tolist()))
+        self._low[:, np.isin(self.links, self.unbounded)] = -np.inf
+        self._high[:, np.isin(self.links, self.unbounded)] = np.inf
+        self._low, self._high = self._low.astype("float32"), self._high.astype("float32")
+
+        # Squared collision distances of the sphere pairs of every link pair, in order of their collision rate.
+        self._pairs = []
+        for a, b in pairs:
+            (a0, a1), (b0, b1) = self._link_ranges[a], self._link_ranges[b]
+            distance = (self.radii[a0:a1, None] + self.radii[None, b0:b1] + margin) ** 2
+            self._pairs.append((a0, a1, b0, b1, distance.astype("float32")))
+        lower, upper = load_joint_limits(robot_type)
+        samples = self.centers(np.random.default_rng(0).uniform(lower, upper, size=(256, len(lower))))
+        rate = [np.mean(self._collisions(samples, *pair)) for pair in self._pairs]
+        self._pairs = [self._pairs[i] for i in np.argsort(rate, kind="stable")[::-1]]
+
+        # Identifies the collision model, e.g. in the key of a roadmap (see :class:`~eagerx_franka.planning.roadmap.Roadmap`).
+        self.key = content_hash(
+            "spheres",
+            robot_type,
+            *(np.round(x, 9).tobytes() for x in (self._centers, self.radii, world_to_base, self._low, self._high)),
+            repr((pairs, margin)),
+        )
+
+    def centers(self, q: np.ndarray) -> np.ndarray:
+        """Centers of the spheres in the world frame.
+
+        :param q: Joint positions (N x 7), or a single configuration (7,).
+        :return: The centers (N x 3 x K), as columns.
+        """
+        links = self.kinematics.forward(np.atleast_2d(q), links=True).links
+        if self._world_to_base is not None:
+            links = self._world_to_base @ links
+        links = links[:, :, :3].astype("float32")
+        centers = np.empty((len(links), 3, self._centers.shape[1]), dtype="float32")
+        for frame, k0, k1 in self._frames:
+            if frame == 0:
+                base = np.eye(4) if self._world_to_base is None else self._world_to_base
+                centers[:, :, k0:k1] = base[:3] @ self._centers[:, k0:k1]
+            else:
+                np.matmul(links[:, frame - 1], self._centers[:, k0:k1], out=centers[:, :, k0:k1])
+        return centers
+
+    @staticmethod
+    def _collisions(centers: np.ndarray, a0: int, a1: int, b0: int, b1: int, distance: np.ndarray) -> np.ndarray:
+        """Whether any sphere in [a0, a1) collides with any sphere in [b0, b1), for every configuration."""
+        diff = centers[:, :, a0:a1, None] - centers[:, :, None, b0:b1]
+        diff *= diff
+        return np.any(diff.sum(axis=1) < distance, axis=(1, 2))
+
+    def check(self, q: np.ndarray) -> np.ndarray:
+        """Whether configurations are free of (self-)collisions and within the workspace.
+
+        :param q: Joint positions (N x 7), or a single configuration (7,).
+        :return: Whether every configuration is free (N,).
+        """
+        q = np.atleast_2d(q)
+        free = np.zeros(len(q), dtype="bool")
+        for start in range(0, len(q), self.chunk_size):
+            centers = self.centers(q[start : start + self.chunk_size])
+            inside = np.all((centers >= self._low) & (centers <= self._high), axis=(1, 2))
+            active = np.flatnonzero(inside)
+            centers = centers[active]
+            for pair in self._pairs:
+                if not len(active):
+                    break
+                collision = self._collisions(centers, *pair)
+                if collision.any():
+                    active, centers = active[~collision], centers[~collision]
+            free[start + active] = True
+        return free
+
+    def is_free(self, q: np.ndarray) -> bool:
+        """Whether a configuration is free of collisions and within the workspace.
+
+        :param q: Positions of the joints.
+        """
+        return bool(self.check(q)[0])
+
+    def segment_free(self, start: np.ndarray, goal: np.ndarray, resolution: float = 0.05) -> bool:
+        """Whether the straight line between two configurations is free of collisions and within the workspace.
+
+        The line is checked at intervals of at most `resolution` per joint, with the endpoints excluded, in one batch.
+
+        :param start: Positions of the joints at the start.
+        :param goal: Positions of the joints at the goal.
+        :param resolution: Maximum distance [rad] per joint between checked configurations.
+        """
+        start, goal = np.asarray(start, dtype="float64"), np.asarray(goal, dtype="float64")
+        steps = int(np.ceil(np.abs(goal - start).max() / resolution))
+        if steps < 2:
+            return True
+        s = np.arange(1, steps)[:, None] / steps
+        return bool(np.all(self.check(start + s * (goal - start))))
+
+
+def _range(mask: np.ndarray) -> t.Tuple[int, int]:
+    """The range [first, last + 1) of the true elements of a mask (which are contiguous)."""
+    indices = np.flatnonzero(mask)
+    return int(indices[0]), int(indices[-1]) + 1
@@ -0,0 +1,512 @@
+"""In-process xacro expansion of the robot descriptions in `assets/robots/`, with a content-addressed on-disk cache.
+
+Only the subset of xacro that is used by the shipped descriptions is supported: `include`, `macro` (incl. default,
+forwarded `^` and block `*`/`**` parameters), `property`, `arg`, `if`, `unless`, `insert_block`, `$(find ...)`,
+`$(arg ...)` and `${...}` expressions (with `xacro.load_yaml`). This removes the need for a ROS master (and
+roslaunch) to generate a urdf.
+"""
+import os
+import re
+import sys
+import glob
+import math
+import shlex
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+from xml.dom import minidom
+import eagerx_franka
+from eagerx_franka.utils import get_cache_dir, content_hash
+
+# Bump whenever the expansion itself changes, so that stale cache entries are ignored.
+_FORMAT_VERSION = "2"
+_XACRO_NS = "xacro:"
+_DESCRIPTION_PKG = "franka_description"
+_REF_PREFIX = "eagerx_franka:"
+_SHIPPED_URDF = "assets/franka_panda/panda.urdf"
+
+# In-memory caches, shared within a process.
+_URDFS: Dict[str, str] = {}
+_FILE_HASHES: Dict[str, Tuple[int, int, str]] = {}
+_PATHS: Dict[str, str] = {}  # urdf (reference) -> materialised file
+
+
+def get_assets_path() -> str:
+    return os.path.dirname(eagerx_franka.__file__) + "/assets/"
+
+
+class XacroError(Exception):
+    pass
+
+
+class _YamlDict(dict):
+    """Dict that also allows attribute access, as is done by `xacro.load_yaml`."""
+
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError:
+            raise AttributeError(item)
+
+
+def _wrap_yaml(value):
+    if isinstance(value, dict):
+        return _YamlDict({k: _wrap_yaml(v) for k, v in value.items()})
+    elif isinstance(value, list):
+        return [_wrap_yaml(v) for v in value]
+    return value
+
+
+class _XacroFunctions:
+    """Functions that are available as `xacro.<fn>` inside expressions."""
+
+    @staticmethod
+    def load_yaml(filename):
+        import yaml
+
+        with open(filename, "r") as f:
+            return _wrap_yaml(yaml.safe_load(f))
+
+    @staticmethod
+    def warning(*args):
+        print("[xacro] warning:", *args, file=sys.stderr)
+        return ""
+
+
+_GLOBALS = {k: getattr(math, k) for k in dir(math) if not k.startswith("_")}
+_GLOBALS.update(xacro=_XacroFunctions, __builtins__={}, len=len, str=str, float=float, int=int, abs=abs, min=min, max=max)
+
+
+def _eval_literal(value):
+    """Interprets strings as int, float or bool (when possible), like xacro does for property values."""
+    if isinstance(value, str):
+        if len(value) >= 2 and value[0] == "'" and value[-1] == "'":
+            return value[1:-1]
+        if "_" in value:
+            return value
+        for f in (int, float):
+            try:
+                return f(value)
+            except ValueError:
+                pass
+        if value in ("true", "True"):
+            return True
+        elif value in ("false", "False"):
+            return False
+    return value
+
+
+def _to_bool(value, expr: str) -> bool:
+    value = _eval_literal(value)
+    if isinstance(value, str):
+        raise XacroError(f'Conditional "{expr}" evaluated to "{value}", which is not a boolean expression.')
+    return bool(value)
+
+
+class _Table(dict):
+    """Scoped symbol table. Lookups fall through to the parent (i.e. calling) scope."""
+
+    def __init__(self, parent: Optional["_Table"] = None):
+        super().__init__()
+        self.parent = parent
+
+    def _lookup(self, key):
+        table = self
+        while table is not None:
+            if dict.__contains__(table, key):
+                return dict.__getitem__(table, key)
+            table = table.parent
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        return _eval_literal(self._lookup(key))
+
+    def __contains__(self, key):
+        try:
+            self._lookup(key)
+            return True
+        except KeyError:
+            return False
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+class _Macro:
+    def __init__(self, name: str, params: str, body: minidom.Element):
+        self.name = name
+        self.body = body
+        self.params = []  # List of (name, default, forward)
+        for p in shlex.split(params):
+            forward = False
+            if ":=" in p:
+                name, default = p.split(":=", 1)
+            elif "=" in p:
+                name, default = p.split("=", 1)
+            else:
+                name, default = p, None
+            if default is not None and default.startswith("^"):
+                forward = True
+                default = default[2:] if default.startswith("^|") else None
+            self.params.append((name, default, forward))
+
+
+_SUBST = re.compile(r"\$\((\w+)\s*([^)]*)\)")
+_EXPR = re.compile(r"\$\{([^}]*)\}")
+
+
+class _Processor:
+    def __init__(self, args: Dict[str, str]):
+        self.args = dict(args)
+        self.doc = minidom.Document()
+
+    def _substitute(self, text: str) -> str:
+        def _resolve(match):
+            cmd, arg = match.group(1), match.group(2).strip()
+            if cmd == "find":
+                if arg != _DESCRIPTION_PKG:
+                    raise XacroError(f"Cannot find package `{arg}`. Only `{_DESCRIPTION_PKG}` is available.")
+                return get_assets_path()[:-1]
+            elif cmd == "arg":
+                if arg not in self.args:
+                    raise XacroError(f"Undefined substitution argument `{arg}`.")
+                return self.args[arg]
+            elif cmd in ("env", "optenv"):
+                name, _, default = arg.partition(" ")
+                return os.environ.get(name, default) if cmd == "optenv" else os.environ[name]
+            raise XacroError(f"Unsupported substitution `$({cmd} {arg})`.")
+
+        return _SUBST.sub(_resolve, text)
+
+    def eval_text(self, text: str, symbols: _Table) -> Any:
+        """Evaluates `$(...)` and `${...}`. A text that only consists of a single expression keeps its python type."""
+        if "$" not in text:
+            return text
+        text = self._substitute(text)
+        parts = _EXPR.split(text)
+        if len(parts) == 1:
+            return text
+
+        def _eval(expr):
+            try:
+                return eval(expr, _GLOBALS, symbols)
+            except Exception as e:
+                raise XacroError(f"Cannot evaluate `${{{expr}}}`: {e}") from e
+
+        if len(parts) == 3 and parts[0] == "" and parts[2] == "":
+            return _eval(parts[1])
+        return "".join(str(_eval(p)) if i % 2 else p for i, p in enumerate(parts))
+
+    def eval_nodes(self, nodes: List[minidom.Node], symbols: _Table, macros: _Table) -> List[minidom.Node]:
+        out = []
+        for node in nodes:
+            if node.nodeType == node.TEXT_NODE:
+                if node.data.strip():
+                    out.append(self.doc.createTextNode(str(self.eval_text(node.data.strip(), symbols))))
+            elif node.nodeType == node.ELEMENT_NODE:
+                if node.tagName.startswith(_XACRO_NS):
+                    out += self.eval_xacro(node, node.tagName[len(_XACRO_NS) :], symbols, macros)
+                else:
+                    out.append(self.eval_element(node, symbols, macros))
+        return out
+
+    def eval_element(self, node: minidom.Element, symbols: _Table, macros: _Table) -> minidom.Element:
+        element = self.doc.createElement(node.tagName)
+        for key, value in node.attributes.items():
+            if key == "xmlns:xacro":
+                continue
+            element.setAttribute(key, str(self.eval_text(value, symbols)))
+        for child in self.eval_nodes(node.childNodes, symbols, macros):
+            element.appendChild(child)
+        return element
+
+    def eval_xacro(self, node: minidom.Element, tag: str, symbols: _Table, macros: _Table) -> List[minidom.Node]:
+        attr = node.getAttribute
+        if tag == "include":
+            filename = self.eval_text(attr("filename"), symbols)
+            if not os.path.isabs(filename):
+                filename = os.path.join(self._dirs[-1], filename)
+            return self.eval_file(filename, symbols, macros).childNodes
+        elif tag == "property":
+            if not node.hasAttribute("value"):
+                raise XacroError(f"Property `{attr('name')}` has no value. Block properties are not supported.")
+            symbols[attr("name")] = self.eval_text(attr("value"), symbols)
+        elif tag == "arg":
+            if attr("name") not in self.args:
+                self.args[attr("name")] = str(self.eval_text(attr("default"), symbols))
+        elif tag == "macro":
+            macros[attr("name")] = _Macro(attr("name"), attr("params"), node)
+        elif tag in ("if", "unless"):
+            expr = attr("value")
+            if _to_bool(self.eval_text(expr, symbols), expr) == (tag == "if"):
+                return self.eval_nodes(node.childNodes, symbols, macros)
+        elif tag == "insert_block":
+            name = attr("name")
+            for key in (f"**{name}", f"*{name}"):
+                if key in symbols:
+                    block = symbols._lookup(key)
+                    nodes = block.childNodes if key.startswith("**") else [block]
+                    return self.eval_nodes(nodes, symbols, macros)
+            # The block was not passed (e.g. because it is commented out in the macro call), so insert nothing.
+        elif tag in macros:
+            return self.eval_macro_call(node, macros[tag], symbols, macros)
+        else:
+            raise XacroError(f"Unknown macro or unsupported xacro element `{tag}`.")
+        return []
+
+    def eval_macro_call(self, node: minidom.Element, macro: _Macro, symbols: _Table, macros: _Table):
+        scope = _Table(symbols)
+        blocks = [n for n in node.childNodes if n.nodeType == n.ELEMENT_NODE]
+        given = {k: self.eval_text(v, symbols) for k, v in node.attributes.items()}
+        for name, default, forward in macro.params:
+            if name.startswith("*"):
+                if len(blocks) > 0:
+                    scope[name] = blocks.pop(0)
+            elif name in given:
+                scope[name] = given.pop(name)
+            elif forward and name in symbols:
+                scope[name] = symbols._lookup(name)
+            elif default is not None:
+                scope[name] = self.eval_text(default, scope)
+            else:
+                raise XacroError(f"Parameter `{name}` of macro `{macro.name}` is missing.")
+        if len(given) > 0:
+            raise XacroError(f"Unknown parameters {list(given)} passed to macro `{macro.name}`.")
+        return self.eval_nodes(macro.body.childNodes, scope, _Table(macros))
+
+    def eval_file(self, filename: str, symbols: _Table, macros: _Table) -> minidom.Element:
+        """Evaluates all nodes of a file. The root element is returned with the evaluated nodes as children."""
+        root = minidom.parse(filename).documentElement
+        self._dirs.append(os.path.dirname(filename))
+        try:
+            element = self.doc.createElement(root.tagName)
+            for key, value in root.attributes.items():
+                if key != "xmlns:xacro":
+                    element.setAttribute(key, str(self.eval_text(value, symbols)))
+            for child in self.eval_nodes(root.childNodes, symbols, macros):
+                element.appendChild(child)
+        finally:
+            self._dirs.pop()
+        return element
+
+    def process(self, filename: str) -> str:
+        self._dirs = []
+        robot = self.eval_file(filename, _Table(), _Table())
+        self.doc.appendChild(robot)
+        return self.doc.toprettyxml(indent="  ")
+
+
+def expand_xacro(filename: str, mappings: Dict[str, str] = None) -> str:
+    """Expands a xacro file into an urdf (xml string), without ROS.
+
+    :param filename: Path to the xacro file.
+    :param mappings: Xacro arguments (i.e. what would be passed as `name:=value` on the command line).
+    :return: The urdf (xml string).
+    """
+    return _Processor(mappings or {}).process(filename)
+
+
+def get_xacro_path(robot: str) -> str:
+    """Path to the xacro description of `robot` (one of the directories in `assets/robots/`)."""
+    files = sorted(glob.glob(f"{get_assets_path()}robots/{robot}/*.urdf.xacro"))
+    if len(files) == 0:
+        raise ValueError(f"No xacro description found for robot `{robot}` in `{get_assets_path()}robots/`.")
+    return files[0]
+
+
+def _file_hash(path: str) -> str:
+    # Only re-read files whose size or modification time changed.
+    st = os.stat(path)
+    cached = _FILE_HASHES.get(path, None)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+    with open(path, "rb") as f:
+        digest = content_hash(f.read())
+    _FILE_HASHES[path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def _materialise(urdf: str) -> str:
+    # Urdfs expanded from xacro refer to `package://franka_description/`, the shipped urdf to `package://meshes/`.
+    assets = get_assets_path()
+    return urdf.replace(f"package://{_DESCRIPTION_PKG}/", assets).replace("package://", f"{assets}franka_panda/")
+
+
+def _write_atomic(path: str, text: str):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # A read-only cache only costs us the speed-up.
+
+
+def _xacro_args(xyz: List[float] = None, rpy: List[float] = None) -> Tuple[List[float], List[float]]:
+    xyz = [float(v) for v in (xyz if xyz is not None else [0, 0, 0])]
+    rpy = [float(v) for v in (rpy if rpy is not None else [0, 0, 0])]
+    return xyz, rpy
+
+
+def _expand(robot: str, use_gripper: bool, xyz: List[float], rpy: List[float], gazebo: bool) -> str:
+    """Expands (or loads from cache) the urdf of a robot description. Mesh urls are left as `package://` urls."""
+    assets = get_assets_path()
+    files = sorted(glob.glob(f"{assets}robots/**/*", recursive=True))
+    key = content_hash(
+        _FORMAT_VERSION,
+        robot,
+        str(bool(use_gripper)),
+        str(bool(gazebo)),
+        repr(xyz),
+        repr(rpy),
+        *[f"{os.path.relpath(f, assets)}:{_file_hash(f)}" for f in files if os.path.isfile(f)],
+    )
+
+    # Check in-memory cache
+    urdf = _URDFS.get(key, None)
+    if urdf is not None:
+        return urdf
+
+    # Check on-disk cache
+    path = os.path.join(get_cache_dir("xacro"), f"{key}.urdf")
+    try:
+        with open(path, "r") as f:
+            urdf = f.read()
+    except IOError:
+        mappings = dict(
+            gazebo=str(bool(gazebo)).lower(),
+            hand=str(bool(use_gripper)).lower(),
+            arm_id=robot,
+            xyz=" ".join(str(v) for v in xyz),
+            rpy=" ".join(str(v) for v in rpy),
+        )
+        urdf = expand_xacro(get_xacro_path(robot), mappings)
+        _write_atomic(path, urdf)
+    _URDFS[key] = urdf
+    return urdf
+
+
+def get_urdf(
+    robot: str,
+    use_gripper: bool = True,
+    xyz: List[float] = None,
+    rpy: List[float] = None,
+    gazebo: bool = True,
+) -> str:
+    """Get the urdf of a robot description in `assets/robots/` (e.g. `panda`, `fr3`, or `dual_panda`).
+
+    Mirrors `assets/franka_description.launch`, but expands the xacro files in-process. Mesh urls are replaced by
+    absolute paths. The result is cached in memory and on disk, keyed by the arguments and the hashes of the
+    description files, so repeated calls with the same configuration cost about one file read.
+
+    :param robot: Robot description.
+    :param use_gripper: Mount a franka hand on the flange.
+    :param xyz: Position of the robot's base [m].
+    :param rpy: Orientation of the robot's base in roll-pitch-yaw [rad].
+    :param gazebo: Add the gazebo specific tags (incl. inertial properties).
+    :return: The urdf (xml string).
+    """
+    xyz, rpy = _xacro_args(xyz, rpy)
+    return _materialise(_expand(robot, use_gripper, xyz, rpy, gazebo))
+
+
+def is_urdf_ref(urdf: str) -> bool:
+    """Whether `urdf` is a reference created with :func:`get_urdf_ref`."""
+    return isinstance(urdf, str) and urdf.startswith(_REF_PREFIX)
+
+
+def _parse_ref(ref: str) -> Tuple[str, Dict[str, str], str]:
+    source, _, sha = ref[len(_REF_PREFIX) :].rpartition("#")
+    source, _, query = source.partition("?")
+    return source, dict(urllib.parse.parse_qsl(query)), sha
+
+
+def get_urdf_ref(
+    robot: str,
+    regenerate: bool = False,
+    use_gripper: bool = True,
+    xyz: List[float] = None,
+    rpy: List[float] = None,
+    gazebo: bool = True,
+) -> str:
+    """Get a short reference to a urdf that can be stored in a spec instead of the urdf itself.
+
+    The reference consists of the source of the urdf (a shipped asset, or an xacro configuration) and the content
+    hash of the urdf with its mesh urls still unresolved. Use :func:`resolve_urdf` to obtain a urdf file from it.
+
+    :param robot: Robot description (e.g. `panda`, `fr3`, or `dual_panda`).
+    :param regenerate: Expand the xacro description of `robot` (see :func:`get_urdf`). Otherwise, the shipped
+                       `assets/franka_panda/panda.urdf` is referenced.
+    :param use_gripper: Mount a franka hand on the flange (only used if `regenerate=True`).
+    :param xyz: Position of the robot's base [m] (only used if `regenerate=True`).
+    :param rpy: Orientation of the robot's base in roll-pitch-yaw [rad] (only used if `regenerate=True`).
+    :param gazebo: Add the gazebo specific tags (only used if `regenerate=True`).
+    :return: The reference (e.g. `eagerx_franka:assets/franka_panda/panda.urdf#<sha256>`).
+    """
+    if not regenerate:
+        source = _SHIPPED_URDF
+        sha = _file_hash(get_assets_path() + source[len("assets/") :])
+    else:
+        xyz, rpy = _xacro_args(xyz, rpy)
+        args = dict(
+            use_gripper=str(bool(use_gripper)).lower(),
+            gazebo=str(bool(gazebo)).lower(),
+            xyz=" ".join(str(v) for v in xyz),
+            rpy=" ".join(str(v) for v in rpy),
+        )
+        source = f"xacro/{robot}?{urllib.parse.urlencode(args)}"
+        sha = content_hash(_expand(robot, use_gripper, xyz, rpy, gazebo))
+    return f"{_REF_PREFIX}{source}#{sha}"
+
+
+def load_urdf(urdf: str) -> str:
+    """Get the urdf (xml string) with unresolved mesh urls that a reference points to.
+
+    :param urdf: A reference created with :func:`get_urdf_ref`. Any other string is assumed to be a urdf already.
+    :return: The urdf (xml string).
+    """
+    if not is_urdf_ref(urdf):
+        return urdf
+    source, args, sha = _parse_ref(urdf)
+    if source == _SHIPPED_URDF:
+        with open(get_assets_path() + source[len("assets/") :], "r") as f:
+            text = f.read()
+    elif source.startswith("xacro/"):
+        xyz = [float(v) for v in args.get("xyz", "0 0 0").split()]
+        rpy = [float(v) for v in args.get("rpy", "0 0 0").split()]
+        use_gripper = args.get("use_gripper", "true") == "true"
+        gazebo = args.get("gazebo", "true") == "true"
+        text = _expand(source[len("xacro/") :], use_gripper, xyz, rpy, gazebo)
+    else:
+        raise ValueError(f"Unknown urdf source `{source}` in reference `{urdf}`.")
+    if content_hash(text) != sha:
+        raise ValueError(f"The urdf that `{urdf}` refers to has changed since the reference was created.")
+    return text
+
+
+def resolve_urdf(urdf: str) -> str:
+    """Get the path to a urdf file with resolved mesh urls.
+
+    The file is materialised at most once per process (and reused across processes) in the cache directory, keyed
+    by the content hash of the urdf and the location of the assets.
+
+    :param urdf: A reference created with :func:`get_urdf_ref`, a urdf (xml string), or a path to a .urdf file
+                 (returned as is).
+    :return: Absolute path to the urdf file.
+    """
+    path = _PATHS.get(urdf, None)
+    if path is not None:
+        return path
+    if is_urdf_ref(urdf):
+        sha = _parse_ref(urdf)[2]
+    elif urdf.endswith(".urdf"):
+        return urdf
+    else:
+        sha = content_hash(urdf)
+    assets = get_assets_path()
+    path = os.path.join(get_cache_dir("urdf", content_hash(assets)[:16]), f"{sha}.urdf")
+    if not os.path.exists(path):
+        _write_atomic(path, _materialise(load_urdf(urdf)))
+        if not os.path.exists(path):
+            raise IOError(f"Could not write the urdf to: {path}")
+    _PATHS[urdf] = path
+    return path
@@ -1,19 +1,50 @@
 import os
+import hashlib
 import eagerx_franka
-import yaml
-from eagerx_utility.utils import launch_node
-import gymnasium as gym
 
 
-def get_joint_limits(robot_model: str, joint_limits: str):
+def get_cache_dir(*subdirs: str) -> str:
+    """Directory in which generated assets are cached on disk.
+
+    Defaults to `~/.cache/eagerx_franka`, but can be overridden with the `EAGERX_FRANKA_CACHE` environment variable.
+
+    :param subdirs: Optional subdirectories that are appended (and created) below the cache root.
+    :return: Absolute path to the cache directory.
+    """
+    root = os.environ.get("EAGERX_FRANKA_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "eagerx_franka"))
+    path = os.path.join(root, *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
 
+def content_hash(*chunks) -> str:
+    """Sha256 hex digest over a sequence of str/bytes chunks."""
+    h = hashlib.sha256()
+    for chunk in chunks:
+        chunk = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+        # Prefix the length, so that ("ab", "c") and ("a", "bc") hash differently.
+        h.update(len(chunk).to_bytes(8, "little"))
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def get_joint_limits_path(robot_model: str, joint_limits: str = None) -> str:
+    """Path to the joint limits file of a robot model, unless `joint_limits` already is a path."""
+    if isinstance(joint_limits, str):
+        return joint_limits
     config_path = os.path.dirname(eagerx_franka.__file__) + f"/assets/robots/{robot_model}"
+    return f"{config_path}/joint_limits.yaml"
+
+
+def get_joint_limits(robot_model: str, joint_limits: str):
+    import yaml
+
+    joint_limits = get_joint_limits_path(robot_model, joint_limits)
     try:
-        joint_limits = joint_limits if isinstance(joint_limits, str) else f"{config_path}/joint_limits.yaml"
         with open(joint_limits, "r") as yamlfile:
             joint_limits = yaml.safe_load(yamlfile)
     except IOError:
-        print(f"Joint Limits File was not found in: {config_path}")
+        print(f"Joint Limits File was not found in: {joint_limits}")
         raise
     return joint_limits
 
@@ -23,30 +54,23 @@ def generate_urdf(
     ns="",
     use_gripper=True,
 ):
+    """Uploads the urdf of `robot` to the ROS parameter server.
+
+    The xacro description is expanded in-process (see :func:`eagerx_franka.urdf.get_urdf`), so no roslaunch is required.
+
+    :return: The parameter key of the urdf.
+    """
     import rospy
-    import rosparam
-
-    module_path = os.path.dirname(eagerx_franka.__file__) + "/assets/"
-    launch_file = module_path + "franka_description.launch"
-    cli_args = [
-        f"module_path:={module_path}",
-        f"robot:={robot}",
-        f"ns:={ns}",
-        f"use_gripper:={use_gripper}",
-    ]
-    launch = launch_node(launch_file, cli_args)
-    launch.start()
-
-    # Replace mesh urls
-    urdf_key = f"{ns}/{robot}/robot_description"
-    urdf: str = rospy.get_param(urdf_key)
-    urdf_sbtd = urdf.replace("package://franka_description/", module_path)
-    rosparam.upload_params(urdf_key, urdf_sbtd)
+    from eagerx_franka.urdf import get_urdf
 
+    urdf_key = f"{ns}/{robot}/robot_description"
+    rospy.set_param(urdf_key, get_urdf(robot, use_gripper=use_gripper))
     return urdf_key
 
 
 def RescaleAction(env, min_action, max_action):
+    import gymnasium as gym
+
     env = gym.wrappers.rescale_action.RescaleAction(env, min_action, max_action)
     env.action_space = gym.spaces.Box(
         low=min_action,
@@ -1,5 +1,6 @@
 import eagerx
 import eagerx_franka
+from eagerx_franka.urdf import resolve_urdf
 from eagerx_franka import utils
 import numpy as np
 import stable_baselines3 as sb
@@ -18,8 +19,7 @@ def position_control(_graph, _arm, source_goal, safe_rate):
 
 
     c = _arm.config
-    urdf = c.urdf
-    urdf_sbtd = urdf.replace("package://", PACKAGE_PATH)
+    urdf_sbtd = resolve_urdf(c.urdf)
     collision = dict(
         workspace="eagerx_utility.safety.workspaces/exclude_ground",
         # workspace="eagerx_franka.safety.workspaces/exclude_ground_minus_2m",
@@ -56,8 +56,7 @@ def velocity_control(_graph, _arm, source_goal, safe_rate):
     from eagerx_utility.safety.node import SafeVelocityControl
 
     c = _arm.config
-    urdf = c.urdf
-    urdf_sbtd = urdf.replace("package://", PACKAGE_PATH)
+    urdf_sbtd = resolve_urdf(c.urdf)
     collision = dict(
         workspace="eagerx_utility.safety.workspaces/exclude_ground",
         # workspace="eagerx_franka.safety.workspaces/exclude_ground_minus_2m",
@@ -89,7 +88,6 @@ def velocity_control(_graph, _arm, source_goal, safe_rate):
 
 NAME = "HER_force_torque"
 LOG_DIR = os.path.dirname(eagerx_franka.__file__) + f"/../logs/{NAME}_{datetime.today().strftime('%Y-%m-%d-%H%M')}"
-PACKAGE_PATH = os.path.dirname(eagerx_franka.__file__) + "/assets/franka_panda/"
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""Measures the memory that is allocated during one environment step with a pybullet Franka arm, using tracemalloc.
+
+Usage: python scripts/benchmark_allocations.py [--steps 50] [--actuator moveit_to]
+
+All nodes run in the environment process (single process backend), so every engine node callback is traced. For
+every step, the peak of the traced memory above the memory in use before the step (i.e. the transient allocations)
+is reported. Then, for every engine node callback of eagerx_franka, the memory blocks that it allocated and that are
+still alive when it returns (its outputs and intermediate arrays) are counted with a profile hook.
+"""
+import os
+import sys
+import threading
+import collections
+import argparse
+import statistics
+import tracemalloc
+import eagerx
+import eagerx_franka
+
+
+class StepEnv(eagerx.BaseEnv):
+    def __init__(self, name, rate, graph, engine, backend):
+        super().__init__(name, rate, graph, engine, backend=backend, force_start=True)
+
+    def step(self, action):
+        return self._step(action)
+
+    def reset(self, seed=None, options=None):
+        return self._reset(self.state_space.sample())
+
+
+def make_env(actuator: str, rate: float):
+    from eagerx_pybullet.engine import PybulletEngine
+    from eagerx.backends.single_process import SingleProcess
+    from eagerx_franka.franka_arm.franka_arm import FrankaArm
+
+    graph = eagerx.Graph.create()
+    arm = FrankaArm.make(
+        name="panda",
+        robot_type="panda",
+        sensors=["position", "velocity", "ee_pos", "ee_orn"],
+        actuators=[actuator],
+        states=["position", "velocity", "gripper"],
+        rate=rate,
+    )
+    graph.add(arm)
+    for sensor in ["position", "velocity", "ee_pos", "ee_orn"]:
+        graph.connect(source=arm.sensors[sensor], observation=sensor)
+    graph.connect(action=actuator, target=arm.actuators[actuator])
+    engine = PybulletEngine.make(
+        rate=rate, gui=False, egl=False, sync=True, real_time_factor=0.0, process=eagerx.process.ENVIRONMENT
+    )
+    return StepEnv(name="allocations", rate=rate, graph=graph, engine=engine, backend=SingleProcess.make())
+
+
+class CallbackProfiler:
+    """Measures the peak of the memory that an engine node callback of eagerx_franka allocates (i.e. the size of its
+    outputs and intermediate arrays) with a profile hook."""
+
+    def __init__(self, package: str):
+        self.package = package
+        self.start = dict()
+        self.peaks = collections.defaultdict(list)
+        self.active = False
+
+    def __call__(self, frame, event, arg):
+        code = frame.f_code
+        if not self.active or code.co_name != "callback" or not code.co_filename.startswith(self.package):
+            return
+        if event == "call":
+            tracemalloc.reset_peak()
+            self.start[frame] = tracemalloc.get_traced_memory()[0]
+        elif event == "return":
+            node = type(frame.f_locals["self"]).__name__
+            self.peaks[node].append(tracemalloc.get_traced_memory()[1] - self.start.pop(frame))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=20)
+    parser.add_argument("--actuator", default="moveit_to", choices=["moveit_to", "pos_control", "vel_control"])
+    args = parser.parse_args()
+
+    eagerx.set_log_level(eagerx.WARN)
+    # The hook must be installed before the env is created, because callbacks may run in threads that it creates.
+    profiler = CallbackProfiler(os.path.dirname(eagerx_franka.__file__))
+    sys.setprofile(profiler), threading.setprofile(profiler)
+    env = make_env(args.actuator, args.rate)
+    env.reset()
+    action = env.action_space.sample()
+    for _ in range(5):  # Warm-up
+        env.step(action)
+
+    tracemalloc.start(1)
+    peaks = []
+    for _ in range(args.steps):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        env.step(action)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    profiler.active = True
+    for _ in range(args.steps):
+        env.step(action)
+    profiler.active = False
+    tracemalloc.stop()
+    env.shutdown()
+
+    print(f"transient memory per env step [kB]: median {statistics.median(peaks) / 1e3:.1f}, max {max(peaks) / 1e3:.1f}")
+    print("transient memory per callback [B]:")
+    for node, peaks in sorted(profiler.peaks.items()):
+        print(f"  {node:>24}: median {statistics.median(peaks):>6.0f}, max {max(peaks):>6.0f}")
@@ -0,0 +1,86 @@
+"""Compares the latency and accuracy of the inverse kinematics solvers with `IKinSpace` of the modern robotics toolkit.
+
+Usage: python scripts/benchmark_ik.py [--robot panda] [--n 500] [--seed 0]
+
+Target poses are generated with the forward kinematics of random joint positions within the joint limits. Two cases
+are evaluated:
+
+- tracking: the seed lies close to the target (N(0, 0.02) rad per joint), as in
+  :class:`~eagerx_franka.ik.node.EndEffectorDownward`, where the current joint positions are the seed.
+- distant: the seed lies further away (N(0, 0.3) rad per joint).
+
+For every solver, the median and 95th percentile latency, the success rate, and the median position and orientation
+error of the successful solutions are reported. For the batched solver, the latency is the time to solve all targets
+at once, divided by their number. The analytical solver keeps the redundancy angle (q7) of the seed, so
+it fails if the target pose cannot be reached within the joint limits with that q7. The analytical-near solver sweeps
+q7 around the seed in that case (see :meth:`~eagerx_franka.ik.analytical.AnalyticalSolver.solve_near`), as
+:class:`~eagerx_franka.ik.node.EndEffectorDownward` does before it falls back to the dls solver.
+"""
+import time
+import argparse
+import numpy as np
+import modern_robotics as mr
+import eagerx_franka.franka_arm.mr_descriptions as mrd
+from eagerx_franka.utils import get_joint_limits
+from eagerx_franka.ik.dls import DLSSolver
+from eagerx_franka.ik.analytical import AnalyticalSolver
+from eagerx_franka.ik.batch import solve_batch
+
+
+def errors(Slist, M, theta, T):
+    Tsb = mr.FKinSpace(M, Slist, theta)
+    R = Tsb[:3, :3].T @ T[:3, :3]
+    return np.linalg.norm(Tsb[:3, 3] - T[:3, 3]), np.arccos(np.clip(0.5 * (np.trace(R) - 1), -1.0, 1.0))
+
+
+def evaluate(solve, Slist, M, targets, seeds):
+    latency, success, pos_err, orn_err = [], [], [], []
+    for T, seed in zip(targets, seeds):
+        start = time.perf_counter()
+        theta, ok = solve(T, seed)
+        latency.append(time.perf_counter() - start)
+        success.append(ok)
+        if ok:
+            e_pos, e_orn = errors(Slist, M, theta, T)
+            pos_err.append(e_pos), orn_err.append(e_orn)
+    latency = 1e6 * np.array(latency)
+    return np.median(latency), np.percentile(latency, 95), np.mean(success), np.median(pos_err), np.median(orn_err)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--robot", default="panda", choices=["panda", "fr3"])
+    parser.add_argument("--n", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    des = getattr(mrd, args.robot)
+    limits = get_joint_limits(args.robot, None).values()
+    lower = np.array([j["limit"]["lower"] for j in limits])
+    upper = np.array([j["limit"]["upper"] for j in limits])
+    eomg, ev = 0.001, 0.001
+    analytical = AnalyticalSolver(lower, upper, des.M)
+    solvers = {
+        "mr.IKinSpace": lambda T, seed: mr.IKinSpace(des.Slist, des.M, T, seed, eomg, ev),
+        "dls": DLSSolver(des.Slist, des.M, lower, upper, eomg=eomg, ev=ev).solve,
+        "analytical": analytical.solve,
+        "analytical-near": analytical.solve_near,
+    }
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'case':>8} {'solver':>15} {'median [us]':>12} {'p95 [us]':>10} {'success':>8} {'pos [mm]':>9} {'orn [mrad]':>11}")
+    for case, std in [("tracking", 0.02), ("distant", 0.3)]:
+        joints = rng.uniform(lower, upper, size=(args.n, len(lower)))
+        targets = [mr.FKinSpace(des.M, des.Slist, q) for q in joints]
+        seeds = np.clip(joints + rng.normal(0, std, size=joints.shape), lower, upper)
+        for name, solve in solvers.items():
+            med, p95, success, e_pos, e_orn = evaluate(solve, des.Slist, des.M, targets, seeds)
+            print(f"{case:>8} {name:>15} {med:>12.1f} {p95:>10.1f} {success:>8.1%} {1e3 * e_pos:>9.3f} {1e3 * e_orn:>11.3f}")
+
+        start = time.perf_counter()
+        result = solve_batch(np.stack(targets), seeds, robot_type=args.robot, eomg=eomg, ev=ev, max_iter=20)
+        latency = 1e6 * (time.perf_counter() - start) / args.n
+        solved = np.flatnonzero(result.success)
+        e_pos, e_orn = np.median([errors(des.Slist, des.M, result.joints[i], targets[i]) for i in solved], axis=0)
+        success = np.mean(result.success)
+        print(f"{case:>8} {'batch':>15} {latency:>12.1f} {'-':>10} {success:>8.1%} {1e3 * e_pos:>9.3f} {1e3 * e_orn:>11.3f}")
@@ -0,0 +1,79 @@
+"""Measures the time it takes to import eagerx_franka modules in a fresh interpreter (as in spawned workers).
+
+Usage: python scripts/benchmark_import_time.py [--repeat 5] [--budget 50] [modules ...]
+
+For every module, the median wall-clock import time over `--repeat` fresh interpreters is reported, together with the
+heavy dependencies that were pulled in. With `--budget`, the script exits with a non-zero status if importing
+`eagerx_franka` takes longer than the budget [ms].
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+MODULES = [
+    "eagerx_franka",
+    "eagerx_franka.utils",
+    "eagerx_franka.urdf",
+    "eagerx_franka.franka_arm.mr_descriptions",
+    "eagerx_franka.franka_arm.kinematic_model",
+    "eagerx_franka.ik.node",
+    "eagerx_franka.franka_arm.real.enginenodes",
+    "eagerx_franka.franka_arm.pybullet.enginenodes",
+    "eagerx_franka.franka_arm.franka_arm",
+]
+HEAVY = [
+    "eagerx",
+    "gymnasium",
+    "scipy",
+    "pybullet",
+    "eagerx_pybullet",
+    "eagerx_reality",
+    "modern_robotics",
+    "rospy",
+    "quaternion",
+    "urdf_parser_py",
+    "yaml",
+]
+
+_SNIPPET = """
+import sys, time, json
+t = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t
+print(json.dumps(dict(dt=dt, heavy=[m for m in {heavy!r} if m in sys.modules])))
+"""
+
+
+def measure(module: str, repeat: int = 5):
+    """Median import time [ms] of `module` in fresh interpreters, and the heavy dependencies it imports."""
+    times, heavy = [], []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _SNIPPET.format(module=module, heavy=HEAVY)], check=True, capture_output=True, text=True
+        ).stdout
+        res = json.loads(out.strip().splitlines()[-1])
+        times.append(1000 * res["dt"])
+        heavy = res["heavy"]
+    return statistics.median(times), heavy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None, help="Import-time budget of `eagerx_franka` [ms].")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        results[module] = measure(module, args.repeat)
+        ms, heavy = results[module]
+        print(f"{module:<50} {ms:9.1f} ms   {', '.join(heavy) if heavy else '-'}")
+
+    if args.budget is not None:
+        ms = results["eagerx_franka"][0] if "eagerx_franka" in results else measure("eagerx_franka", args.repeat)[0]
+        if ms > args.budget:
+            print(f"`import eagerx_franka` took {ms:.1f} ms, which exceeds the budget of {args.budget:.1f} ms.")
+            sys.exit(1)
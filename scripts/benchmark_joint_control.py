@@ -0,0 +1,94 @@
+"""Measures the per-tick cost of applying a position command to the 7 arm joints in pybullet.
+
+Usage: python scripts/benchmark_joint_control.py [--ticks 2000] [--rates 20 60 120 240]
+
+Compares the previous command path (one `setJointMotorControl2` call per joint, to pass `maxVelocity`) with the
+vectorized one of :class:`~eagerx_franka.franka_arm.pybullet.enginenodes.FrankaJointController` in `position_control`
+(target clipped to within `max_vel / rate` of the current joint positions, one `setJointMotorControlArray` call). For
+every engine rate, the cost of the command and of the corresponding simulation step (incl. sub-steps) is reported in
+microseconds per tick.
+"""
+import math
+import time
+import argparse
+import numpy as np
+import pybullet
+from pybullet_utils import bullet_client
+from eagerx_franka.urdf import get_urdf_ref, resolve_urdf
+from eagerx_franka.franka_arm.kinematic_model import get_kinematic_model
+from eagerx_franka.franka_arm.pybullet.enginenodes import FrankaJointController
+
+
+def setup(p, rate: float):
+    p.resetSimulation()
+    p.setGravity(0, 0, -9.81)
+    p.setPhysicsEngineParameter(fixedTimeStep=1 / rate, numSubSteps=math.ceil((1 / rate) / (1 / 240)))
+    return p.loadURDF(resolve_urdf(get_urdf_ref("panda")), useFixedBase=True)
+
+
+def looped(p, body, joints, pos_gain, vel_gain, vel_target, max_vel, max_force):
+    def cb(currj, targj, rate):
+        stepj = currj + (targj - currj) * max_vel / rate
+        for idx, a, v, kp, kd, mv, mf in zip(joints, stepj, vel_target, pos_gain, vel_gain, max_vel, max_force):
+            p.setJointMotorControl2(
+                bodyIndex=body,
+                jointIndex=idx,
+                controlMode=pybullet.POSITION_CONTROL,
+                targetPosition=a,
+                targetVelocity=v,
+                positionGain=kp,
+                velocityGain=kd,
+                maxVelocity=mv,
+                force=mf,
+                physicsClientId=p._client,
+            )
+
+    return cb
+
+
+def vectorized(p, body, joints, pos_gain, vel_gain, vel_target, max_vel, max_force):
+    joint_cb = FrankaJointController._joint_control(
+        p, "position_control", body, joints, pos_gain, vel_gain, vel_target, max_vel, max_force
+    )
+
+    def cb(currj, targj, rate):
+        max_step = max_vel / rate
+        joint_cb(currj + np.clip(targj - currj, -max_step, max_step))
+
+    return cb
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--rates", type=float, nargs="+", default=[20, 60, 120, 240])
+    args = parser.parse_args()
+
+    model = get_kinematic_model("panda")
+    joints = list(range(7))
+    n = len(joints)
+    params = dict(
+        pos_gain=[0.5] * n,
+        vel_gain=[1.0] * n,
+        vel_target=[0.0] * n,
+        max_vel=(0.5 * model.vel_limit).astype("float32"),
+        max_force=[5.0] * n,
+    )
+    targj = np.array([0.5, 0.3, -0.2, -1.5, 0.1, 1.2, 0.4], dtype="float32")
+
+    p = bullet_client.BulletClient()
+    print(f"{'rate [Hz]':>10} {'path':>12} {'command [us]':>14} {'step [us]':>11}")
+    for rate in args.rates:
+        for name, make in [("looped", looped), ("vectorized", vectorized)]:
+            body = setup(p, rate)
+            cb = make(p, body, joints, **params)
+            t_cmd = t_step = 0.0
+            for _ in range(args.ticks):
+                currj = np.array([s[0] for s in p.getJointStates(body, joints)], dtype="float32")
+                t = time.perf_counter()
+                cb(currj, targj, rate)
+                t_cmd += time.perf_counter() - t
+                t = time.perf_counter()
+                p.stepSimulation()
+                t_step += time.perf_counter() - t
+            print(f"{rate:>10.0f} {name:>12} {1e6 * t_cmd / args.ticks:>14.1f} {1e6 * t_step / args.ticks:>11.1f}")
@@ -0,0 +1,54 @@
+"""Builds the table of inverse kinematics solutions that the `ee_pose` state of
+:class:`~eagerx_franka.franka_arm.franka_arm.FrankaArm` uses with `ik_table=True` (see
+:class:`~eagerx_franka.ik.table.IKTable`), and stores it in the cache directory.
+
+Usage: python scripts/build_ik_table.py [--robot panda] [--joint-limits PATH] [--processes N]
+
+The arm is loaded in a separate pybullet client (DIRECT mode) to measure its end-effector frame (the gripper link of
+the kinematic model), as the `ee_pose` state does. The table is keyed by the robot, the end-effector and the joint
+limits, so it has to be built once for every combination that is used (`--joint-limits` as the `joint_limits` argument
+of :meth:`~eagerx_franka.franka_arm.franka_arm.FrankaArm.make`). Tables that are already in the cache are not rebuilt.
+"""
+import time
+import argparse
+import numpy as np
+from pybullet_utils import bullet_client
+import pybullet
+from eagerx_franka.urdf import get_urdf_ref, resolve_urdf
+from eagerx_franka.franka_arm.kinematic_model import get_kinematic_model
+from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
+from eagerx_franka.franka_arm.pybullet.ik import TableIK
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--robot", default="panda")
+    parser.add_argument("--joint-limits", default=None)
+    parser.add_argument("--processes", type=int, default=None, help="Number of worker processes (default: all cpus).")
+    args = parser.parse_args()
+
+    urdf = get_urdf_ref(args.robot)
+    model = get_kinematic_model(args.robot, args.joint_limits, urdf=urdf)
+    p = bullet_client.BulletClient(connection_mode=pybullet.DIRECT)
+    body_id = p.loadURDF(resolve_urdf(urdf), useFixedBase=True)
+    index = BodyIndex(p, body_id)
+    joints = index.joints(model.joint_names).tolist()
+    start = time.perf_counter()
+    table = TableIK(
+        p,
+        body_id,
+        joints,
+        index.link(model.gripper_link),
+        model.joint_lower.tolist(),
+        model.joint_upper.tolist(),
+        args.robot,
+        model.gripper_link,
+        build=True,
+        processes=args.processes,
+    ).table
+    p.disconnect()
+    reachable = np.mean(~np.isnan(table.joints[..., 0]))
+    print(
+        f"Table of {model.gripper_link} ({args.robot}): {table.joints.shape}, {reachable:.1%} reachable, "
+        f"{time.perf_counter() - start:.1f} s"
+    )
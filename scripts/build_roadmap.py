@@ -0,0 +1,51 @@
+"""Builds the roadmap that the `moveit_to` and `moveit_to_ee_pose` actuators of
+:class:`~eagerx_franka.franka_arm.franka_arm.FrankaArm` plan over with `planner="roadmap"` (see
+:class:`~eagerx_franka.planning.roadmap.Roadmap`), and stores it in the cache directory.
+
+Usage: python scripts/build_roadmap.py [--robot panda] [--base-pos 0 0 0] [--base-or 0 0 0 1]
+
+The arm is loaded at its base pose in a separate pybullet client (DIRECT mode), and checked for collisions with a
+:class:`~eagerx_franka.franka_arm.pybullet.collision.CollisionChecker` with the same arguments as the actuators use. The
+roadmap is keyed by the collision model (incl. the base pose and the ground) and the joint limits of the urdf, so it
+has to be built once for every base pose that is used (`--base-pos` and `--base-or` as the arguments of
+:meth:`~eagerx_franka.franka_arm.franka_arm.FrankaArm.make`). Roadmaps that are already in the cache are not rebuilt.
+"""
+import time
+import argparse
+import numpy as np
+from pybullet_utils import bullet_client
+import pybullet
+from eagerx_franka.urdf import get_urdf_ref, resolve_urdf
+from eagerx_franka.ik.table import READY
+from eagerx_franka.franka_arm.kinematic_model import get_kinematic_model
+from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
+from eagerx_franka.franka_arm.pybullet.collision import CollisionChecker
+from eagerx_franka.planning.roadmap import Roadmap
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--robot", default="panda")
+    parser.add_argument("--base-pos", type=float, nargs=3, default=[0.0, 0.0, 0.0])
+    parser.add_argument("--base-or", type=float, nargs=4, default=[0.0, 0.0, 0.0, 1.0])
+    args = parser.parse_args()
+
+    urdf = resolve_urdf(get_urdf_ref(args.robot))
+    model = get_kinematic_model(args.robot)
+    joint_names = model.joint_names.tolist()
+
+    # The base pose as the simulated arm reports it (see CollisionChecker.get).
+    p = bullet_client.BulletClient(connection_mode=pybullet.DIRECT)
+    body_id = p.loadURDF(urdf, basePosition=args.base_pos, baseOrientation=args.base_or, useFixedBase=True)
+    pos, orn = p.getBasePositionAndOrientation(body_id)
+    index = BodyIndex(p, body_id)
+    joints = index.joints(joint_names)
+    lower, upper = index.lower[joints], index.upper[joints]
+    p.disconnect()
+
+    start = time.perf_counter()
+    checker = CollisionChecker(urdf, joint_names, np.clip(READY, lower, upper), base_pos=pos, base_orn=orn)
+    roadmap = Roadmap.load(checker, lower, upper, name=args.robot, build=True)
+    checker.close()
+    edges = len(roadmap.indices) // 2
+    print(f"Roadmap of {args.robot}: {len(roadmap.nodes)} nodes, {edges} edges, {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,67 @@
+"""Fits the sphere model of the links of a Franka arm (see :mod:`eagerx_franka.planning.spheres`) to the collision meshes
+of a urdf, and writes it to a yaml file.
+
+Usage: python scripts/fit_collision_spheres.py [--urdf eagerx_franka/assets/franka_panda/panda.urdf] [--size 0.03]
+       [--out eagerx_franka/assets/franka_panda/collision_spheres.yaml]
+
+The collision meshes of every link in :data:`~eagerx_franka.planning.spheres.LINKS` are read with the origins of their
+collision elements, and sampled on their surface (besides their vertices). The points are enclosed by spheres with
+:func:`~eagerx_franka.planning.spheres.fit_spheres`, one per `--size` meters of the largest extent of the link (and at
+least two). The centers are rounded to 0.1 mm, and the radii are enlarged to still contain all points. For every link, the
+number of spheres, the largest radius, and the ratio of the volume of the spheres (ignoring their overlap) to that of
+the bounding box of the mesh are reported.
+"""
+import os
+import argparse
+from xml.dom import minidom
+import numpy as np
+from scipy.spatial.transform import Rotation
+from eagerx_franka.urdf import get_assets_path
+from eagerx_franka.planning.spheres import LINKS, read_obj, sample_surface, fit_spheres
+
+
+def collision_points(urdf: str, link: str, samples: int) -> np.ndarray:
+    """The vertices and surface samples of the collision meshes of a link, in the link frame."""
+    element = next(e for e in minidom.parse(urdf).getElementsByTagName("link") if e.getAttribute("name") == link)
+    points = []
+    for collision in element.getElementsByTagName("collision"):
+        filename = collision.getElementsByTagName("mesh")[0].getAttribute("filename")
+        vertices, faces = read_obj(os.path.join(os.path.dirname(urdf), filename.replace("package://", "")))
+        origin = collision.getElementsByTagName("origin")
+        xyz, rpy = np.zeros(3), np.zeros(3)
+        if origin:
+            xyz = np.array(origin[0].getAttribute("xyz").split(), dtype="float64")
+            rpy = np.array(origin[0].getAttribute("rpy").split(), dtype="float64")
+        mesh = np.concatenate([vertices, sample_surface(vertices, faces, samples)])
+        points.append(Rotation.from_euler("xyz", rpy).apply(mesh) + xyz)
+    return np.concatenate(points)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urdf", default=get_assets_path() + "franka_panda/panda.urdf")
+    parser.add_argument("--size", type=float, default=0.03)
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--out", default=get_assets_path() + "franka_panda/collision_spheres.yaml")
+    args = parser.parse_args()
+
+    lines = [
+        f"# Sphere model [x, y, z, radius] of the collision meshes of {os.path.basename(args.urdf)}, in the link frames.",
+        f"# Generated with: python scripts/fit_collision_spheres.py --size {args.size} --samples {args.samples}",
+    ]
+    print(f"{'link':<20}{'spheres':>8}{'max radius':>12}{'volume ratio':>14}")
+    for link in LINKS:
+        points = collision_points(args.urdf, link, args.samples)
+        n = max(2, int(np.ceil(np.ptp(points, axis=0).max() / args.size)))
+        spheres = fit_spheres(points, n)
+        spheres[:, :3] = np.round(spheres[:, :3], 4)
+        # Rounding moves the centers by less than 0.1 mm.
+        spheres[:, 3] = np.ceil((spheres[:, 3] + 1e-4) * 1e4) / 1e4
+        assert np.all(np.min(np.linalg.norm(points[:, None] - spheres[None, :, :3], axis=-1) - spheres[:, 3], axis=1) <= 0)
+        ratio = np.sum(4 / 3 * np.pi * spheres[:, 3] ** 3) / np.prod(np.ptp(points, axis=0))
+        print(f"{link:<20}{len(spheres):>8}{spheres[:, 3].max():>12.4f}{ratio:>14.2f}")
+        lines.append(f"{link}:")
+        lines += [f"  - [{', '.join(f'{x:.4f}' for x in sphere)}]" for sphere in spheres]
+    with open(args.out, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"Written to {args.out}")
@@ -1,5 +1,6 @@
 import eagerx
 import eagerx_franka
+from eagerx_franka.urdf import resolve_urdf
 
 # Other
 import os
@@ -9,7 +10,6 @@ import numpy as np
 
 NP = eagerx.process.NEW_PROCESS
 ENV = eagerx.process.ENVIRONMENT
-PACKAGE_PATH = os.path.dirname(eagerx_franka.__file__) + "/assets/franka_panda/"
 
 cam_intrinsics = {
     "image_width": 640,
@@ -44,8 +44,7 @@ def position_control(_graph, _arm, source_goal, safe_rate):
     from eagerx_utility.safety.node import SafePositionControl
 
     c = _arm.config
-    urdf = c.urdf
-    urdf_sbtd = urdf.replace("package://", PACKAGE_PATH)
+    urdf_sbtd = resolve_urdf(c.urdf)
     collision = dict(
         workspace="eagerx_utility.safety.workspaces/exclude_ground",
         # workspace="eagerx_franka.safety.workspaces/exclude_ground_minus_2m",
@@ -82,8 +81,7 @@ def velocity_control(_graph, _arm, source_goal, safe_rate):
     from eagerx_utility.safety.node import SafeVelocityControl
 
     c = _arm.config
-    urdf = c.urdf
-    urdf_sbtd = urdf.replace("package://", PACKAGE_PATH)
+    urdf_sbtd = resolve_urdf(c.urdf)
     collision = dict(
         workspace="eagerx_utility.safety.workspaces/exclude_ground",
         # workspace="eagerx_franka.safety.workspaces/exclude_ground_minus_2m",
@@ -113,6 +111,33 @@ def velocity_control(_graph, _arm, source_goal, safe_rate):
     return safe
 
 
+class StepEnv(eagerx.BaseEnv):
+    def step(self, action):
+        return self._step(action)
+
+    def reset(self, seed=None, options=None):
+        return self._reset(self.state_space.sample())
+
+
+def make_step_env(name, sensors, actuators, **kwargs):
+    """An env with a panda arm at the ready pose in pybullet (without gravity), with observations and actions of it."""
+    from eagerx_pybullet.engine import PybulletEngine
+    from eagerx.backends.single_process import SingleProcess
+    from eagerx_franka.franka_arm.franka_arm import FrankaArm
+    from eagerx_franka.ik.table import READY
+
+    graph = eagerx.Graph.create()
+    arm = FrankaArm.make("arm", "panda", sensors=sensors, actuators=actuators, rate=20, **kwargs)
+    arm.states.position.space.update(low=READY.tolist(), high=READY.tolist())
+    graph.add(arm)
+    for sensor in sensors:
+        graph.connect(source=arm.sensors[sensor], observation=sensor)
+    for actuator in actuators:
+        graph.connect(action=actuator, target=arm.actuators[actuator])
+    engine = PybulletEngine.make(rate=20, gui=False, egl=False, sync=True, real_time_factor=0.0, process=ENV, gravity=0)
+    return StepEnv(name, 20, graph, engine, backend=SingleProcess.make(), force_start=True)
+
+
 @pytest.mark.timeout(60)
 @pytest.mark.parametrize("eps, num_steps, sync, rtf, p", [(3, 20, True, 0, NP), (3, 20, True, 0, ENV)])
 def test_franka(eps, num_steps, sync, rtf, p):
@@ -135,6 +160,7 @@ def test_franka(eps, num_steps, sync, rtf, p):
 
     # Create solid object
     from eagerx_utility.solid.solid import Solid
+
     urdf_path = os.path.dirname(eagerx_franka.__file__) + "/solid/assets/"
 
     solid = Solid.make(
@@ -237,6 +263,7 @@ def test_franka(eps, num_steps, sync, rtf, p):
 
     # Make backend
     from eagerx.backends.single_process import SingleProcess
+
     backend = SingleProcess.make()
 
     # Define environment
@@ -269,6 +296,229 @@ def test_franka(eps, num_steps, sync, rtf, p):
     print("\nShutdown")
 
 
+@pytest.mark.parametrize(
+    "sensors, actuators, expected",
+    [
+        (["position", "velocity", "ee_pos", "ee_orn", "ee_vel"], [], ["ee_link_state", "joint_states"]),
+        (["position"], ["moveit_to_ee_pose"], ["joint_states", "moveit_to_ee_pose", "task_space"]),
+        (["moveit_status", "moveit_time_to_goal"], ["moveit_to", "gripper_control"], ["gripper_control", "moveit_to"]),
+        (["position"], ["ee_dxyz", "ee_dyaw"], ["ee_downward", "ee_downward_control", "joint_states"]),
+        (["ee_vel", "mass_matrix", "ee_twist"], [], ["dynamics", "ee_link_state"]),
+    ],
+)
+def test_pybullet_engine_nodes(sensors, actuators, expected):
+    from eagerx_pybullet.engine import PybulletEngine
+    from eagerx_franka.franka_arm.franka_arm import FrankaArm
+
+    engine = PybulletEngine.make(rate=20, gui=False, egl=False, process=ENV)
+    arm = FrankaArm.make("arm", "panda", sensors=sensors, actuators=actuators)
+    nodes, _, _, _ = engine._register_object(arm).register()
+    assert sorted(n.split("/")[-1] for n in nodes) == expected
+
+
+@pytest.mark.parametrize(
+    "actuators", [["ee_dxyz"], ["ee_dxyz", "ee_dyaw", "pos_control"], ["ee_dxyz", "ee_dyaw", "vel_control"]]
+)
+def test_invalid_actuators(actuators):
+    from eagerx_franka.franka_arm.franka_arm import FrankaArm
+
+    with pytest.raises(ValueError):
+        FrankaArm.make("arm", "panda", actuators=actuators)
+
+
+@pytest.mark.parametrize("sensors, actuators", [(["position", "jacobian"], []), (["position"], ["ee_dxyz", "ee_dyaw"])])
+def test_reality_engine_unsupported(sensors, actuators):
+    from eagerx_reality.engine import RealEngine
+    from eagerx_franka.franka_arm.franka_arm import FrankaArm
+
+    engine = RealEngine.make(rate=20, process=ENV)
+    arm = FrankaArm.make("arm", "panda", sensors=sensors, actuators=actuators)
+    with pytest.raises(ValueError, match="not supported with the RealEngine"):
+        engine._register_object(arm).register()
+
+
+def test_body_index():
+    from pybullet_utils import bullet_client
+    from eagerx_franka.urdf import get_urdf_ref
+    from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
+
+    p = bullet_client.BulletClient()
+    body_id = p.loadURDF(resolve_urdf(get_urdf_ref("panda")), useFixedBase=True)
+    simulator = dict(client=p)
+    index = BodyIndex.get(simulator, body_id)
+    assert BodyIndex.get(simulator, body_id) is index
+    joints = index.joints([f"panda_joint{i}" for i in range(1, 8)])
+    assert joints.tolist() == list(range(7))
+    assert np.all(index.lower[joints] < index.upper[joints])
+    assert index.link_names[index.link("panda_grasptarget")] == "panda_grasptarget"
+    with pytest.raises(KeyError):
+        index.joints(["fr3_joint1"])
+    p.disconnect()
+
+
+def test_shadow_arm():
+    from pybullet_utils import bullet_client
+    from eagerx_franka.urdf import get_urdf_ref
+    from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
+    from eagerx_franka.franka_arm.pybullet.ik import ShadowArm
+
+    p = bullet_client.BulletClient()
+    urdf = resolve_urdf(get_urdf_ref("panda"))
+    body_id = p.loadURDF(urdf, basePosition=[0.1, 0.2, 0.3], useFixedBase=True)
+    index = BodyIndex(p, body_id)
+    joints = index.joints([f"panda_joint{i}" for i in range(1, 8)]).tolist()
+    ee_link = index.link("panda_grasptarget")
+    shadow = ShadowArm(p, body_id, urdf)
+
+    # Target pose of the simulated arm
+    q = [0.2, -0.3, 0.1, -2.0, 0.1, 1.8, 0.6]
+    for joint, position in zip(joints, q):
+        p.resetJointState(body_id, joint, position)
+    pos, orn = p.getLinkState(body_id, ee_link, computeForwardKinematics=True)[4:6]
+    kwargs = dict(endEffectorLinkIndex=ee_link, targetPosition=pos, targetOrientation=orn, maxNumIterations=100)
+
+    # The solution only depends on the seed, not on the state of the simulated arm.
+    seed = np.array(q) + 0.05
+    goal = shadow.inverse_kinematics(joints, seed, **kwargs)
+    for joint in joints:
+        p.resetJointState(body_id, joint, 0.0)
+    assert np.allclose(shadow.inverse_kinematics(joints, seed, **kwargs), goal)
+    for joint, position in zip(joints, goal):
+        p.resetJointState(body_id, joint, position)
+    assert np.allclose(p.getLinkState(body_id, ee_link, computeForwardKinematics=True)[4], pos, atol=1e-3)
+    shadow.close()
+
+    # A shared copy is closed by the last release, or when the simulator disconnects (for users without shutdown).
+    from types import SimpleNamespace
+
+    simulator = dict(client=p, object=SimpleNamespace(robot_objectid=[body_id], model_urdf=urdf))
+    shared = ShadowArm.get(simulator)
+    assert ShadowArm.get(simulator) is shared
+    ShadowArm.release(simulator, shared)
+    assert shared.client.isConnected()
+    ShadowArm.release(simulator, shared)
+    assert shared.client._client == -1 and ShadowArm.get(simulator) is not shared
+    shared = ShadowArm.get(simulator)
+    p.disconnect()
+    assert shared.client._client == -1 and p._client == -1
+
+
+@pytest.mark.parametrize("scale", [0.01, 0.2, 2.0])
+def test_joint_trajectory(scale):
+    from eagerx_franka.franka_arm.trajectory import JointTrajectory
+
+    rng = np.random.default_rng(0)
+    start = rng.uniform(-1, 1, 7)
+    goal = start + scale * rng.uniform(-1, 1, 7)
+    vel, acc, jerk = np.full(7, 2.0), np.full(7, 10.0), np.full(7, 5000.0)
+    traj = JointTrajectory(start, goal, vel, acc, jerk)
+    assert np.allclose(traj.sample(0.0), start) and np.array_equal(traj.sample(traj.duration), goal)
+
+    # The limits are respected, and the most limiting one is reached by the joint that moves furthest.
+    dt = traj.duration / 10000
+    q = np.stack([traj.sample(t) for t in np.arange(10001) * dt])
+    v = np.diff(q, axis=0) / dt
+    a = np.diff(v, axis=0) / dt
+    assert np.all(np.abs(v) <= vel * 1.001) and np.all(np.abs(a) <= acc * 1.001)
+    assert np.isclose(np.abs(a).max(), acc[0], rtol=1e-2) or np.isclose(np.abs(v).max(), vel[0], rtol=1e-2)
+
+    # Retargeting keeps the positions until then and the timing, but ends at the new goal.
+    duration, before = traj.duration, traj.sample(traj.duration / 2)
+    assert traj.retarget(goal + 1e-3, duration / 2) and traj.duration == duration
+    assert np.allclose(traj.sample(duration / 2), before) and np.allclose(traj.sample(duration), goal + 1e-3)
+    assert not traj.retarget(goal, duration)
+
+    # A goal at the start is reached immediately.
+    assert JointTrajectory(start, start, vel, acc, jerk).duration == 0.0
+
+
+def test_moveit_changing_goal():
+    from eagerx_franka.ik.table import READY
+
+    env = make_step_env("MoveItEnv", ["position"], ["moveit_to"])
+
+    # A goal that changes slightly every tick is reached as fast as a static one (1 rad in about 1.1 s).
+    rng = np.random.default_rng(0)
+    env.reset()
+    goal = READY + [1.0, 0, 0, 0, 0, 0, 0]
+    for _ in range(30):
+        q = env.step(dict(moveit_to=(goal + rng.uniform(-1e-3, 1e-3, 7)).astype("float32")))["position"].ravel()
+    assert np.abs(q - goal).max() < 1e-2
+    env.shutdown()
+
+
+def test_ik_cache_base_pose():
+    # The solutions of the (process-wide) ik cache of an env are not reused by a later env with another base pose.
+    pose = np.array([0.5, 0.1, 0.4, 1.0, 0.0, 0.0, 0.0], dtype="float32")
+    for base_pos in ([0.0, 0.0, 0.0], [0.1, -0.1, 0.0]):
+        env = make_step_env("CacheEnv", ["ee_pos"], ["moveit_to_ee_pose"], base_pos=base_pos)
+        env.reset()
+        for _ in range(40):
+            ee_pos = env.step(dict(moveit_to_ee_pose=pose))["ee_pos"].ravel()
+        assert np.allclose(ee_pos, pose[:3], atol=1e-2)
+        env.shutdown()
+
+
+def test_filtered_ik_candidates():
+    from pybullet_utils import bullet_client
+    from eagerx_franka.urdf import get_urdf_ref
+    from eagerx_franka.ik.batch import load_joint_limits
+    from eagerx_franka.ik.table import READY
+    from eagerx_franka.franka_arm.pybullet.body_index import BodyIndex
+    from eagerx_franka.franka_arm.pybullet.collision import CollisionChecker
+    from eagerx_franka.franka_arm.pybullet.ik import AnalyticalIK
+
+    p = bullet_client.BulletClient()
+    urdf = resolve_urdf(get_urdf_ref("panda"))
+    body_id = p.loadURDF(urdf, useFixedBase=True)
+    index = BodyIndex(p, body_id)
+    names = [f"panda_joint{i}" for i in range(1, 8)]
+    joints = index.joints(names).tolist()
+    ee_link = index.link("panda_grasptarget")
+    lower, upper = load_joint_limits("panda")
+    ik = AnalyticalIK(p, body_id, joints, ee_link, lower, upper)
+    base_pos, base_orn = p.getBasePositionAndOrientation(body_id)
+
+    # All candidates reach the pose, but the ones closest to READY collide with the arm itself.
+    pos, orn = [-0.115, -0.301, 0.534], [0.215, 0.625, 0.677, -0.323]
+    candidates = ik.solve_all(pos, orn, np.linspace(lower[6], upper[6], 10)[1:-1], READY)
+    candidates = candidates[np.argsort(np.linalg.norm(candidates - READY, axis=1))]
+    checker = CollisionChecker(urdf, names, READY, base_pos=base_pos, base_orn=base_orn)
+    free = [checker.is_free(q) for q in candidates]
+    assert not free[0] and any(free)
+    for q in candidates:
+        for joint, position in zip(joints, q):
+            p.resetJointState(body_id, joint, position)
+        assert np.allclose(p.getLinkState(body_id, ee_link, computeForwardKinematics=True)[4], pos, atol=1e-4)
+    checker.close()
+
+    # A raised ground is a minimum height of the links (except those that touch it in the reference configuration).
+    low = ik.solve_all([0.5, 0.3, 0.1], [1, 0, 0, 0], [READY[6]], READY)[0]
+    checker = CollisionChecker(urdf, names, READY, base_pos=base_pos, base_orn=base_orn, ground_height=0.1)
+    assert checker.is_free(READY) and not checker.is_free(low)
+    checker.close()
+    p.disconnect()
+
+
+def test_safe_joint_controller():
+    from eagerx_franka.planning.spheres import SphereChecker
+
+    env = make_step_env("SafeEnv", ["position"], ["vel_control"], safe_control=True)
+
+    # Pitching the shoulder forward drives the hand into the ground, so the motion is held before the contact.
+    env.reset()
+    forward = np.array([0, 0.8, 0, 0, 0, 0, 0], dtype="float32")
+    for _ in range(40):
+        q = env.step(dict(vel_control=forward))["position"].ravel()
+    assert 0.0 < q[1] < 0.7 and SphereChecker().is_free(q)
+
+    # Motions away from the collision are not held.
+    for _ in range(5):
+        back = env.step(dict(vel_control=-forward))["position"].ravel()
+    assert back[1] < q[1] - 0.1
+    env.shutdown()
+
+
 if __name__ == "__main__":
     test_franka(3, 20, True, 0, NP)
     test_franka(3, 20, True, 0, ENV)
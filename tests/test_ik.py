@@ -0,0 +1,237 @@
+import pytest
+import numpy as np
+
+
+@pytest.mark.parametrize("robot_type", ["panda", "fr3"])
+def test_dls_solver(robot_type):
+    import modern_robotics as mr
+    import eagerx_franka.franka_arm.mr_descriptions as mrd
+    from eagerx_franka.ik.dls import DLSSolver
+    from eagerx_franka.utils import get_joint_limits
+
+    des = getattr(mrd, robot_type)
+    limits = get_joint_limits(robot_type, None).values()
+    lower = np.array([j["limit"]["lower"] for j in limits])
+    upper = np.array([j["limit"]["upper"] for j in limits])
+    solver = DLSSolver(des.Slist, des.M, lower, upper)
+
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        joints = rng.uniform(lower, upper)
+        R, p, J = solver.fk_jacobian(joints)
+        T = mr.FKinSpace(des.M, des.Slist, joints)
+        assert np.allclose(R, T[:3, :3]) and np.allclose(p, T[:3, 3])
+        assert np.allclose(J, mr.JacobianSpace(des.Slist, joints))
+
+        seed = np.clip(joints + rng.normal(0, 0.05, size=joints.shape), lower, upper)
+        theta, success = solver.solve(T, seed)
+        assert success
+        assert np.all(theta >= lower) and np.all(theta <= upper)
+        assert np.allclose(mr.FKinSpace(des.M, des.Slist, theta), T, atol=2e-3)
+
+        # Warm start from the previous solution
+        theta, success = solver.solve(T)
+        assert success and solver.iterations == 0
+
+
+def test_dls_solver_time_budget():
+    import modern_robotics as mr
+    import eagerx_franka.franka_arm.mr_descriptions as mrd
+    from eagerx_franka.ik.dls import DLSSolver
+    from eagerx_franka.ik.batch import load_joint_limits
+
+    lower, upper = load_joint_limits("panda")
+    joints = (lower + upper) / 2
+    T = mr.FKinSpace(mrd.panda.M, mrd.panda.Slist, joints)
+    seed = joints + 0.3
+
+    # Without time, the seed is the best iterate.
+    solver = DLSSolver(mrd.panda.Slist, mrd.panda.M, lower, upper, time_budget=0.0)
+    theta, success = solver.solve(T, seed)
+    assert not success and solver.timed_out and solver.iterations == 0
+    assert np.allclose(theta, seed) and np.all(solver.residual > 0.01)
+    seed_residual = solver.residual.copy()
+
+    # With enough time, the solution is that of the solver without a budget.
+    solver.time_budget = 1.0
+    theta, success = solver.solve(T, seed)
+    assert success and not solver.timed_out and np.all(solver.residual <= 0.001)
+    assert np.allclose(theta, DLSSolver(mrd.panda.Slist, mrd.panda.M, lower, upper).solve(T, seed)[0])
+
+    # The best iterate is returned if the iterations run out.
+    solver.max_iter = 1
+    theta, success = solver.solve(T, seed)
+    assert not success and not solver.timed_out and np.all(solver.residual < seed_residual)
+
+
+@pytest.mark.parametrize("robot_type", ["panda", "fr3"])
+def test_analytical_solver(robot_type):
+    import modern_robotics as mr
+    import eagerx_franka.franka_arm.mr_descriptions as mrd
+    from eagerx_franka.ik.analytical import AnalyticalSolver
+    from eagerx_franka.utils import get_joint_limits
+
+    des = getattr(mrd, robot_type)
+    limits = get_joint_limits(robot_type, None).values()
+    lower = np.array([j["limit"]["lower"] for j in limits])
+    upper = np.array([j["limit"]["upper"] for j in limits])
+    # End-effector 0.1 m beyond the flange
+    M = des.M @ mr.RpToTrans(np.eye(3), [0.0, 0.0, 0.1])
+    solver = AnalyticalSolver(lower, upper, M)
+
+    rng = np.random.default_rng(0)
+    swept = 0
+    for _ in range(50):
+        joints = rng.uniform(lower, upper)
+        T = mr.FKinSpace(M, des.Slist, joints)
+        solutions = solver.solve_all(T, joints[6], q1_singular=joints[0])
+        valid = solutions[~np.isnan(solutions[:, 0])]
+        for theta in valid:
+            assert np.all(theta >= lower) and np.all(theta <= upper)
+            assert np.allclose(mr.FKinSpace(M, des.Slist, theta), T, atol=1e-6)
+
+        # The branch of the seed is recovered.
+        theta, success = solver.solve(T, joints)
+        assert success and np.allclose(theta, joints, atol=1e-6)
+
+        # Another redundancy angle yields another solution (if any) for the same pose.
+        theta, success = solver.solve(T, joints, q7=(joints[6] + upper[6]) / 2)
+        if success:
+            assert np.allclose(mr.FKinSpace(M, des.Slist, theta), T, atol=1e-6)
+
+        # A nearby seed whose q7 cannot reach the pose is recovered by sweeping q7.
+        seed = np.clip(joints + rng.normal(0, 0.02, 7), lower, upper)
+        theta, success = solver.solve_near(T, seed)
+        assert success and np.allclose(mr.FKinSpace(M, des.Slist, theta), T, atol=1e-6)
+        if not solver.solve(T, seed)[1]:
+            swept += 1
+            assert abs(theta[6] - seed[6]) <= 0.5 + 1e-9
+    assert swept > 0
+
+
+@pytest.mark.parametrize("robot_type, processes", [("panda", 0), ("fr3", 2)])
+def test_solve_batch(robot_type, processes):
+    import modern_robotics as mr
+    import eagerx_franka.franka_arm.mr_descriptions as mrd
+    from eagerx_franka.ik.batch import solve_batch, load_joint_limits
+
+    des = getattr(mrd, robot_type)
+    lower, upper = load_joint_limits(robot_type)
+    rng = np.random.default_rng(0)
+    joints = rng.uniform(lower, upper, size=(40, 7))
+    T = np.stack([mr.FKinSpace(des.M, des.Slist, q) for q in joints])
+    seeds = np.clip(joints + rng.normal(0, 0.05, size=joints.shape), lower, upper)
+
+    result = solve_batch(T, seeds, robot_type=robot_type, processes=processes, chunk_size=16)
+    assert result.joints.shape == (40, 7) and result.success.all()
+    assert np.all(result.residual <= 0.001)
+    assert np.all(result.joints >= lower) and np.all(result.joints <= upper)
+    for theta, target in zip(result.joints, T):
+        assert np.allclose(mr.FKinSpace(des.M, des.Slist, theta), target, atol=2e-3)
+
+    # Poses as [x, y, z, qx, qy, qz, qw]
+    from scipy.spatial.transform import Rotation
+
+    poses = np.concatenate([T[:, :3, 3], Rotation.from_matrix(T[:, :3, :3]).as_quat()], axis=1)
+    assert np.allclose(solve_batch(poses, seeds, robot_type=robot_type).joints, result.joints)
+
+
+def test_ik_cache():
+    from eagerx_franka.ik.cache import IKCache
+
+    cache = IKCache.get("test_ik_cache", size=2, pos_resolution=0.001, orn_resolution=0.01)
+    assert IKCache.get("test_ik_cache", size=2, pos_resolution=0.001, orn_resolution=0.01) is cache
+    pose, current, solution = np.array([0.4, 0.0, 0.4, 1.0, 0.0, 0.0, 0.0]), np.zeros(7), np.full(7, 0.1)
+    assert cache.lookup(pose, current) == (None, None)
+    cache.store(pose, solution)
+
+    # Hit within the resolution (and for the quaternion with the opposite sign)
+    jitter = pose + [0.0002, -0.0002, 0.0, 0.0, 0.0, 0.0, 0.0]
+    assert np.array_equal(cache.lookup(jitter, current)[0], solution)
+    assert np.array_equal(cache.lookup(-pose * [-1, -1, -1, 1, 1, 1, 1], current)[0], solution)
+    # Warm start for a nearby pose, or for a solution on another branch
+    hit, warm_start = cache.lookup(pose + [0.003, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0], current)
+    assert hit is None and np.array_equal(warm_start, solution)
+    assert cache.lookup(pose + [0.3, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0], current) == (None, None)
+    assert cache.lookup(pose, current + [np.pi, 0, 0, 0, 0, 0, 0]) == (None, None)
+    # No warm start is looked up (or counted) for solvers that cannot start from one.
+    assert cache.lookup(pose + [0.003, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0], current, warm_start=False) == (None, None)
+    assert cache.stats == dict(hits=2, misses=5, warm_starts=1, size=1)
+
+    # Least recently used solutions are evicted.
+    cache.store(pose + [0.1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0], solution)
+    cache.lookup(pose, current)
+    cache.store(pose + [0.2, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0], solution)
+    assert cache.lookup(pose, current)[0] is not None
+    assert cache.lookup(pose + [0.1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0], current)[0] is None
+
+
+@pytest.mark.parametrize("robot_type", ["panda", "fr3"])
+def test_kinematics(robot_type):
+    import modern_robotics as mr
+    from pybullet_utils import bullet_client
+    import eagerx_franka.franka_arm.mr_descriptions as mrd
+    from eagerx_franka.urdf import get_urdf_ref, resolve_urdf
+    from eagerx_franka.ik.batch import load_joint_limits
+    from eagerx_franka.ik.kinematics import Kinematics
+
+    des = getattr(mrd, robot_type)
+    lower, upper = load_joint_limits(robot_type)
+    joints = np.random.default_rng(0).uniform(lower, upper, size=(10, 7))
+    kin = Kinematics.from_description(robot_type)
+    result = kin.forward(joints, links=True, jacobians=True)
+    assert result.links.shape == (10, 8, 4, 4)
+
+    p = bullet_client.BulletClient()
+    body_id = p.loadURDF(resolve_urdf(get_urdf_ref(robot_type)), useFixedBase=True)
+    Blist = mr.Adjoint(mr.TransInv(des.M)) @ des.Slist
+    for i, q in enumerate(joints):
+        assert np.allclose(result.T[i], mr.FKinSpace(des.M, des.Slist, q))
+        assert np.allclose(result.Js[i], mr.JacobianSpace(des.Slist, q))
+        assert np.allclose(result.Jb[i], mr.JacobianBody(Blist, q))
+
+        # The link frames of link1 to link8 in pybullet
+        for joint, position in enumerate(q):
+            p.resetJointState(body_id, joint, position)
+        for link in range(8):
+            pos, orn = p.getLinkState(body_id, link, computeForwardKinematics=True)[4:6]
+            assert np.allclose(result.links[i, link, :3, 3], pos, atol=1e-5)
+            assert np.allclose(result.links[i, link, :3, :3], np.reshape(p.getMatrixFromQuaternion(orn), (3, 3)), atol=1e-5)
+    p.disconnect()
+
+    # A single configuration
+    single = kin.forward(joints[0], jacobians=True)
+    assert np.allclose(single.T, result.T[0]) and np.allclose(single.Jb, result.Jb[0]) and single.links is None
+
+
+def test_ik_table(tmp_path, monkeypatch):
+    import modern_robotics as mr
+    import eagerx_franka.franka_arm.mr_descriptions as mrd
+    from eagerx_franka.ik.batch import load_joint_limits
+    from eagerx_franka.ik.dls import DLSSolver
+    from eagerx_franka.ik.table import IKTable, downward_orientations
+
+    monkeypatch.setenv("EAGERX_FRANKA_CACHE", str(tmp_path))
+    lower, upper = load_joint_limits("panda")
+    kwargs = dict(name="flange", low=(0.4, -0.1, 0.2), high=(0.6, 0.1, 0.4), resolution=0.1, yaw_steps=4, tilts=())
+    with pytest.raises(FileNotFoundError):
+        IKTable.load("panda", mrd.panda.M, lower, upper, **kwargs)
+    table = IKTable.load("panda", mrd.panda.M, lower, upper, processes=0, build=True, **kwargs)
+    assert isinstance(table.joints, np.memmap) and table.joints.shape == (3, 3, 3, 4, 7)
+    assert IKTable.load("panda", mrd.panda.M, lower, upper, **kwargs) is table
+    assert len(list(tmp_path.glob("ik_table/panda_flange_*.npy"))) == 1
+
+    # Grid poses map to their (reachable) solutions.
+    solved = ~np.isnan(table.joints[..., 0])
+    assert solved.mean() > 0.9
+    i, j, k, o = np.argwhere(solved)[0]
+    T = mr.FKinSpace(mrd.panda.M, mrd.panda.Slist, table.joints[i, j, k, o])
+    assert np.allclose(T[:3, :3], downward_orientations(4, ())[o], atol=1e-2)
+
+    # Nearby poses are refined from the nearest solution.
+    solver = DLSSolver(mrd.panda.Slist, mrd.panda.M, lower, upper, max_iter=10)
+    T[:3, 3] += [0.03, -0.02, 0.01]
+    theta, success = solver.solve(T, table.lookup(T))
+    assert success and np.allclose(mr.FKinSpace(mrd.panda.M, mrd.panda.Slist, theta), T, atol=2e-3)
+    T[:3, 3] = [1.0, 0.0, 0.3]
+    assert table.lookup(T) is None
@@ -1,2 +1,32 @@
+import sys
+import subprocess
+import pytest
+
+
 def test_import():
     import eagerx_franka
+
+
+@pytest.mark.parametrize(
+    "module, deps",
+    [
+        ("eagerx_franka", ["eagerx", "gymnasium", "scipy", "pybullet"]),
+        ("eagerx_franka.utils", ["gymnasium", "yaml"]),
+        ("eagerx_franka.urdf", ["eagerx", "yaml", "urdf_parser_py"]),
+        ("eagerx_franka.ik.node", ["scipy", "modern_robotics"]),
+        ("eagerx_franka.franka_arm.real.enginenodes", ["rospy", "quaternion", "dynamic_reconfigure"]),
+    ],
+)
+def test_lazy_import(module, deps):
+    # Run in a fresh interpreter, because other tests already imported everything.
+    code = f"import sys, {module}; print(','.join(m for m in {deps!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    assert out.strip() == "", f"Importing `{module}` eagerly imports: {out.strip()}"
+
+
+def test_lazy_attrs():
+    import eagerx_franka
+    from eagerx_franka.franka_arm.franka_arm import FrankaArm
+
+    assert eagerx_franka.FrankaArm is FrankaArm
+    assert "FrankaArm" in dir(eagerx_franka)
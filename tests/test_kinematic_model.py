@@ -0,0 +1,22 @@
+import numpy as np
+
+
+def test_kinematic_model_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("EAGERX_FRANKA_CACHE", str(tmp_path))
+    import eagerx_franka.franka_arm.kinematic_model as km
+
+    monkeypatch.setattr(km, "_MODELS", dict())
+    model = km.get_kinematic_model("panda")
+    assert model is km.get_kinematic_model("panda")
+    assert model.joint_names.tolist() == [f"panda_joint{i}" for i in range(1, 8)]
+    assert model.gripper_link == "panda_grasptarget"
+
+    # Reload from disk
+    km._MODELS.clear()
+    cached = km.get_kinematic_model("panda")
+    assert cached is not model
+    assert cached.digest == model.digest
+    assert cached.joint_limits == model.joint_limits
+    assert cached.joint_index == model.joint_index
+    assert np.allclose(cached.joint_lower, model.joint_lower)
+    assert np.allclose(cached.vel_limit, model.vel_limit)
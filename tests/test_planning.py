@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+
+
+def test_roadmap(tmp_path, monkeypatch):
+    from eagerx_franka.urdf import get_urdf_ref, resolve_urdf
+    from eagerx_franka.ik.table import READY
+    from eagerx_franka.ik.batch import load_joint_limits
+    from eagerx_franka.franka_arm.pybullet.collision import CollisionChecker
+    from eagerx_franka.franka_arm.trajectory import WaypointTrajectory
+    from eagerx_franka.planning.roadmap import Roadmap
+
+    monkeypatch.setenv("EAGERX_FRANKA_CACHE", str(tmp_path))
+    checker = CollisionChecker(resolve_urdf(get_urdf_ref("panda")), [f"panda_joint{i}" for i in range(1, 8)], READY)
+    assert checker.is_free(READY)
+    lower, upper = load_joint_limits("panda")
+    with pytest.raises(FileNotFoundError):
+        Roadmap.load(checker, lower, upper, name="panda", samples=300)
+    roadmap = Roadmap.load(checker, lower, upper, name="panda", samples=300, build=True)
+    assert isinstance(roadmap.nodes, np.memmap) and roadmap.nodes.shape == (300, 7)
+    assert Roadmap.load(checker, lower, upper, name="panda", samples=300) is roadmap
+    assert len(list(tmp_path.glob("roadmap/panda_*/nodes.npy"))) == 1
+
+    # The straight line to this goal passes through the ground.
+    goal = np.array([1.945, -0.295, -1.471, -2.404, 0.875, 0.163, -1.481])
+    assert checker.is_free(goal) and not checker.segment_free(READY, goal)
+    path = roadmap.plan(READY, goal, checker)
+    assert len(path) > 2 and np.allclose(path[0], READY) and np.allclose(path[-1], goal)
+    assert all(checker.segment_free(a, b) for a, b in zip(path[:-1], path[1:]))
+    assert len(roadmap.plan(READY, READY + 0.1, checker)) == 2
+
+    # The trajectory stops at every waypoint.
+    limits = dict(vel_limit=np.full(7, 1.0), acc_limit=np.full(7, 5.0), jerk_limit=np.full(7, 2500.0))
+    traj = WaypointTrajectory(path, **limits)
+    assert np.allclose(traj.sample(0.0), READY) and np.allclose(traj.sample(traj.duration), goal)
+    assert np.allclose(traj.sample(traj.segments[0].duration), path[1])
+    checker.close()
+
+
+def test_sphere_checker():
+    from eagerx_franka.urdf import get_urdf_ref, resolve_urdf, get_assets_path
+    from eagerx_franka.ik.table import READY
+    from eagerx_franka.ik.batch import load_joint_limits
+    from eagerx_franka.franka_arm.pybullet.collision import CollisionChecker
+    from eagerx_franka.planning.spheres import SphereChecker, LINKS, load_spheres, read_obj
+
+    # The shipped spheres contain the vertices of the collision meshes.
+    spheres = load_spheres()
+    assert list(spheres) == LINKS
+    meshes = get_assets_path() + "franka_panda/meshes/collision/"
+    for link, mesh in zip(LINKS, [f"link{i}" for i in range(8)] + ["hand", "finger", "finger"]):
+        vertices = read_obj(meshes + f"{mesh}.obj")[0]
+        if link == "panda_rightfinger":
+            vertices = vertices * [-1, -1, 1]
+        distance = np.linalg.norm(vertices[:, None] - spheres[link][None, :, :3], axis=-1) - spheres[link][:, 3]
+        assert np.all(distance.min(axis=1) <= 0), link
+
+    # The checks are conservative w.r.t. the collision meshes.
+    checker = SphereChecker("panda")
+    lower, upper = load_joint_limits("panda")
+    q = np.random.default_rng(0).uniform(lower, upper, size=(300, 7))
+    free = checker.check(q)
+    assert checker.is_free(READY) and 0 < free.mean() < 1
+    assert np.array_equal(free[:10], [checker.is_free(x) for x in q[:10]])
+    urdf = resolve_urdf(get_urdf_ref("panda"))
+    meshes = CollisionChecker(urdf, [f"panda_joint{i}" for i in range(1, 8)], READY, base_pos=(0, 0, 0.05))
+    assert all(meshes.is_free(x) for x in q[free])
+    meshes.close()
+
+    # The straight line between free configurations is checked in between.
+    goal = np.array([-2.511, -0.549, -0.404, -0.172, 0.361, 0.958, -1.497])
+    assert checker.is_free(goal) and not checker.segment_free(READY, goal)
+    assert checker.segment_free(READY, READY + 0.1)
+
+    # Links that are within the workspace at the reference are kept within it.
+    hand = checker.centers(q[free])[:, :, checker.links == LINKS.index("panda_hand")]
+    bounded = SphereChecker("panda", ground_height=0.2, workspace=([-2, -2, -2], [0.5, 2, 2]))
+    assert bounded.is_free(READY)
+    assert not bounded.is_free(q[free][np.argmin(hand[:, 2].min(axis=1))])
+    assert not bounded.is_free(q[free][np.argmax(hand[:, 0].max(axis=1))])
@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.mark.parametrize("robot", ["panda", "fr3", "dual_panda"])
+def test_get_urdf(robot, tmp_path, monkeypatch):
+    monkeypatch.setenv("EAGERX_FRANKA_CACHE", str(tmp_path))
+    import eagerx_franka.urdf as urdf
+    from urdf_parser_py.urdf import URDF
+
+    monkeypatch.setattr(urdf, "_URDFS", dict())
+    xml = urdf.get_urdf(robot, use_gripper=True, gazebo=False)
+    assert "package://" not in xml
+    assert "xacro" not in xml
+    joints = URDF.from_xml_string(xml).joint_map
+    arm_ids = ["panda_1", "panda_2"] if robot == "dual_panda" else [robot]
+    for arm_id in arm_ids:
+        assert all(f"{arm_id}_joint{i}" in joints for i in range(1, 9))
+        assert f"{arm_id}_finger_joint2" in joints
+
+    # Load from disk
+    urdf._URDFS.clear()
+    assert urdf.get_urdf(robot, use_gripper=True, gazebo=False) == xml
+    assert len(list(tmp_path.glob("xacro/*.urdf"))) == 1
+
+
+@pytest.mark.parametrize("regenerate", [False, True])
+def test_urdf_ref(regenerate, tmp_path, monkeypatch):
+    monkeypatch.setenv("EAGERX_FRANKA_CACHE", str(tmp_path))
+    import eagerx_franka.urdf as urdf
+
+    monkeypatch.setattr(urdf, "_PATHS", dict())
+    ref = urdf.get_urdf_ref("panda", regenerate=regenerate)
+    assert urdf.is_urdf_ref(ref) and len(ref) < 256
+    assert ref == urdf.get_urdf_ref("panda", regenerate=regenerate)
+
+    # Materialised once, with resolved mesh urls
+    path = urdf.resolve_urdf(ref)
+    assert path.endswith(".urdf") and path == urdf.resolve_urdf(ref)
+    with open(path, "r") as f:
+        xml = f.read()
+    assert "package://" not in xml
+    assert len(list(tmp_path.glob("urdf/*/*.urdf"))) == 1
+
+    # References are verified against the content hash
+    with pytest.raises(ValueError):
+        urdf.load_urdf(ref[:-1] + ("0" if ref[-1] != "0" else "1"))